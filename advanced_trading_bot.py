@@ -4,14 +4,17 @@ Combines OrderBookData metrics with AI agent decision-making
 """
 from hyperliquid_trader import HyperLiquidTrader
 from trading_agent import previsione_trading_agent
-from dashboard_simple import OrderBookData
-from indicators import analyze_multiple_tickers
+from orderflow import OrderBookData
+from indicators import analyze_multiple_tickers, get_shared_analyzer
 from news_feed import fetch_latest_news
 from sentiment import get_sentiment
-from forecaster import get_crypto_forecasts
+from forecaster import get_crypto_forecasts, get_forecast_scheduler
 from utils import check_stop_loss
 import db_utils
-import threading
+import hl_client
+from market_state import MARKET_STATE_REFRESH_INTERVAL, get_market_state_cache
+from screener import format_screen, screen_universe
+from ws_manager import get_ws_manager
 import time
 import json
 import os
@@ -53,35 +56,38 @@ class AdvancedTradingBot:
         self.cooldown_minutes = 30
         self.closed_positions_cooldown = {}  # symbol → timestamp ultima chiusura
         
-        # Filtra simboli disponibili PRIMA di inizializzare
-        from indicators import CryptoTechnicalAnalysisHL
-        temp_analyzer = CryptoTechnicalAnalysisHL(testnet=self.testnet)
-        available_symbols = temp_analyzer.get_available_symbols()
+        # Filtra simboli disponibili PRIMA di inizializzare (meta in cache nel registry)
+        available_symbols = hl_client.get_available_symbols(self.testnet)
         symbols_to_init = [s for s in symbols_to_monitor if s in available_symbols]
         
         print(f"[AdvancedTradingBot] Initializing for {len(symbols_to_init)}/{len(symbols_to_monitor)} available symbols: {symbols_to_init}")
         
-        # Crea SINGOLA connessione Info condivisa con WebSocket per order flow
-        print("[AdvancedTradingBot] Creating shared Info connection with WebSocket...")
-        from hyperliquid.info import Info
-        from hyperliquid.utils import constants
-        base_url = constants.TESTNET_API_URL if self.testnet else constants.MAINNET_API_URL
-        shared_info = Info(base_url, skip_ws=False)
-        print("[AdvancedTradingBot] Shared WebSocket connection ready")
+        # Mantiene caldo meta_and_asset_ctxs in background (funding/OI/mark per gli indicatori);
+        # il TTL della cache segue l'intervallo del refresher (vedi market_state.py)
+        get_market_state_cache(self.testnet).start(interval=MARKET_STATE_REFRESH_INTERVAL)
+
+        # SINGOLA connessione WebSocket multiplexata per order flow e candele:
+        # un solo socket e un solo thread di supervisione per tutti i simboli
+        print("[AdvancedTradingBot] Starting shared multiplexed WebSocket...")
+        self.ws_manager = get_ws_manager(self.testnet)
         
-        # Initialize OrderBookData analyzer per ogni simbolo (con connessione condivisa)
+        # Initialize OrderBookData analyzer per ogni simbolo (l2Book + trades sulla connessione condivisa)
         for symbol in symbols_to_init:
             try:
-                analyzer = OrderBookData(symbol=symbol, testnet=self.testnet, shared_info=shared_info)
+                analyzer = OrderBookData(symbol=symbol, testnet=self.testnet, ws_manager=self.ws_manager)
                 self.order_book_analyzers[symbol] = analyzer
-                
-                # Start WebSocket thread con auto-reconnect
-                ws_thread = threading.Thread(target=analyzer.start_websocket, daemon=True)
-                ws_thread.start()
-                print(f"[AdvancedTradingBot] Started auto-reconnect WebSocket thread for {symbol}")
+                analyzer.start_websocket()
             except Exception as e:
                 print(f"[AdvancedTradingBot] Failed to init {symbol}: {e}")
         
+        # Candele 1m in push sulla stessa connessione: indicatori aggiornati alla
+        # chiusura delle barre, l'analisi legge dalla memoria senza REST
+        get_shared_analyzer(self.testnet).start_push(symbols_to_init)
+
+        # Forecast ricalcolati in background alla chiusura delle candele 15m/1h:
+        # i prompt leggono l'ultimo forecast pubblicato senza attendere i fit
+        get_forecast_scheduler(self.testnet)
+
         # Aspetta 5s per primi update WebSocket
         print("[AdvancedTradingBot] Waiting 5s for initial WebSocket order book data...")
         time.sleep(5)
@@ -90,10 +96,10 @@ class AdvancedTradingBot:
         """Inizializza OrderBookData analyzer se non esiste"""
         if symbol not in self.order_book_analyzers:
             print(f"[OrderBook] Inizializzazione analyzer per {symbol}...")
-            analyzer = OrderBookData(symbol=symbol)
+            # Nessun nuovo socket: il simbolo si aggiunge alla connessione condivisa
+            analyzer = OrderBookData(symbol=symbol, testnet=self.testnet, ws_manager=get_ws_manager(self.testnet))
             self.order_book_analyzers[symbol] = analyzer
-            ws_thread = threading.Thread(target=analyzer.start_websocket, daemon=True)
-            ws_thread.start()
+            analyzer.start_websocket()
             time.sleep(2)  # Attesa dati iniziali
 
     def get_order_flow_summary(self, symbol):
@@ -123,7 +129,10 @@ class AdvancedTradingBot:
             "best_ask": analyzer.best_asks[-1] if len(analyzer.best_asks) > 0 else 0,
             "iceberg_levels": analyzer.iceberg_levels[:3],  # Top 3 iceberg levels
             "volume_profile_top": analyzer.get_volume_profile_levels()[:3],  # Top 3 volume concentrations
-            "update_count": analyzer.update_count
+            "update_count": analyzer.update_count,
+            # Trade tape: se live, delta/imbalance/aggressive ratio vengono dai trade reali
+            "trade_tape_live": analyzer.trade_tape_live,
+            "cvd": analyzer.trade_tape.cvd
         }
         
         return {
@@ -148,9 +157,7 @@ class AdvancedTradingBot:
         print("\n[WATCHLIST] Aggiornamento watchlist giornaliera via AI...")
         
         # Recupera simboli effettivamente disponibili su Hyperliquid
-        from indicators import CryptoTechnicalAnalysisHL
-        analyzer = CryptoTechnicalAnalysisHL(testnet=self.testnet)
-        available_symbols = analyzer.get_available_symbols()
+        available_symbols = hl_client.get_available_symbols(self.testnet)
         print(f"[WATCHLIST] Simboli disponibili su Hyperliquid: {len(available_symbols)}")
         
         # Filtra solo quelli nella configurazione
@@ -162,6 +169,19 @@ class AdvancedTradingBot:
             self.watchlist_updated_at = datetime.now()
             return
         
+        # Screener: ATR%, volume, spread, funding e OI dei simboli validi, già ordinati
+        ranked_symbols = valid_symbols
+        screen_txt = "Dati screener non disponibili"
+        try:
+            screen_df = screen_universe(
+                valid_symbols, testnet=self.testnet, min_volume_usd=0, max_candidates=len(valid_symbols)
+            )
+            ranked_symbols = screen_df["coin"].tolist() or valid_symbols
+            screen_txt = format_screen(screen_df)
+            print(f"[WATCHLIST] Screener ranking: {ranked_symbols[:10]}")
+        except Exception as e:
+            print(f"[WATCHLIST] Screener non disponibile: {e}")
+        
         try:
             # Chiamata diretta OpenAI per watchlist (senza schema rigido)
             client = OpenAI(
@@ -180,6 +200,9 @@ Criteri:
 
 Disponibili SOLO: {available_str}
 
+Dati di mercato attuali (screener, ordinati per punteggio):
+{screen_txt}
+
 Restituisci SOLO un oggetto JSON valido:
 {{"symbols": ["SYMBOL1", "SYMBOL2", ...]}}
 
@@ -215,8 +238,8 @@ MASSIMO 10 simboli dalla lista disponibile."""
             
         except Exception as e:
             print(f"[WATCHLIST] Errore aggiornamento: {e}")
-            # Fallback: usa solo simboli validi disponibili (max 10)
-            self.daily_watchlist = valid_symbols[:10]
+            # Fallback: primi 10 simboli validi secondo lo screener
+            self.daily_watchlist = ranked_symbols[:10]
             self.watchlist_updated_at = datetime.now()
             print(f"[WATCHLIST] Uso fallback con simboli validi: {self.daily_watchlist}")
 
@@ -238,10 +261,10 @@ MASSIMO 10 simboli dalla lista disponibile."""
             minutes_held = (datetime.now() - opened_at).total_seconds() / 60
         
         # Indicatori, order flow, news, sentiment, forecast
-        indicators_txt, _ = analyze_multiple_tickers([symbol])
+        indicators_txt, _ = analyze_multiple_tickers([symbol], testnet=self.testnet)
         news_txt = fetch_latest_news()
         sentiment_txt, _ = get_sentiment()
-        forecast_txt, _ = get_crypto_forecasts([symbol])
+        forecast_txt, _ = get_crypto_forecasts([symbol], testnet=self.testnet)
         
         of = order_flow_data
         of_signal = of["signal"]
@@ -311,7 +334,7 @@ Restituisci JSON: {{"operation": "close|hold", "direction": "{side}", "reasoning
             str: Complete system prompt with all context
         """
         # Get traditional indicators
-        indicators_txt, indicators_json = analyze_multiple_tickers([symbol])
+        indicators_txt, indicators_json = analyze_multiple_tickers([symbol], testnet=self.testnet)
         
         # Get news
         news_txt = fetch_latest_news()
@@ -320,7 +343,7 @@ Restituisci JSON: {{"operation": "close|hold", "direction": "{side}", "reasoning
         sentiment_txt, sentiment_json = get_sentiment()
         
         # Get forecasts - ONLY for current symbol to avoid AI confusion
-        forecasts_txt, forecasts_json = get_crypto_forecasts([symbol])
+        forecasts_txt, forecasts_json = get_crypto_forecasts([symbol], testnet=self.testnet)
         
         # Format order flow data
         of = order_flow_data
@@ -337,6 +360,8 @@ Real-Time Metrics:
 - Volume Imbalance: {of['metrics']['volume_imbalance']*100:.1f}% (>0 = bullish, <0 = bearish)
 - Depth Imbalance: {of['metrics']['depth_imbalance']*100:.1f}% (order book skew)
 - Aggressive Buy Ratio: {of['metrics']['aggressive_buy_ratio']*100:.0f}%
+- Flow Source: {'trade tape (real aggressor side)' if of['metrics']['trade_tape_live'] else 'order book estimate'}
+- CVD (trade tape): {of['metrics']['cvd']/1000:.0f}K
 - Total Updates: {of['metrics']['update_count']}
 
 Iceberg Detection:
@@ -594,6 +619,11 @@ INTERPRETATION GUIDE:
                     symbols_to_process = [s for s in self.symbols_to_monitor if s in self.daily_watchlist]
                     print(f"[WATCHLIST] Simboli filtrati: {symbols_to_process}")
                 
+                # Forecast in background solo per i simboli del ciclo e le posizioni aperte
+                get_forecast_scheduler(self.testnet).set_watchlist(
+                    list(symbols_to_process) + list(self.active_trades)
+                )
+                
                 # Monitoraggio posizioni attive OGNI CICLO (ora allineato a 15min)
                 if len(self.active_trades) > 0:
                     print(f"\n[MONITORING] Rivedo {len(self.active_trades)} posizioni attive...")
@@ -880,6 +910,7 @@ INTERPRETATION GUIDE:
             sleep_time = max(0, self.cycle_interval - cycle_elapsed)
             
             print(f"\n[CYCLE {cycle_count}] Completed in {cycle_elapsed:.1f}s")
+            print(f"[CYCLE {cycle_count}] Market state cache: {get_market_state_cache(self.testnet).stats()}")
             if sleep_time > 0:
                 print(f"[CYCLE {cycle_count}] Sleeping {sleep_time:.1f}s until next cycle...")
                 time.sleep(sleep_time)
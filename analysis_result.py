@@ -0,0 +1,167 @@
+"""
+Risultati tipizzati dell'analisi tecnica.
+
+`get_complete_analysis` restituisce un `TechnicalAnalysis` con campi numerici:
+il testo per il prompt viene generato solo quando serve (str/f-string) e
+memorizzato, mentre il logging su DB legge direttamente i numeri.
+`to_dict()` produce lo stesso schema dict usato in precedenza.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+
+@dataclass
+class OrderbookVolume:
+    """Volumi totali bid/ask dell'orderbook L2 (o messaggio d'errore)."""
+
+    __slots__ = ("bid", "ask", "error")
+    bid: Optional[float]
+    ask: Optional[float]
+    error: Optional[str]
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            return self.error
+        return f"Bid Vol: {self.bid:.2f}, Ask Vol: {self.ask:.2f}"
+
+
+@dataclass
+class TechnicalAnalysis:
+    """Analisi completa a 15m di un ticker."""
+
+    __slots__ = (
+        "ticker", "timestamp", "price", "ema20", "macd", "rsi_7", "volume",
+        "pivot_points", "open_interest", "funding_rate", "estimated_fee_cost",
+        "intraday", "longer_term_15m", "_text",
+    )
+    ticker: str
+    timestamp: datetime
+    price: float
+    ema20: float
+    macd: float
+    rsi_7: float
+    volume: OrderbookVolume
+    pivot_points: Dict[str, float]
+    open_interest: float
+    funding_rate: float
+    estimated_fee_cost: float
+    # mid_prices, ema_20, macd, rsi_7, rsi_14 (dalla più vecchia alla più recente)
+    intraday: Dict[str, List[float]]
+    # ema_20/ema_50/atr_3/atr_14/volume _current, volume_average, macd_series, rsi_14_series
+    longer_term_15m: Dict[str, Any]
+
+    def __post_init__(self):
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def text(self) -> str:
+        """Blocco `<TICKER_data>` per il prompt, generato alla prima richiesta."""
+        if self._text is None:
+            self._text = self._render()
+        return self._text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Schema dict storico (`volume` come stringa, più volume_bid/volume_ask numerici)."""
+        return {
+            "ticker": self.ticker,
+            "timestamp": self.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            "current": {
+                "price": self.price,
+                "ema20": self.ema20,
+                "macd": self.macd,
+                "rsi_7": self.rsi_7,
+            },
+            "volume": str(self.volume),
+            "volume_bid": self.volume.bid,
+            "volume_ask": self.volume.ask,
+            "pivot_points": dict(self.pivot_points),
+            "derivatives": {
+                "open_interest_latest": self.open_interest,
+                # Average OI non è disponibile storicamente via API semplice, metto latest
+                "open_interest_average": self.open_interest,
+                "funding_rate": self.funding_rate,
+                "estimated_fee_cost": self.estimated_fee_cost,
+            },
+            "intraday": dict(self.intraday),
+            "longer_term_15m": dict(self.longer_term_15m),
+        }
+
+    def _render(self) -> str:
+        ticker = self.ticker
+        output = f"\n<{ticker}_data>\n"
+        output += f"Timestamp: {self.timestamp:%Y-%m-%d %H:%M:%S} (UTC) (Hyperliquid, 15m)\n"
+        output += f"\n"
+
+        output += (
+            f"current_price = {self.price:.1f}, "
+            f"current_ema20 = {self.ema20:.3f}, "
+            f"current_macd = {self.macd:.3f}, "
+            f"current_rsi (7 period) = {self.rsi_7:.3f}\n\n"
+        )
+        output += f"Volume: {self.volume}\n\n"
+
+        pivot = self.pivot_points
+        output += "Pivot Points (based on previous day):\n"
+        output += (
+            f"R2 = {pivot['r2']:.2f}, R1 = {pivot['r1']:.2f}, "
+            f"PP = {pivot['pp']:.2f}, "
+            f"S1 = {pivot['s1']:.2f}, S2 = {pivot['s2']:.2f}\n\n"
+        )
+
+        output += (
+            f"In addition, here is the latest {ticker} funding data on Hyperliquid:\n"
+        )
+        output += (
+            f"Open Interest: Latest: {self.open_interest:.2f}\n"
+        )
+        output += f"Funding Rate: {self.funding_rate:.6f}\n"
+        output += f"Est. Transaction Fee (0.035%): {self.estimated_fee_cost:.4f} USD\n\n"
+
+        intra = self.intraday
+        output += "Intraday series (15m, oldest → latest):\n"
+        output += (
+            f"Mid prices: {[round(x, 1) for x in intra['mid_prices']]}\n"
+            f"EMA indicators (20-period): {[round(x, 3) for x in intra['ema_20']]}\n"
+            f"MACD indicators: {[round(x, 3) for x in intra['macd']]}\n"
+            f"RSI indicators (7-Period): {[round(x, 3) for x in intra['rsi_7']]}\n"
+            f"RSI indicators (14-Period): {[round(x, 3) for x in intra['rsi_14']]}\n\n"
+        )
+
+        lt = self.longer_term_15m
+        output += "Longer-term context (still 15-minute timeframe, wider window):\n"
+        output += (
+            f"20-Period EMA: {lt['ema_20_current']:.3f} vs. "
+            f"50-Period EMA: {lt['ema_50_current']:.3f}\n"
+            f"3-Period ATR: {lt['atr_3_current']:.3f} vs. "
+            f"14-Period ATR: {lt['atr_14_current']:.3f}\n"
+            f"Current Volume: {lt['volume_current']:.3f} vs. "
+            f"Average Volume: {lt['volume_average']:.3f}\n"
+            f"MACD indicators: {[round(x, 3) for x in lt['macd_series']]}\n"
+            f"RSI indicators (14-Period): {[round(x, 3) for x in lt['rsi_14_series']]}\n"
+        )
+        output += f"<{ticker}_data>\n"
+        return output
+
+
+class AnalysisText:
+    """
+    Testo per il prompt di più ticker, concatenato solo alla prima conversione
+    (str() o f-string) e poi riutilizzato.
+    """
+
+    __slots__ = ("_parts", "_text")
+
+    def __init__(self, parts: Sequence[Union[str, TechnicalAnalysis]]):
+        self._parts = list(parts)
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = "".join(str(part) for part in self._parts)
+        return self._text
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
@@ -0,0 +1,187 @@
+"""
+Cache su disco delle candele OHLCV chiuse, un file per (coin, interval).
+
+Layout binario append-only: record a dimensione fissa (t int64 + OHLCV float64,
+little endian), letti con `np.memmap` senza parsare il file. Si salvano solo le
+candele chiuse, quindi un record scritto non cambia più: dopo un riavvio lo
+store riparte dal disco e scarica solo le barre successive all'ultimo
+timestamp salvato.
+
+La directory può essere condivisa da più processi (bot, benchmark): ogni
+scrittura prende un lock `fcntl` esclusivo sul file e rilegge l'ultimo record
+dal disco prima di accodare, ogni lettura un lock condiviso. Un file con
+timestamp non crescenti o non allineati al passo dell'interval viene
+ricostruito al caricamento.
+
+Directory configurabile con CANDLE_CACHE_DIR (stringa vuota = cache disattivata).
+"""
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from candle_store import COLUMNS, INTERVAL_TO_MS
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo il lock in-process
+    fcntl = None
+
+CANDLE_CACHE_DIR = os.getenv("CANDLE_CACHE_DIR", ".candle_cache")
+
+CANDLE_DTYPE = np.dtype([("t", "<i8")] + [(col, "<f8") for col in COLUMNS])
+
+_caches: Dict[bool, "CandleDiskCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def is_valid_series(t: np.ndarray, step_ms: int) -> bool:
+    """Timestamp strettamente crescenti e distanziati di multipli di `step_ms`."""
+    gaps = np.diff(t)
+    return bool(np.all(gaps > 0) and np.all(gaps % step_ms == 0))
+
+
+def repair_records(records: np.ndarray, step_ms: int) -> np.ndarray:
+    """
+    Record ordinati per t senza duplicati; dell'eventuale storico non allineato
+    al passo resta solo la coda contigua più recente.
+    """
+    _, first = np.unique(records["t"], return_index=True)
+    records = records[first]
+    misaligned = np.flatnonzero(np.diff(records["t"]) % step_ms)
+    if len(misaligned):
+        records = records[misaligned[-1] + 1:]
+    return records
+
+
+class CandleDiskCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path(self, coin: str, interval: str) -> str:
+        safe_coin = re.sub(r"[^A-Za-z0-9_.-]", "_", coin)
+        return os.path.join(self.directory, f"{safe_coin}_{interval}.bin")
+
+    @contextmanager
+    def _locked(self, path: str, mode: str, exclusive: bool) -> Iterator:
+        """File aperto con lock fcntl (condiviso o esclusivo) fino alla chiusura."""
+        with open(path, mode) as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield f
+
+    @staticmethod
+    def _count(f) -> int:
+        # Un eventuale record troncato in coda (crash in scrittura) viene ignorato
+        return os.fstat(f.fileno()).st_size // CANDLE_DTYPE.itemsize
+
+    @classmethod
+    def _tail_t(cls, f) -> Optional[int]:
+        """Timestamp dell'ultimo record intero del file, letto dal disco."""
+        n = cls._count(f)
+        if n == 0:
+            return None
+        f.seek((n - 1) * CANDLE_DTYPE.itemsize)
+        return int(np.frombuffer(f.read(CANDLE_DTYPE.itemsize), dtype=CANDLE_DTYPE)["t"][0])
+
+    @staticmethod
+    def _split(records: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        t = np.array(records["t"], dtype=np.int64)
+        values = np.array([records[col] for col in COLUMNS], dtype=np.float64)
+        return t, values
+
+    def last_t(self, coin: str, interval: str) -> Optional[int]:
+        with self._lock:
+            try:
+                with self._locked(self.path(coin, interval), "rb", exclusive=False) as f:
+                    return self._tail_t(f)
+            except FileNotFoundError:
+                return None
+
+    def load(self, coin: str, interval: str, limit: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Ultime `limit` candele salvate come (t int64[n], valori float64[5, n])."""
+        step_ms = INTERVAL_TO_MS[interval]
+        path = self.path(coin, interval)
+        with self._lock:
+            try:
+                with self._locked(path, "rb", exclusive=False) as f:
+                    n = self._count(f)
+                    if n == 0:
+                        return None
+                    records = np.memmap(f, dtype=CANDLE_DTYPE, mode="r", shape=(n,))
+                    if is_valid_series(records["t"], step_ms):
+                        result = self._split(records[-limit:])
+                        del records
+                        return result
+                    del records
+            except FileNotFoundError:
+                return None
+            return self._rebuild(coin, interval, step_ms, limit)
+
+    def _rebuild(self, coin: str, interval: str, step_ms: int, limit: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Riscrive un file con timestamp disordinati/duplicati (da chiamare col lock)."""
+        with self._locked(self.path(coin, interval), "r+b", exclusive=True) as f:
+            records = np.fromfile(f, dtype=CANDLE_DTYPE, count=self._count(f))
+            # Un altro processo potrebbe averlo già ricostruito
+            if not is_valid_series(records["t"], step_ms):
+                repaired = repair_records(records, step_ms)
+                print(f"[CandleCache] Rebuilt {coin} ({interval}): {len(records)} -> {len(repaired)} records")
+                records = repaired
+                f.seek(0)
+                f.truncate(0)
+                f.write(records.tobytes())
+            if not len(records):
+                return None
+            return self._split(records[-limit:])
+
+    def append(self, coin: str, interval: str, step_ms: int, t: np.ndarray, values: np.ndarray) -> int:
+        """
+        Accoda le candele chiuse successive all'ultima su disco; restituisce quante
+        ne sono state scritte. L'ultimo record viene riletto dal file sotto lock,
+        così processi diversi non accodano le stesse barre. Se tra il file e le
+        nuove barre c'è un buco il file viene riscritto da capo, così lo storico
+        su disco resta contiguo.
+        """
+        with self._lock, self._locked(self.path(coin, interval), "a+b", exclusive=True) as f:
+            # Allinea il file a record interi prima di tornare ad accodare
+            size = os.fstat(f.fileno()).st_size
+            if size % CANDLE_DTYPE.itemsize:
+                f.truncate(size - size % CANDLE_DTYPE.itemsize)
+            last = self._tail_t(f)
+            rewrite = False
+            if last is not None:
+                start = int(np.searchsorted(t, last, side="right"))
+                t, values = t[start:], values[:, start:]
+                rewrite = bool(len(t)) and int(t[0]) > last + step_ms
+            if not len(t):
+                return 0
+
+            records = np.empty(len(t), dtype=CANDLE_DTYPE)
+            records["t"] = t
+            for i, col in enumerate(COLUMNS):
+                records[col] = values[i]
+            if rewrite:
+                f.truncate(0)
+            # In modalità append la scrittura va sempre in coda al file
+            f.write(records.tobytes())
+            return len(t)
+
+
+def get_disk_cache(testnet: bool = True) -> Optional[CandleDiskCache]:
+    """Cache su disco condivisa per rete (None se CANDLE_CACHE_DIR è vuota)."""
+    if not CANDLE_CACHE_DIR:
+        return None
+    cache = _caches.get(testnet)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(testnet)
+            if cache is None:
+                network = "testnet" if testnet else "mainnet"
+                cache = CandleDiskCache(os.path.join(CANDLE_CACHE_DIR, network))
+                _caches[testnet] = cache
+    return cache
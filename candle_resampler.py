@@ -0,0 +1,162 @@
+"""
+Timeframe superiori derivati localmente da un unico flusso di candele base (1m).
+
+Per ogni coin viene scaricato (in modo incrementale, vedi CandleStore) solo il
+flusso 1m; le candele 5m/15m/1h/4h/1d sono aggregate in locale e aggiornate
+ricalcolando soltanto l'ultimo bucket, quindi ogni timeframe in più non costa
+richieste di rete.
+
+`candles_snapshot` restituisce al massimo 5000 candele per richiesta: quando la
+finestra richiesta è più lunga di quanto copre il flusso base (es. 500 barre
+1h), lo storico più vecchio viene seminato una sola volta dalle candele native
+del timeframe (a loro volta in cache su disco) e da lì in avanti esteso dal 1m.
+Per un coin con storico più corto della finestra il seme parte dalla prima
+candela nativa esistente, e da quel momento la finestra è considerata coperta.
+"""
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+import numpy as np
+
+import hl_client
+from candle_cache import get_disk_cache
+from candle_store import CandleBuffer, CandleStore, CandleView, COLUMNS, INTERVAL_TO_MS
+
+BASE_INTERVAL = "1m"
+# Limite di candele per singola richiesta candles_snapshot
+MAX_BASE_CANDLES = 5000
+
+_sources: Dict[bool, "ResamplingCandleStore"] = {}
+_sources_lock = threading.Lock()
+
+
+def resample(
+    t: np.ndarray, values: np.ndarray, step_ms: int, drop_partial_head: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Aggrega candele ordinate (t int64[n], OHLCV float64[5, n]) su bucket di
+    `step_ms` allineati all'epoch UTC, come le candele native Hyperliquid.
+
+    Con `drop_partial_head` il primo bucket viene scartato se la finestra
+    inizia a metà bucket (le sue barre precedenti non sono disponibili).
+    """
+    if not len(t):
+        return t[:0], values[:, :0]
+    buckets = t - t % step_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if drop_partial_head and t[0] != buckets[0]:
+        if len(starts) == 1:
+            return t[:0], values[:, :0]
+        offset = starts[1]
+        t, values, buckets = t[offset:], values[:, offset:], buckets[offset:]
+        starts = starts[1:] - offset
+    ends = np.r_[starts[1:], len(t)] - 1
+
+    out = np.empty((len(COLUMNS), len(starts)), dtype=np.float64)
+    out[0] = values[0, starts]
+    out[1] = np.maximum.reduceat(values[1], starts)
+    out[2] = np.minimum.reduceat(values[2], starts)
+    out[3] = values[3, ends]
+    out[4] = np.add.reduceat(values[4], starts)
+    return buckets[starts], out
+
+
+class ResamplingCandleStore:
+    """
+    Stessa interfaccia di CandleStore (`get_candles(coin, interval, limit)`), ma
+    i timeframe multipli di quello base sono derivati dal flusso base.
+    """
+
+    def __init__(self, store: CandleStore, base_interval: str = BASE_INTERVAL,
+                 max_base_candles: int = MAX_BASE_CANDLES):
+        self.store = store
+        self.base_interval = base_interval
+        self.base_ms = INTERVAL_TO_MS[base_interval]
+        self.max_base_candles = max_base_candles
+        self._derived: Dict[Tuple[str, str], CandleBuffer] = {}
+        # Primo bucket derivato per i coin senza storico nativo più vecchio
+        self._history_start: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def get_candles(self, coin: str, interval: str, limit: int, refresh: bool = True) -> CandleView:
+        """
+        Ultime `limit` candele di `interval`, aggregate dal flusso base quando possibile.
+        `refresh=False` legge solo la memoria se il flusso base è alimentato in push.
+        Come CandleStore restituisce una copia, non una vista sul buffer derivato.
+        """
+        if interval not in INTERVAL_TO_MS:
+            raise ValueError(f"Interval '{interval}' non supportato in INTERVAL_TO_MS")
+        step_ms = INTERVAL_TO_MS[interval]
+        if step_ms <= self.base_ms or step_ms % self.base_ms:
+            return self.store.get_candles(coin, interval, limit, refresh=refresh)
+
+        # Finestra base sempre piena: richieste con limit diversi non forzano
+        # nuovi download completi del flusso 1m
+        base = self.store.get_candles(coin, self.base_interval, self.max_base_candles, refresh=refresh)
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        window_start_ms = now_ms - limit * step_ms
+
+        key = (coin, interval)
+        with self._lock:
+            buffer = self._derived.get(key)
+            if buffer is None or buffer.capacity < limit:
+                buffer = CandleBuffer(max(self.store.max_candles, limit))
+                self._derived[key] = buffer
+            # Si riparte da zero se il flusso base non contiene più l'ultimo bucket
+            # derivato (buco) o se la finestra richiesta non è coperta
+            covered_from_ms = window_start_ms
+            history_start_ms = self._history_start.get(key)
+            if history_start_ms is not None:
+                covered_from_ms = max(window_start_ms, history_start_ms - step_ms)
+            reseed = (
+                not len(buffer)
+                or int(base.t[0]) > buffer.last_t
+                or buffer.first_t > covered_from_ms + step_ms
+            )
+
+        native = None
+        if reseed:
+            # Primo bucket completo coperto dal flusso base
+            first_complete = -(-int(base.t[0]) // step_ms) * step_ms
+            if first_complete > window_start_ms + step_ms:
+                # Storico più vecchio del flusso base: seme dalle candele native
+                native = self.store.get_candles(coin, interval, limit)
+
+        with self._lock:
+            if reseed:
+                buffer.clear()
+                if native is not None and len(native):
+                    buffer.merge_arrays(native.t, native.values())
+                t_new, values_new = resample(base.t, base.values(), step_ms, drop_partial_head=True)
+            else:
+                # Solo i bucket dall'ultimo derivato (ancora aperto o appena chiuso) in poi
+                start = int(np.searchsorted(base.t, buffer.last_t))
+                tail = base.tail(len(base) - start)
+                t_new, values_new = resample(tail.t, tail.values(), step_ms)
+            buffer.merge_arrays(t_new, values_new)
+            if native is not None and len(buffer) and self.store.history_start(coin, interval) is not None:
+                # Prima del seme nativo l'exchange non ha barre: niente nuovi semi a ogni chiamata
+                self._history_start[key] = buffer.first_t
+            return buffer.view(limit).copy()
+
+    def clear(self, coin: str = None) -> None:
+        with self._lock:
+            for key in [k for k in self._derived if coin is None or k[0] == coin]:
+                del self._derived[key]
+            for key in [k for k in self._history_start if coin is None or k[0] == coin]:
+                del self._history_start[key]
+        self.store.clear(coin)
+
+
+def get_candle_source(testnet: bool = True) -> ResamplingCandleStore:
+    """Sorgente candele condivisa per rete (indicatori e forecaster leggono da qui)."""
+    source = _sources.get(testnet)
+    if source is None:
+        with _sources_lock:
+            source = _sources.get(testnet)
+            if source is None:
+                store = CandleStore(hl_client.get_info(testnet), disk_cache=get_disk_cache(testnet))
+                source = ResamplingCandleStore(store)
+                _sources[testnet] = source
+    return source
@@ -0,0 +1,375 @@
+"""
+Store incrementale delle candele OHLCV Hyperliquid.
+
+Mantiene in memoria lo storico per ogni (coin, interval) e, alle chiamate
+successive, scarica da `Info.candles_snapshot` solo le candele a partire
+dall'ultima barra ancora aperta, fondendole sul posto.
+
+Le candele sono memorizzate in formato colonnare (array NumPy contigui
+int64/float64 a capacità fissa): i campi stringa dell'API vengono convertiti
+una sola volta all'ingresso e gli indicatori ricevono viste senza copie.
+
+Con una cache su disco (vedi candle_cache.py) lo storico sopravvive ai
+riavvii: lo store riparte dalle candele chiuse salvate e scarica solo le
+barre successive.
+"""
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+INTERVAL_TO_MS = {
+    "1m": 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "1h": 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+# Massimo di candele restituite da una singola richiesta candles_snapshot
+MAX_SNAPSHOT_CANDLES = 5000
+
+# Campi OHLCV dell'API -> colonne del buffer
+_API_FIELDS = ("o", "h", "l", "c", "v")
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+class CandleView:
+    """
+    Finestra di candele come colonne NumPy.
+
+    `CandleBuffer.view` restituisce viste sul buffer (nessuna copia), valide
+    solo fino al merge successivo e quindi da leggere col lock dello store;
+    `CandleStore.get_candles` restituisce invece una copia, sicura da usare
+    mentre altri thread aggiornano lo stesso coin.
+    """
+
+    __slots__ = ("t", "open", "high", "low", "close", "volume")
+
+    def __init__(self, t: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.t = t
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return (self.t, self.open, self.high, self.low, self.close, self.volume)
+
+    def tail(self, n: int) -> "CandleView":
+        return CandleView(*(col[-n:] for col in self._columns()))
+
+    def copy(self) -> "CandleView":
+        return CandleView(*(col.copy() for col in self._columns()))
+
+    def values(self) -> np.ndarray:
+        """Colonne OHLCV impilate in un nuovo array float64[5, n]."""
+        return np.vstack(self._columns()[1:])
+
+    def to_pandas(self) -> pd.DataFrame:
+        """DataFrame con lo stesso schema storico di fetch_ohlcv (timestamp UTC + OHLCV float)."""
+        df = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(self.t, unit="ms", utc=True),
+                "open": self.open,
+                "high": self.high,
+                "low": self.low,
+                "close": self.close,
+                "volume": self.volume,
+            }
+        )
+        return df
+
+
+class CandleBuffer:
+    """
+    Buffer colonnare a capacità fissa per un singolo (coin, interval).
+
+    Internamente usa array di 2 x `capacity` righe: le nuove barre vengono
+    scritte in coda e, quando lo spazio finisce, le ultime `capacity` vengono
+    compattate all'inizio (costo ammortizzato O(1) per barra). In questo modo
+    la finestra valida è sempre contigua e può essere restituita come vista.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._t = np.empty(2 * capacity, dtype=np.int64)
+        self._values = np.empty((len(COLUMNS), 2 * capacity), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def first_t(self) -> Optional[int]:
+        return int(self._t[self._start]) if len(self) else None
+
+    @property
+    def last_t(self) -> Optional[int]:
+        return int(self._t[self._end - 1]) if len(self) else None
+
+    def clear(self) -> None:
+        self._start = 0
+        self._end = 0
+
+    def view(self, limit: Optional[int] = None) -> CandleView:
+        """Viste sulle ultime `limit` barre: un merge successivo può sovrascriverle."""
+        start = self._start if limit is None else max(self._start, self._end - limit)
+        return CandleView(self._t[start:self._end], *self._values[:, start:self._end])
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Viste (t int64[n], valori float64[5, n]) sull'intera finestra valida."""
+        return self._t[self._start:self._end], self._values[:, self._start:self._end]
+
+    def merge(self, candles: List[dict]) -> None:
+        """Converte le candele API (stringhe) e le fonde: le barre con `t` >= prima nuova vengono sostituite."""
+        if not candles:
+            return
+        candles = candles[-self.capacity:]
+        n = len(candles)
+        t_new = np.fromiter((c["t"] for c in candles), dtype=np.int64, count=n)
+        values_new = np.array([[c[f] for c in candles] for f in _API_FIELDS], dtype=np.float64)
+        self.merge_arrays(t_new, values_new)
+
+    def merge_arrays(self, t_new: np.ndarray, values_new: np.ndarray) -> None:
+        """Come merge ma con colonne già numeriche (t: int64[n], values: float64[5, n])."""
+        n = len(t_new)
+        if n == 0:
+            return
+        if n > self.capacity:
+            t_new, values_new = t_new[-self.capacity:], values_new[:, -self.capacity:]
+            n = self.capacity
+
+        cut = self._start + int(np.searchsorted(self._t[self._start:self._end], t_new[0]))
+        if cut + n > len(self._t):
+            # Compattazione: teniamo al più capacity - n barre precedenti al taglio
+            keep = min(cut - self._start, self.capacity - n)
+            self._t[:keep] = self._t[cut - keep:cut]
+            self._values[:, :keep] = self._values[:, cut - keep:cut]
+            self._start = 0
+            cut = keep
+
+        self._t[cut:cut + n] = t_new
+        self._values[:, cut:cut + n] = values_new
+        self._end = cut + n
+        if self._end - self._start > self.capacity:
+            self._start = self._end - self.capacity
+
+
+class CandleStore:
+    """
+    Cache per-(coin, interval) delle candele Hyperliquid in buffer colonnari.
+
+    - Prima richiesta: scarica l'intera finestra `limit`.
+    - Richieste successive: scarica solo dall'ultima candela non ancora chiusa
+      in avanti (tipicamente 1-2 candele) e sostituisce le barre aggiornate.
+    - Se lo storico in memoria non copre la finestra richiesta (limit più
+      grande, buco temporale troppo lungo) prova a ricaricarlo dalla cache su
+      disco e, se non basta, torna al download completo.
+    - Se il download completo parte più tardi dell'inizio della finestra (coin
+      listato da poco) lo store ricorda la prima barra disponibile e da lì in
+      poi considera la finestra coperta, senza riscaricarla a ogni chiamata.
+    - Le candele chiuse nuove vengono accodate alla cache su disco (se
+      `persist`; con persist=False la cache viene solo letta).
+    """
+
+    def __init__(self, info, max_candles: int = 1000, disk_cache=None, persist: bool = True):
+        self.info = info
+        self.max_candles = max_candles
+        self.disk_cache = disk_cache
+        self.persist = persist
+        self._buffers: Dict[Tuple[str, str], CandleBuffer] = {}
+        # Ultima candela chiusa già accodata su disco da questo store, per (coin, interval)
+        self._persisted: Dict[Tuple[str, str], int] = {}
+        # Prima candela esistente sull'exchange, per i coin con storico più corto della finestra
+        self._history_start: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def get_candles(self, coin: str, interval: str, limit: int, refresh: bool = True) -> CandleView:
+        """
+        Restituisce le ultime `limit` candele (ordinate per `t`) aggiornando lo store.
+
+        Con `refresh=False` (store alimentato via WebSocket, vedi `ingest`) viene
+        restituito lo storico in memoria senza richieste, se presente.
+
+        Le candele sono copiate sotto lock: un `ingest` o un `get_candles`
+        concorrente sullo stesso coin non può alterare la finestra restituita
+        (al più `limit` barre, copia trascurabile rispetto al fetch).
+        """
+        if interval not in INTERVAL_TO_MS:
+            raise ValueError(f"Interval '{interval}' non supportato in INTERVAL_TO_MS")
+
+        key = (coin, interval)
+        step_ms = INTERVAL_TO_MS[interval]
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        window_start_ms = now_ms - limit * step_ms
+
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None or buffer.capacity < limit:
+                buffer = self._new_buffer(buffer, max(self.max_candles, limit))
+                self._buffers[key] = buffer
+            if not refresh and len(buffer):
+                return buffer.view(limit).copy()
+            history_start_ms = self._history_start.get(key)
+
+        if self.disk_cache is not None and not self._covers(buffer, window_start_ms, step_ms, history_start_ms):
+            self._load_from_disk(buffer, coin, interval)
+
+        if self._covers(buffer, window_start_ms, step_ms, history_start_ms):
+            # Ripartiamo dall'ultima barra memorizzata: è quella ancora aperta
+            # (o l'ultima chiusa) e va comunque sovrascritta con i valori finali.
+            new_candles = self._fetch(coin, interval, buffer.last_t, now_ms)
+        else:
+            new_candles = self._fetch(coin, interval, window_start_ms, now_ms)
+            if not new_candles:
+                raise RuntimeError(f"Nessuna candela ricevuta per {coin} ({interval})")
+            if new_candles[0]["t"] > window_start_ms + step_ms and len(new_candles) < MAX_SNAPSHOT_CANDLES:
+                # Risposta non troncata che parte dopo la finestra: prima non c'è storico
+                history_start_ms = new_candles[0]["t"]
+
+        with self._lock:
+            if history_start_ms is not None:
+                self._history_start[key] = history_start_ms
+            if len(buffer) and new_candles and new_candles[0]["t"] > buffer.last_t + step_ms:
+                # Buco rispetto allo storico: meglio ripartire che avere barre mancanti
+                buffer.clear()
+            buffer.merge(new_candles)
+            view = buffer.view(limit).copy()
+            pending = self._pending_closed(coin, interval, buffer, now_ms - step_ms + 1)
+        # Disco (append con flock) fuori dal lock: non blocca gli altri coin né l'ingest
+        self._write_closed(coin, interval, step_ms, pending)
+        return view
+
+    def ingest(self, coin: str, interval: str, candles: List[dict]) -> bool:
+        """
+        Fonde candele ricevute in push (stesso formato di candles_snapshot).
+
+        Restituisce False, senza modificare lo store, se lo storico è vuoto o se
+        tra l'ultima barra in memoria e quelle nuove manca qualcosa: in quel caso
+        il prossimo `get_candles` con refresh recupera il buco via REST.
+        """
+        if not candles:
+            return False
+        step_ms = INTERVAL_TO_MS[interval]
+        candles = sorted(candles, key=lambda c: c["t"])
+        pending = None
+        with self._lock:
+            buffer = self._buffers.get((coin, interval))
+            if buffer is None or not len(buffer) or candles[0]["t"] > buffer.last_t + step_ms:
+                return False
+            # Una barra si chiude solo quando arriva la successiva: solo allora c'è da salvare
+            bar_closed = candles[-1]["t"] > buffer.last_t
+            buffer.merge(candles)
+            if bar_closed:
+                pending = self._pending_closed(coin, interval, buffer, buffer.last_t)
+        # I/O su disco fuori dal lock (siamo nel thread di dispatch del WebSocket)
+        self._write_closed(coin, interval, step_ms, pending)
+        return True
+
+    def first_t(self, coin: str, interval: str) -> Optional[int]:
+        """Timestamp della candela più vecchia in memoria (None se lo store è vuoto)."""
+        buffer = self._buffers.get((coin, interval))
+        return buffer.first_t if buffer is not None else None
+
+    def history_start(self, coin: str, interval: str) -> Optional[int]:
+        """Prima candela esistente sull'exchange, se lo storico è più corto delle finestre richieste."""
+        return self._history_start.get((coin, interval))
+
+    def clear(self, coin: str = None) -> None:
+        """Svuota lo store (tutto o solo per un coin)."""
+        with self._lock:
+            if coin is None:
+                self._buffers.clear()
+                self._history_start.clear()
+            else:
+                for key in [k for k in self._buffers if k[0] == coin]:
+                    del self._buffers[key]
+                for key in [k for k in self._history_start if k[0] == coin]:
+                    del self._history_start[key]
+
+    @staticmethod
+    def _new_buffer(old: Optional[CandleBuffer], capacity: int) -> CandleBuffer:
+        """Buffer vuoto o, se serve più capacità, copia ingrandita di quello esistente."""
+        buffer = CandleBuffer(capacity)
+        if old is not None and len(old):
+            buffer.merge_arrays(*old.arrays())
+        return buffer
+
+    def _load_from_disk(self, buffer: CandleBuffer, coin: str, interval: str) -> None:
+        """Sostituisce il contenuto del buffer con le ultime candele salvate su disco."""
+        try:
+            stored = self.disk_cache.load(coin, interval, buffer.capacity)
+        except Exception as e:
+            print(f"[CandleStore] Cache su disco non leggibile per {coin} ({interval}): {e}")
+            return
+        if stored is None:
+            return
+        with self._lock:
+            # Le barre in memoria più recenti del disco verranno riscaricate dal fetch incrementale
+            buffer.clear()
+            buffer.merge_arrays(*stored)
+
+    def _pending_closed(self, coin: str, interval: str, buffer: CandleBuffer,
+                        open_from_ms: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Copia (da chiamare col lock) delle candele chiuse, cioè con t < `open_from_ms`,
+        non ancora salvate da questo store; None se non c'è nulla da scrivere.
+        """
+        if self.disk_cache is None or not self.persist:
+            return None
+        t, values = buffer.arrays()
+        last = self._persisted.get((coin, interval))
+        start = 0 if last is None else int(np.searchsorted(t, last, side="right"))
+        end = int(np.searchsorted(t, open_from_ms, side="left"))
+        if start >= end:
+            return None
+        return t[start:end].copy(), values[:, start:end].copy()
+
+    def _write_closed(self, coin: str, interval: str, step_ms: int,
+                      pending: Optional[Tuple[np.ndarray, np.ndarray]]) -> None:
+        """Accoda su disco le candele di `_pending_closed` (fuori dal lock dello store)."""
+        if pending is None:
+            return
+        t, values = pending
+        try:
+            # append rilegge l'ultimo record dal file: le barre già salvate vengono scartate
+            self.disk_cache.append(coin, interval, step_ms, t, values)
+            self._persisted[(coin, interval)] = int(t[-1])
+        except Exception as e:
+            print(f"[CandleStore] Scrittura cache su disco fallita per {coin} ({interval}): {e}")
+
+    def _fetch(self, coin: str, interval: str, start_ms: int, end_ms: int) -> List[dict]:
+        data = self.info.candles_snapshot(
+            name=coin,
+            interval=interval,
+            startTime=start_ms,
+            endTime=end_ms,
+        )
+        return sorted(data or [], key=lambda c: c["t"])
+
+    @staticmethod
+    def _covers(buffer: CandleBuffer, window_start_ms: int, step_ms: int,
+                history_start_ms: Optional[int] = None) -> bool:
+        """True se lo storico copre l'inizio della finestra richiesta.
+
+        La prima barra della finestra può cadere fino a uno step prima di
+        `window_start_ms`; il resto della finestra verrà completato dal fetch
+        incrementale, che è comunque limitato a un numero di barre inferiore
+        alla finestra stessa. Se l'exchange non ha barre prima di
+        `history_start_ms` basta che il buffer parta da lì.
+        """
+        if not len(buffer):
+            return False
+        if history_start_ms is not None:
+            window_start_ms = max(window_start_ms, history_start_ms - step_ms)
+        return buffer.first_t <= window_start_ms + step_ms and buffer.last_t >= window_start_ms
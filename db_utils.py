@@ -570,6 +570,9 @@ def log_bot_operation(
             context_id = cur.fetchone()[0]
             if indicators is not None:
                 for indicator in indicators:
+                    # Risultati tipizzati (TechnicalAnalysis): numeri letti direttamente
+                    if hasattr(indicator, "to_dict"):
+                        indicator = indicator.to_dict()
                     indicators_norm = _normalize_json_arg(indicator) if indicator is not None else None
 
                     # 2) Dettagli per tipo di input, se presenti
@@ -611,11 +614,11 @@ def log_bot_operation(
                             intraday = item.get("intraday") or {}
                             lt15 = item.get("longer_term_15m") or {}
 
-                            # Volume: "Bid Vol: 1018.14, Ask Vol: 350.96"
+                            volume_bid = item.get("volume_bid")
+                            volume_ask = item.get("volume_ask")
+                            # Formato legacy: "Bid Vol: 1018.14, Ask Vol: 350.96"
                             volume_str = item.get("volume") or ""
-                            volume_bid = None
-                            volume_ask = None
-                            if isinstance(volume_str, str) and "Bid Vol" in volume_str:
+                            if volume_bid is None and isinstance(volume_str, str) and "Bid Vol" in volume_str:
                                 try:
                                     parts = volume_str.replace("Bid Vol:", "").split("Ask Vol:")
                                     bid_str = parts[0].strip().strip(",")
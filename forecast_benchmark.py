@@ -0,0 +1,175 @@
+"""
+Valutazione walk-forward dei backend di forecast.
+
+Ripercorre le candele chiuse salvate (cache su disco / CandleStore) e, per ogni
+passo, fitta il backend di `HyperliquidForecaster` sulla stessa finestra usata
+in produzione (FORECAST_WINDOWS) prevedendo la candela successiva. Per backend
+riporta:
+
+- MAE (assoluto e in % del prezzo) di yhat rispetto alla chiusura reale;
+- hit rate direzionale (segno di yhat - ultimo prezzo vs movimento reale);
+- copertura della banda yhat_lower/yhat_upper e sua ampiezza media;
+- tempo per fit (media e p95) e picco di memoria Python (tracemalloc).
+
+Il picco di memoria misura solo le allocazioni del processo corrente (Stan
+gira in un processo cmdstan separato) e tracemalloc rallenta i fit: con
+--no-memory i tempi sono quelli reali.
+
+Le candele arrivano da uno store proprio che legge la cache su disco senza
+mai accodarvi (persist=False): il benchmark può girare accanto al bot che la
+aggiorna.
+
+Uso:
+    python forecast_benchmark.py --coins BTC ETH --interval 15m --steps 200 --backends ar prophet
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import hl_client
+from candle_cache import get_disk_cache
+from candle_resampler import ResamplingCandleStore
+from candle_store import CandleStore, INTERVAL_TO_MS
+from forecaster import FORECAST_BACKENDS, FORECAST_WINDOWS, HyperliquidForecaster
+
+
+def read_only_candle_source(testnet: bool = True) -> ResamplingCandleStore:
+    """Sorgente candele come get_candle_source, ma la cache su disco è in sola lettura."""
+    store = CandleStore(hl_client.get_info(testnet), disk_cache=get_disk_cache(testnet), persist=False)
+    return ResamplingCandleStore(store)
+
+
+def load_history(source: ResamplingCandleStore, coin: str, interval: str, limit: int) -> pd.DataFrame:
+    """Ultime `limit` candele chiuse come DataFrame ds/y (la candela in corso è esclusa)."""
+    candles = source.get_candles(coin, interval, limit + 1)
+    now_ms = int(time.time() * 1000)
+    closed = candles.t + INTERVAL_TO_MS[interval] <= now_ms
+    return pd.DataFrame({
+        "ds": pd.to_datetime(candles.t[closed], unit="ms"),
+        "y": candles.close[closed].copy(),
+    }).tail(limit).reset_index(drop=True)
+
+
+def walk_forward(forecaster: HyperliquidForecaster, history: pd.DataFrame, interval: str,
+                 steps: int, warm_start: bool = True, trace_memory: bool = True) -> pd.DataFrame:
+    """
+    Un fit per ciascuno degli ultimi `steps` passi: finestra di training che
+    termina alla candela i-1, confronto con la chiusura della candela i.
+    Con `warm_start` i parametri di ogni fit inizializzano il successivo come in
+    produzione. Restituisce una riga per passo.
+    """
+    window, freq = FORECAST_WINDOWS[interval]
+    y = history["y"].to_numpy()
+    first = max(window, len(history) - steps)
+    records = []
+    init: Optional[dict] = None
+
+    for i in range(first, len(history)):
+        train = history.iloc[i - window:i]
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            forecast, params = forecaster.backend.fit(train, freq, init)
+        except Exception as e:
+            print(f"[Benchmark] Fit fallito al passo {i}: {e}")
+            continue
+        finally:
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else float("nan")
+            if trace_memory:
+                tracemalloc.stop()
+        init = params if warm_start else None
+
+        fc = forecast.iloc[0]
+        records.append({
+            "ds": history["ds"].iloc[i],
+            "last": y[i - 1],
+            "actual": y[i],
+            "yhat": fc["yhat"],
+            "yhat_lower": fc["yhat_lower"],
+            "yhat_upper": fc["yhat_upper"],
+            "fit_seconds": elapsed,
+            "peak_bytes": peak,
+        })
+    return pd.DataFrame(records)
+
+
+def summarize(records: pd.DataFrame) -> Dict[str, float]:
+    """Metriche aggregate di un walk-forward."""
+    if records.empty:
+        return {"steps": 0}
+    actual = records["actual"].to_numpy()
+    yhat = records["yhat"].to_numpy()
+    last = records["last"].to_numpy()
+    error = np.abs(yhat - actual)
+
+    # Passi senza movimento reale o previsto non contano per la direzione
+    moved = (actual != last) & (yhat != last)
+    hits = np.sign(yhat - last) == np.sign(actual - last)
+    covered = (actual >= records["yhat_lower"].to_numpy()) & (actual <= records["yhat_upper"].to_numpy())
+    width = (records["yhat_upper"] - records["yhat_lower"]).to_numpy() / last * 100
+    fit_seconds = records["fit_seconds"].to_numpy()
+
+    return {
+        "steps": len(records),
+        "mae": float(error.mean()),
+        "mae_pct": float((error / actual).mean() * 100),
+        "hit_rate": float(hits[moved].mean()) if moved.any() else float("nan"),
+        "coverage": float(covered.mean()),
+        "band_width_pct": float(width.mean()),
+        "fit_ms_mean": float(fit_seconds.mean() * 1000),
+        "fit_ms_p95": float(np.percentile(fit_seconds, 95) * 1000),
+        "peak_mem_mb": float(records["peak_bytes"].max() / 2**20),
+    }
+
+
+def run_benchmark(coins: List[str], interval: str = "15m", steps: int = 200,
+                  backends: Optional[List[str]] = None, testnet: bool = True,
+                  trace_memory: bool = True) -> pd.DataFrame:
+    """Walk-forward di ogni backend su ogni coin; una riga di metriche per (backend, coin)."""
+    if interval not in FORECAST_WINDOWS:
+        raise ValueError(f"Interval '{interval}' non supportato ({', '.join(FORECAST_WINDOWS)})")
+    window, _ = FORECAST_WINDOWS[interval]
+    forecasters = {name: HyperliquidForecaster(testnet=testnet, backend=name)
+                   for name in (backends or list(FORECAST_BACKENDS))}
+
+    # Stesse candele per tutti i backend
+    source = read_only_candle_source(testnet)
+    histories = {coin: load_history(source, coin, interval, window + steps) for coin in coins}
+
+    rows = []
+    for name, forecaster in forecasters.items():
+        for coin, history in histories.items():
+            print(f"[Benchmark] {name} {coin} {interval}: {max(0, len(history) - window)} passi")
+            metrics = summarize(walk_forward(forecaster, history, interval, steps, trace_memory=trace_memory))
+            rows.append({"backend": name, "coin": coin, **metrics})
+    return pd.DataFrame(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Walk-forward dei backend di forecast")
+    parser.add_argument("--coins", nargs="+", default=["BTC", "ETH", "SOL"])
+    parser.add_argument("--interval", default="15m", choices=sorted(FORECAST_WINDOWS))
+    parser.add_argument("--steps", type=int, default=200, help="passi valutati (un fit ciascuno)")
+    parser.add_argument("--backends", nargs="+", choices=sorted(FORECAST_BACKENDS),
+                        default=sorted(FORECAST_BACKENDS))
+    parser.add_argument("--mainnet", action="store_true", help="candele mainnet invece di testnet")
+    parser.add_argument("--no-memory", action="store_true", help="niente tracemalloc (tempi di fit reali)")
+    parser.add_argument("--csv", help="salva le metriche in un file CSV")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.coins, args.interval, args.steps, args.backends,
+                            testnet=not args.mainnet, trace_memory=not args.no_memory)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(results.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    if args.csv:
+        results.to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
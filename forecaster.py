@@ -1,96 +1,377 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime, timezone, timedelta
-from prophet import Prophet
-from hyperliquid.info import Info
-from hyperliquid.utils import constants
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+import hl_client
+from candle_resampler import get_candle_source
+from candle_store import INTERVAL_TO_MS
 import warnings
 warnings.filterwarnings('ignore')
 
+# Forecast già calcolati: (testnet, backend, coin, interval) -> (timestamp ultima candela, forecast)
+# Condivisi tra istanze: get_crypto_forecasts crea un forecaster nuovo a ogni chiamata
+_FORECAST_CACHE: Dict[Tuple[bool, str, str, str], Tuple[pd.Timestamp, pd.DataFrame]] = {}
+# Parametri dell'ultimo fit per il warm start di Prophet
+_MODEL_PARAMS: Dict[Tuple[bool, str, str, str], dict] = {}
+_CACHE_LOCK = threading.Lock()
+
+# Processi per i fit Prophet (Stan è CPU-bound e single-thread)
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 1)))
+# Tempo massimo (secondi) di attesa del singolo fit
+FORECAST_FIT_TIMEOUT = float(os.getenv("FORECAST_FIT_TIMEOUT", "60"))
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+# Candele di training e frequenza pandas del passo previsto, per timeframe
+FORECAST_WINDOWS: Dict[str, Tuple[int, str]] = {
+    "15m": (300, "15min"),
+    "1h": (500, "H"),
+}
+
+# Timeframe ricalcolati dallo scheduler alla chiusura di ogni candela
+SCHEDULER_INTERVALS = ("15m", "1h")
+# Secondi dopo la chiusura prima del refit (la nuova candela deve essere pubblicata)
+SCHEDULER_CLOSE_DELAY = 5.0
+# Tolleranza (secondi) oltre la durata della candela prima di segnare un forecast stale
+FORECAST_STALE_GRACE = 120.0
+
+_SCHEDULERS: Dict[Tuple[bool, str], "ForecastScheduler"] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+# Backend di default (FORECAST_BACKEND=prophet|ar): "ar" è il modello NumPy veloce
+FORECAST_BACKEND = os.getenv("FORECAST_BACKEND", "prophet")
+# Ampiezza della banda yhat_lower/yhat_upper (come interval_width di Prophet)
+FORECAST_INTERVAL_WIDTH = 0.8
+# Colonne della riga forecast restituita da ogni backend
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper"]
+
+
+def _stan_init(model) -> dict:
+    """Parametri di un modello fittato nel formato `init` di Prophet.fit (warm start)."""
+    res = {}
+    for pname in ['k', 'm', 'sigma_obs']:
+        res[pname] = model.params[pname][0][0]
+    for pname in ['delta', 'beta']:
+        res[pname] = model.params[pname][0]
+    return res
+
+
+class ForecastBackend:
+    """
+    Modello di previsione del passo successivo. `fit` riceve il DataFrame ds/y
+    delle candele e i parametri del fit precedente (o None) e restituisce
+    (riga forecast ds/yhat/yhat_lower/yhat_upper, parametri per il prossimo fit).
+    """
+
+    name = ""
+    # True se il fit è abbastanza costoso da valere un processo del pool
+    use_pool = False
+
+    def fit(self, df: pd.DataFrame, freq: str, init: Optional[dict]) -> Tuple[pd.DataFrame, dict]:
+        raise NotImplementedError
+
+
+class ProphetBackend(ForecastBackend):
+    name = "prophet"
+    use_pool = True
+
+    def fit(self, df: pd.DataFrame, freq: str, init: Optional[dict]) -> Tuple[pd.DataFrame, dict]:
+        # Import qui: il backend AR non richiede prophet/Stan
+        from prophet import Prophet
+
+        model = Prophet(daily_seasonality=True, weekly_seasonality=True,
+                        interval_width=FORECAST_INTERVAL_WIDTH)
+        if init is not None:
+            # Warm start dai parametri del fit precedente: l'ottimizzatore converge prima
+            try:
+                model.fit(df, init=init)
+            except Exception:
+                model = Prophet(daily_seasonality=True, weekly_seasonality=True,
+                                interval_width=FORECAST_INTERVAL_WIDTH)
+                model.fit(df)
+        else:
+            model.fit(df)
+
+        future = model.make_future_dataframe(periods=1, freq=freq)
+        forecast = model.predict(future).tail(1)[FORECAST_COLUMNS]
+        return forecast, _stan_init(model)
+
+
+class ARBackend(ForecastBackend):
+    """
+    AR(p) sui log-rendimenti stimato con minimi quadrati: un solo lstsq su una
+    matrice (n-p) x (p+1), nessuna ottimizzazione iterativa. La banda usa la
+    deviazione standard dei residui con quantile normale.
+    """
+
+    name = "ar"
+
+    def __init__(self, order: int = 3):
+        self.order = order
+
+    def fit(self, df: pd.DataFrame, freq: str, init: Optional[dict]) -> Tuple[pd.DataFrame, dict]:
+        p = self.order
+        y = df["y"].to_numpy(dtype=np.float64)
+        returns = np.diff(np.log(y))
+        n = len(returns) - p
+        if n <= p + 1:
+            raise ValueError(f"Servono almeno {2 * p + 3} candele per AR({p})")
+
+        # Colonna j = rendimento con ritardo j+1, più l'intercetta
+        lagged = np.lib.stride_tricks.sliding_window_view(returns[:-1], p)[:, ::-1]
+        X = np.empty((n, p + 1))
+        X[:, 0] = 1.0
+        X[:, 1:] = lagged
+        target = returns[p:]
+        coef, *_ = np.linalg.lstsq(X, target, rcond=None)
+        residuals = target - X @ coef
+        sigma = float(np.sqrt(residuals @ residuals / (n - p - 1)))
+
+        next_return = coef[0] + coef[1:] @ returns[-1:-p - 1:-1]
+        z = NormalDist().inv_cdf(0.5 + FORECAST_INTERVAL_WIDTH / 2)
+        last_price = y[-1]
+        ds = df["ds"].iloc[-1] + (df["ds"].iloc[-1] - df["ds"].iloc[-2])
+        forecast = pd.DataFrame({
+            "ds": [ds],
+            "yhat": [last_price * np.exp(next_return)],
+            "yhat_lower": [last_price * np.exp(next_return - z * sigma)],
+            "yhat_upper": [last_price * np.exp(next_return + z * sigma)],
+        })[FORECAST_COLUMNS]
+        return forecast, {"coef": coef, "sigma": sigma}
+
+
+FORECAST_BACKENDS: Dict[str, type] = {
+    ProphetBackend.name: ProphetBackend,
+    ARBackend.name: ARBackend,
+}
+
+
+def get_backend(backend=None) -> ForecastBackend:
+    """Istanza del backend: nome registrato, istanza già pronta o None (FORECAST_BACKEND)."""
+    if isinstance(backend, ForecastBackend):
+        return backend
+    name = backend or FORECAST_BACKEND
+    if name not in FORECAST_BACKENDS:
+        raise ValueError(f"Backend forecast '{name}' non supportato ({', '.join(FORECAST_BACKENDS)})")
+    return FORECAST_BACKENDS[name]()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            # spawn: il processo principale ha thread WebSocket attivi, fork non è sicuro
+            _POOL = ProcessPoolExecutor(
+                max_workers=max(1, FORECAST_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOL
+
+
+def _reset_pool(terminate: bool = False) -> None:
+    """Scarta il pool (rotto o con fit bloccati); il prossimo _get_pool ne crea uno nuovo."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is None:
+        return
+    if terminate:
+        _shutdown_terminating(pool)
+    else:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _shutdown_terminating(pool: ProcessPoolExecutor) -> None:
+    """
+    Chiude il pool terminando anche i worker con un fit bloccato, che altrimenti
+    continuerebbero a occupare una CPU fino alla fine del fit.
+
+    Dipende da un dettaglio interno di CPython: `ProcessPoolExecutor._processes`
+    (pid -> Process), da leggere prima di shutdown che lo azzera. L'API pubblica
+    non permette di interrompere un task in esecuzione; se l'attributo manca il
+    pool viene solo chiuso.
+    """
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
 class HyperliquidForecaster:
-    def __init__(self, testnet: bool = True):
-        base_url = constants.TESTNET_API_URL if testnet else constants.MAINNET_API_URL
-        self.info = Info(base_url, skip_ws=True)
+    def __init__(self, testnet: bool = True, backend=None):
+        self.testnet = testnet
+        # "prophet", "ar" o un'istanza di ForecastBackend (default FORECAST_BACKEND)
+        self.backend = get_backend(backend)
+        self.info = hl_client.get_info(testnet)
+        # Stessa sorgente candele degli indicatori (flusso 1m aggregato in locale)
+        self.candle_store = get_candle_source(testnet)
         self.last_prices = {}  # Memorizza gli ultimi prezzi per calcolare la variazione
 
     def _fetch_candles(self, coin: str, interval: str, limit: int) -> pd.DataFrame:
-        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-        interval_ms = {"15m": 15*60_000, "1h": 60*60_000}[interval]
-        start_ms = now_ms - limit * interval_ms
-
-        data = self.info.candles_snapshot(
-            name=coin,
-            interval=interval,
-            startTime=start_ms,
-            endTime=now_ms
-        )
-
-        if not data:
-            raise RuntimeError(f"No candles for {coin} {interval}")
+        candles = self.candle_store.get_candles(coin, interval, limit)
 
-        df = pd.DataFrame(data)
-        df["ds"] = pd.to_datetime(df["t"], unit="ms", utc=True).dt.tz_convert(None)
-        df["y"] = df["c"].astype(float)
+        if not len(candles):
+            raise RuntimeError(f"No candles for {coin} {interval}")
 
-        df = df[["ds", "y"]].sort_values("ds").reset_index(drop=True)
+        df = pd.DataFrame({
+            "ds": pd.to_datetime(candles.t, unit="ms"),
+            "y": candles.close.copy(),
+        })
         return df
 
-    def forecast(self, coin: str, interval: str) -> tuple:
-        if interval == "15m":
-            df = self._fetch_candles(coin, "15m", limit=300)
-            freq = "15min"
-        else:
-            df = self._fetch_candles(coin, "1h", limit=500)
-            freq = "H"
+    def _prepare(self, coin: str, interval: str):
+        """Candele e stato di cache per (coin, interval): (df, freq, ultimo prezzo, ts, forecast in cache, init)."""
+        candle_interval = interval if interval in FORECAST_WINDOWS else "1h"
+        limit, freq = FORECAST_WINDOWS[candle_interval]
+        df = self._fetch_candles(coin, candle_interval, limit=limit)
 
         # Memorizza l'ultimo prezzo
         last_price = df["y"].iloc[-1]
+        last_ts = df["ds"].iloc[-1]
 
-        model = Prophet(daily_seasonality=True, weekly_seasonality=True)
-        model.fit(df)
+        # Stessa ultima candela: il forecast in cache è ancora valido, niente refit
+        key = (self.testnet, self.backend.name, coin, interval)
+        with _CACHE_LOCK:
+            cached = _FORECAST_CACHE.get(key)
+            init = _MODEL_PARAMS.get(key)
+        cached_forecast = cached[1] if cached is not None and cached[0] == last_ts else None
+        return df, freq, last_price, last_ts, cached_forecast, init
 
-        future = model.make_future_dataframe(periods=1, freq=freq)
-        forecast = model.predict(future)
+    def _store(self, coin: str, interval: str, last_ts, forecast: pd.DataFrame, params: dict) -> None:
+        with _CACHE_LOCK:
+            key = (self.testnet, self.backend.name, coin, interval)
+            _FORECAST_CACHE[key] = (last_ts, forecast)
+            _MODEL_PARAMS[key] = params
+
+    def forecast(self, coin: str, interval: str) -> tuple:
+        df, freq, last_price, last_ts, cached, init = self._prepare(coin, interval)
+        if cached is not None:
+            return cached, last_price
+
+        forecast, params = self.backend.fit(df, freq, init)
+        self._store(coin, interval, last_ts, forecast, params)
 
         # Restituisce sia il forecast che l'ultimo prezzo
-        return forecast.tail(1)[["ds", "yhat", "yhat_lower", "yhat_upper"]], last_price
+        return forecast, last_price
 
-    def forecast_many(self, tickers: list, intervals=("15m", "1h")):
-        results = []
-        for coin in tickers:
-            for interval in intervals:
-                try:
-                    forecast_data, last_price = self.forecast(coin, interval)
-                    fc = forecast_data.iloc[0]
-                    
-                    # Calcola la variazione percentuale
-                    variazione_pct = ((fc["yhat"] - last_price) / last_price) * 100
-                    
-                    # Determina il timeframe in italiano
-                    timeframe = "Prossimi 15 Minuti" if interval == "15m" else "Prossima Ora"
-                    
-                    results.append({
-                        "Ticker": coin,
-                        "Timeframe": timeframe,
-                        "Ultimo Prezzo": round(last_price, 2),
-                        "Previsione": round(fc["yhat"], 2),
-                        "Limite Inferiore": round(fc["yhat_lower"], 2),
-                        "Limite Superiore": round(fc["yhat_upper"], 2),
-                        "Variazione %": round(variazione_pct, 2),
-                        "Timestamp Previsione": fc["ds"]
-                    })
-                except Exception as e:
-                    results.append({
-                        "Ticker": coin,
-                        "Timeframe": "Prossimi 15 Minuti" if interval == "15m" else "Prossima Ora",
-                        "Ultimo Prezzo": None,
-                        "Previsione": None,
-                        "Limite Inferiore": None,
-                        "Limite Superiore": None,
-                        "Variazione %": None,
-                        "Timestamp Previsione": None,
-                        "error": str(e)
-                    })
-        return results
+    @staticmethod
+    def _timeframe(interval: str) -> str:
+        return "Prossimi 15 Minuti" if interval == "15m" else "Prossima Ora"
+
+    def _result_row(self, coin: str, interval: str, forecast_data: pd.DataFrame, last_price: float) -> dict:
+        fc = forecast_data.iloc[0]
+
+        # Calcola la variazione percentuale
+        variazione_pct = ((fc["yhat"] - last_price) / last_price) * 100
+
+        return {
+            "Ticker": coin,
+            "Timeframe": self._timeframe(interval),
+            "Ultimo Prezzo": round(last_price, 2),
+            "Previsione": round(fc["yhat"], 2),
+            "Limite Inferiore": round(fc["yhat_lower"], 2),
+            "Limite Superiore": round(fc["yhat_upper"], 2),
+            "Variazione %": round(variazione_pct, 2),
+            "Timestamp Previsione": fc["ds"]
+        }
+
+    def _error_row(self, coin: str, interval: str, error: Exception) -> dict:
+        return {
+            "Ticker": coin,
+            "Timeframe": self._timeframe(interval),
+            "Ultimo Prezzo": None,
+            "Previsione": None,
+            "Limite Inferiore": None,
+            "Limite Superiore": None,
+            "Variazione %": None,
+            "Timestamp Previsione": None,
+            "error": str(error)
+        }
+
+    def forecast_many(self, tickers: list, intervals=("15m", "1h"), fit_timeout: float = FORECAST_FIT_TIMEOUT):
+        """
+        Forecast di ogni ticker x interval. I fit non in cache girano in parallelo
+        nel pool di processi (backend con use_pool, es. Prophet): un fit che va in timeout o fa cadere il suo processo
+        produce solo la propria riga d'errore. Stesso formato di righe di sempre.
+        """
+        jobs = [(coin, interval) for coin in tickers for interval in intervals]
+        rows: Dict[Tuple[str, str], dict] = {}
+        prepared = {}
+
+        for coin, interval in jobs:
+            try:
+                df, freq, last_price, last_ts, cached, init = self._prepare(coin, interval)
+            except Exception as e:
+                rows[(coin, interval)] = self._error_row(coin, interval, e)
+                continue
+            if cached is not None:
+                rows[(coin, interval)] = self._result_row(coin, interval, cached, last_price)
+            else:
+                prepared[(coin, interval)] = (df, freq, last_price, last_ts, init)
+
+        if prepared:
+            self._fit_many(prepared, rows, fit_timeout)
+
+        return [rows[job] for job in jobs]
+
+    def _fit_many(self, prepared: dict, rows: Dict[Tuple[str, str], dict], fit_timeout: float) -> None:
+        futures = None
+        if self.backend.use_pool:
+            try:
+                pool = _get_pool()
+                futures = {job: pool.submit(self.backend.fit, p[0], p[1], p[4]) for job, p in prepared.items()}
+            except Exception as e:
+                # Pool non disponibile: fit nel processo corrente, uno alla volta
+                print(f"[Forecaster] Process pool non disponibile ({e}), fit sequenziali")
+
+        # I fit in coda aspettano un worker libero: il timeout vale per "turno" di worker
+        rounds = -(-len(prepared) // max(1, FORECAST_WORKERS))
+        deadline = time.monotonic() + fit_timeout * rounds
+        broken: List[Tuple[str, str]] = []
+        stuck = False
+        for job, (df, freq, last_price, last_ts, init) in prepared.items():
+            coin, interval = job
+            try:
+                if futures is None:
+                    forecast, params = self.backend.fit(df, freq, init)
+                else:
+                    forecast, params = futures[job].result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                stuck = True
+                rows[job] = self._error_row(coin, interval, TimeoutError(f"Fit timeout ({fit_timeout:g}s)"))
+                continue
+            except BrokenProcessPool:
+                broken.append(job)
+                continue
+            except Exception as e:
+                rows[job] = self._error_row(coin, interval, e)
+                continue
+            self._store(coin, interval, last_ts, forecast, params)
+            rows[job] = self._result_row(coin, interval, forecast, last_price)
+
+        if stuck or broken:
+            _reset_pool(terminate=stuck)
+
+        # Un processo caduto rompe tutto il pool: i fit coinvolti vengono ritentati
+        # uno alla volta, così solo quello che fallisce di nuovo resta in errore
+        for job in broken:
+            coin, interval = job
+            df, freq, last_price, last_ts, init = prepared[job]
+            try:
+                forecast, params = _get_pool().submit(self.backend.fit, df, freq, init).result(timeout=fit_timeout)
+            except Exception as e:
+                _reset_pool(terminate=isinstance(e, FutureTimeoutError))
+                rows[job] = self._error_row(coin, interval, e)
+                continue
+            self._store(coin, interval, last_ts, forecast, params)
+            rows[job] = self._result_row(coin, interval, forecast, last_price)
 
     def get_predictions_summary(self) -> pd.DataFrame:
         """Restituisce un DataFrame con il riepilogo delle previsioni (compatibile con il vecchio script)"""
@@ -109,15 +390,169 @@ class HyperliquidForecaster:
             
         return df.to_string(index=False)
 
+class ForecastScheduler:
+    """
+    Ricalcola in background i forecast della watchlist alla chiusura di ogni
+    candela 15m/1h e li pubblica in memoria con l'istante di calcolo: il ciclo
+    di trading legge l'ultimo forecast disponibile senza mai aspettare un fit.
+    """
+
+    def __init__(self, forecaster: HyperliquidForecaster, intervals=SCHEDULER_INTERVALS,
+                 close_delay: float = SCHEDULER_CLOSE_DELAY):
+        self.forecaster = forecaster
+        self.intervals = tuple(intervals)
+        self.close_delay = close_delay
+        self._coins: set = set()
+        # (coin, interval) -> (riga forecast, time.time() di pubblicazione)
+        self._rows: Dict[Tuple[str, str], Tuple[dict, float]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ForecastScheduler":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="forecast-scheduler", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def watch(self, coins) -> None:
+        """Aggiunge coin alla watchlist; quelli nuovi vengono calcolati subito."""
+        with self._lock:
+            new = set(coins) - self._coins
+            self._coins |= new
+        if new:
+            self._wake.set()
+
+    def set_watchlist(self, coins) -> None:
+        """Sostituisce la watchlist (i forecast dei coin rimossi vengono scartati)."""
+        coins = set(coins)
+        with self._lock:
+            new = coins - self._coins
+            self._coins = coins
+            for key in [k for k in self._rows if k[0] not in coins]:
+                del self._rows[key]
+        if new:
+            self._wake.set()
+
+    def lookup(self, tickers: list) -> List[dict]:
+        """
+        Ultimo forecast pubblicato per ogni ticker x interval, con età in minuti e
+        flag `Stale` se più vecchio di una candela (+ FORECAST_STALE_GRACE).
+        I ticker non ancora in watchlist vengono aggiunti e calcolati in background.
+        """
+        self.watch(tickers)
+        now = time.time()
+        results = []
+        with self._lock:
+            for coin in tickers:
+                for interval in self.intervals:
+                    published = self._rows.get((coin, interval))
+                    if published is None:
+                        row = self.forecaster._error_row(coin, interval, RuntimeError("Forecast in calcolo"))
+                        age = None
+                    else:
+                        row, published_at = published
+                        row = dict(row)
+                        age = now - published_at
+                    row["Età (min)"] = round(age / 60, 1) if age is not None else None
+                    row["Stale"] = (
+                        age is None or "error" in row
+                        or age > INTERVAL_TO_MS[interval] / 1000 + FORECAST_STALE_GRACE
+                    )
+                    results.append(row)
+        return results
+
+    def _steps(self) -> Dict[str, int]:
+        return {interval: INTERVAL_TO_MS[interval] // 1000 for interval in self.intervals}
+
+    def _next_close(self, last_close: int, now: float) -> Tuple[int, tuple]:
+        """
+        Prossima chiusura (epoch s) da elaborare dopo `last_close` e timeframe che
+        hanno chiuso una candela da allora. Se il ciclo è rimasto indietro di più
+        candele (fit lenti) si passa all'ultima chiusura già elaborabile.
+        """
+        steps = self._steps()
+        base = min(steps.values())
+        close = max(last_close // base + 1, int(now - self.close_delay) // base) * base
+        return close, tuple(i for i, step in steps.items() if close // step > last_close // step)
+
+    def _refresh(self, coins: list, intervals: tuple) -> None:
+        if not coins or not intervals:
+            return
+        started = time.time()
+        try:
+            rows = self.forecaster.forecast_many(coins, intervals=intervals)
+        except Exception as e:
+            print(f"[ForecastScheduler] Errore refresh {intervals}: {e}")
+            return
+        published_at = time.time()
+        with self._lock:
+            for row, (coin, interval) in zip(rows, ((c, i) for c in coins for i in intervals)):
+                if coin not in self._coins:
+                    continue
+                # Un fit fallito non sostituisce un forecast valido (che diventa stale)
+                previous = self._rows.get((coin, interval))
+                if "error" in row and previous is not None and "error" not in previous[0]:
+                    continue
+                self._rows[(coin, interval)] = (row, published_at)
+        print(f"[ForecastScheduler] {len(coins)} coin x {intervals} in {published_at - started:.1f}s")
+
+    def _run(self) -> None:
+        # Le chiusure passate sono coperte dal primo calcolo della watchlist
+        base = min(self._steps().values())
+        last_close = int(time.time()) // base * base
+        while not self._stop.is_set():
+            with self._lock:
+                pending = sorted(c for c in self._coins if any((c, i) not in self._rows for i in self.intervals))
+            self._refresh(pending, self.intervals)
+
+            # Dall'ultima chiusura elaborata, non da adesso: un risveglio subito
+            # dopo una chiusura (entro close_delay) non la salta
+            close, due = self._next_close(last_close, time.time())
+            if self._wake.wait(timeout=max(0.0, close + self.close_delay - time.time())):
+                # Watchlist cambiata (o stop): calcola subito i coin nuovi
+                self._wake.clear()
+                continue
+            with self._lock:
+                coins = sorted(self._coins)
+            self._refresh(coins, due)
+            last_close = close
+
+
+def get_forecast_scheduler(testnet: bool = True, backend=None) -> ForecastScheduler:
+    """Scheduler condiviso per (rete, backend), avviato alla prima richiesta."""
+    backend = get_backend(backend)
+    key = (testnet, backend.name)
+    scheduler = _SCHEDULERS.get(key)
+    if scheduler is None:
+        with _SCHEDULERS_LOCK:
+            scheduler = _SCHEDULERS.get(key)
+            if scheduler is None:
+                scheduler = ForecastScheduler(HyperliquidForecaster(testnet=testnet, backend=backend))
+                _SCHEDULERS[key] = scheduler
+    return scheduler.start()
+
+
 # Funzione helper per mantenere compatibilità con il vecchio script
-def get_hyperliquid_forecasts(tickers=['BTC', 'ETH', 'SOL'], testnet=True):
-    forecaster = HyperliquidForecaster(testnet=testnet)
+def get_hyperliquid_forecasts(tickers=['BTC', 'ETH', 'SOL'], testnet=True, backend=None):
+    forecaster = HyperliquidForecaster(testnet=testnet, backend=backend)
     return forecaster.get_crypto_forecasts(tickers)
 
-def get_crypto_forecasts(tickers=['BTC', 'ETH', 'SOL'], testnet=True):
+def get_crypto_forecasts(tickers=['BTC', 'ETH', 'SOL'], testnet=True, backend=None):
+    """
+    Lettura non bloccante degli ultimi forecast calcolati dallo scheduler in
+    background (avviato qui alla prima chiamata). Ogni riga riporta l'età del
+    forecast e il flag Stale; per un ticker nuovo la prima risposta è "in calcolo".
+    """
     try:
-        forecaster = HyperliquidForecaster(testnet=True)
-        results = forecaster.forecast_many(tickers)  # Use parameter, not hardcoded
+        results = get_forecast_scheduler(testnet, backend).lookup(tickers)
         
         # Stampa il riepilogo come DataFrame
         df = pd.DataFrame(results)
@@ -0,0 +1,96 @@
+"""
+Registry condiviso dei client Hyperliquid `Info`.
+
+Un solo `Info` per (rete, con/senza WebSocket) in tutto il processo, con sessione
+HTTP a pool di connessioni, e una cache con TTL di `meta()` e dell'indice
+coin -> posizione nell'universe. Indicatori, forecaster, trader e bot prendono
+client e metadati da qui invece di creare ciascuno il proprio `Info`.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+
+from hyperliquid.info import Info
+from hyperliquid.utils import constants
+
+# Timeout (secondi) della singola richiesta REST
+REQUEST_TIMEOUT = 10.0
+# Connessioni HTTP keep-alive per sessione (>= worker del batch indicatori)
+HTTP_POOL_SIZE = 32
+# Validità della cache di meta() / universe
+META_TTL = 300.0
+
+_clients: Dict[Tuple[bool, bool], Info] = {}
+_meta_cache: Dict[bool, Tuple[float, dict, Dict[str, int]]] = {}
+_lock = threading.RLock()
+
+
+def base_url_for(testnet: bool) -> str:
+    return constants.TESTNET_API_URL if testnet else constants.MAINNET_API_URL
+
+
+def _mount_pool(info: Info) -> None:
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    info.session.mount("https://", adapter)
+    info.session.mount("http://", adapter)
+
+
+def get_info(testnet: bool = True, skip_ws: bool = True) -> Info:
+    """Restituisce il client `Info` condiviso per la rete, creandolo alla prima chiamata."""
+    key = (testnet, skip_ws)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            # Il client WebSocket riusa meta() già in cache, evitando un'altra richiesta
+            meta = None if skip_ws else get_meta(testnet)
+            if not skip_ws:
+                print(f"[hl_client] Creating shared Info connection with WebSocket (testnet={testnet})")
+            client = Info(base_url_for(testnet), skip_ws=skip_ws, meta=meta, timeout=REQUEST_TIMEOUT)
+            _mount_pool(client)
+            _clients[key] = client
+    return client
+
+
+def get_meta(testnet: bool = True, ttl: float = META_TTL, force: bool = False) -> dict:
+    """`meta()` della rete con cache TTL condivisa."""
+    return _get_meta_entry(testnet, ttl, force)[1]
+
+
+def get_universe_index(testnet: bool = True, ttl: float = META_TTL) -> Dict[str, int]:
+    """Indice coin -> posizione in `meta()["universe"]`."""
+    return _get_meta_entry(testnet, ttl, False)[2]
+
+
+def get_available_symbols(testnet: bool = True) -> List[str]:
+    """Lista dei simboli perp disponibili sulla rete (dalla cache di meta)."""
+    return list(get_universe_index(testnet).keys())
+
+
+def invalidate_meta(testnet: Optional[bool] = None) -> None:
+    with _lock:
+        if testnet is None:
+            _meta_cache.clear()
+        else:
+            _meta_cache.pop(testnet, None)
+
+
+def _get_meta_entry(testnet: bool, ttl: float, force: bool) -> Tuple[float, dict, Dict[str, int]]:
+    entry = _meta_cache.get(testnet)
+    if entry is not None and not force and time.time() - entry[0] < ttl:
+        return entry
+
+    with _lock:
+        entry = _meta_cache.get(testnet)
+        if entry is not None and not force and time.time() - entry[0] < ttl:
+            return entry
+        meta = get_info(testnet).meta()
+        index = {asset["name"]: idx for idx, asset in enumerate(meta["universe"])}
+        entry = (time.time(), meta, index)
+        _meta_cache[testnet] = entry
+        return entry
@@ -5,9 +5,9 @@ from typing import Dict, Any
 import eth_account
 from eth_account.signers.local import LocalAccount
 
-from hyperliquid.info import Info
 from hyperliquid.exchange import Exchange
-from hyperliquid.utils import constants
+
+import hl_client
 
 
 
@@ -22,17 +22,24 @@ class HyperLiquidTrader:
         self.secret_key = secret_key
         self.account_address = account_address
 
-        base_url = constants.TESTNET_API_URL if testnet else constants.MAINNET_API_URL
+        base_url = hl_client.base_url_for(testnet)
         self.base_url = base_url
 
         # crea account signer
         account: LocalAccount = eth_account.Account.from_key(secret_key)
 
-        self.info = Info(base_url, skip_ws=skip_ws)
-        self.exchange = Exchange(account, base_url, account_address=account_address)
+        # client Info e meta condivisi dal registry (niente meta() duplicati)
+        self.info = hl_client.get_info(testnet, skip_ws=skip_ws)
 
         # cache meta per tick-size e min-size
-        self.meta = self.info.meta()
+        self.meta = hl_client.get_meta(testnet)
+        self.exchange = Exchange(
+            account,
+            base_url,
+            meta=self.meta,
+            account_address=account_address,
+            timeout=hl_client.REQUEST_TIMEOUT,
+        )
 
     def _to_hl_size(self, size_decimal: Decimal) -> str:
         # HL accetta max 8 decimali
@@ -0,0 +1,331 @@
+"""
+Motore indicatori incrementale (streaming).
+
+Mantiene lo stato corrente di ogni indicatore per (coin, interval, nome, parametri)
+e lo aggiorna in O(1) alla chiusura di ogni nuova candela, invece di ricalcolare
+l'intera serie con `ta` a ogni chiamata.
+
+Le formule replicano quelle di `ta` / `pandas.Series.ewm(adjust=False)`: i valori
+coincidono esattamente con quelli di EMAIndicator, MACD, RSIIndicator e
+AverageTrueRange calcolati sull'intero storico elaborato dal primo `sync` (non
+su una finestra fissa: lo stato si porta dietro tutte le barre precedenti).
+
+Una barra entra nello stato solo quando nei dati compare la successiva: l'ultima
+barra ricevuta resta sempre un'anteprima, così valori parziali (vista servita
+dalla memoria o scaricata prima della chiusura) non vengono mai congelati.
+"""
+import math
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NAN = float("nan")
+
+# Indicatori mantenuti di default: (nome, parametri)
+DEFAULT_INDICATORS: Tuple[Tuple[str, Tuple[int, ...]], ...] = (
+    ("ema", (20,)),
+    ("ema", (50,)),
+    ("macd", (12, 26, 9)),
+    ("rsi", (7,)),
+    ("rsi", (14,)),
+    ("atr", (3,)),
+    ("atr", (14,)),
+)
+
+
+def _alpha_from_span(span: int) -> float:
+    # Stessa catena di calcolo di pandas: span -> com -> alpha
+    com = (span - 1) / 2.0
+    return 1.0 / (1.0 + com)
+
+
+def _alpha_from_alpha(alpha: float) -> float:
+    com = (1.0 - alpha) / alpha
+    return 1.0 / (1.0 + com)
+
+
+class _EWM:
+    """Media esponenziale con adjust=False, aggiornata un valore alla volta."""
+
+    __slots__ = ("alpha", "min_periods", "weighted", "nobs")
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.weighted = NAN
+        self.nobs = 0
+
+    def step(self, x: float) -> Tuple[float, int]:
+        """Restituisce (weighted, nobs) dopo `x` senza modificare lo stato."""
+        if self.nobs == 0:
+            return x, 1
+        weighted = self.weighted
+        if weighted != x:
+            old_wt = 1.0 - self.alpha
+            weighted = (old_wt * weighted + self.alpha * x) / (old_wt + self.alpha)
+        return weighted, self.nobs + 1
+
+    def commit(self, state: Tuple[float, int]) -> None:
+        self.weighted, self.nobs = state
+
+    def output(self, state: Tuple[float, int]) -> float:
+        weighted, nobs = state
+        return weighted if nobs >= self.min_periods else NAN
+
+    def current(self) -> float:
+        return self.output((self.weighted, self.nobs))
+
+
+class EMAState:
+    """EMA come `ta.trend.EMAIndicator(close, window).ema_indicator()`."""
+
+    def __init__(self, window: int):
+        self._ewm = _EWM(_alpha_from_span(window), window)
+
+    def step(self, high: float, low: float, close: float):
+        state = self._ewm.step(close)
+        return state, self._ewm.output(state)
+
+    def commit(self, state) -> None:
+        self._ewm.commit(state)
+
+
+class MACDState:
+    """Istogramma MACD come `ta.trend.MACD(close).macd_diff()`."""
+
+    def __init__(self, window_fast: int = 12, window_slow: int = 26, window_sign: int = 9):
+        self._fast = _EWM(_alpha_from_span(window_fast), window_fast)
+        self._slow = _EWM(_alpha_from_span(window_slow), window_slow)
+        self._sign = _EWM(_alpha_from_span(window_sign), window_sign)
+
+    def step(self, high: float, low: float, close: float):
+        fast = self._fast.step(close)
+        slow = self._slow.step(close)
+        macd = self._fast.output(fast) - self._slow.output(slow)
+        # La linea del segnale parte solo dal primo MACD valido (NaN iniziali ignorati)
+        if math.isnan(macd):
+            sign = (self._sign.weighted, self._sign.nobs)
+            return (fast, slow, sign), NAN
+        sign = self._sign.step(macd)
+        return (fast, slow, sign), macd - self._sign.output(sign)
+
+    def commit(self, state) -> None:
+        fast, slow, sign = state
+        self._fast.commit(fast)
+        self._slow.commit(slow)
+        self._sign.commit(sign)
+
+
+class RSIState:
+    """RSI come `ta.momentum.RSIIndicator(close, window).rsi()`."""
+
+    def __init__(self, window: int):
+        alpha = _alpha_from_alpha(1.0 / window)
+        self._up = _EWM(alpha, window)
+        self._down = _EWM(alpha, window)
+        self._prev_close: Optional[float] = None
+
+    def step(self, high: float, low: float, close: float):
+        if self._prev_close is None:
+            # diff iniziale NaN: ta lo trasforma in 0.0 per entrambe le direzioni
+            up_x, down_x = 0.0, 0.0
+        else:
+            diff = close - self._prev_close
+            up_x = diff if diff > 0 else 0.0
+            down_x = -diff if diff < 0 else 0.0
+        up = self._up.step(up_x)
+        down = self._down.step(down_x)
+        emaup = self._up.output(up)
+        emadn = self._down.output(down)
+        if emadn == 0:
+            rsi = 100.0
+        elif math.isnan(emaup) or math.isnan(emadn):
+            rsi = NAN
+        else:
+            rsi = 100 - (100 / (1 + emaup / emadn))
+        return (up, down, close), rsi
+
+    def commit(self, state) -> None:
+        up, down, close = state
+        self._up.commit(up)
+        self._down.commit(down)
+        self._prev_close = close
+
+
+class ATRState:
+    """ATR come `ta.volatility.AverageTrueRange(high, low, close, window)`.
+
+    Come in `ta`, i valori prima della finestra iniziale sono 0.0 (non NaN) e il
+    primo valore è la media semplice dei primi `window` true range.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._prev_close: Optional[float] = None
+        self._warmup: List[float] = []
+        self._atr = 0.0
+        self._count = 0
+
+    def step(self, high: float, low: float, close: float):
+        tr = high - low
+        if self._prev_close is not None:
+            tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        count = self._count + 1
+        if count < self.window:
+            return (0.0, count, tr, close), 0.0
+        if count == self.window:
+            atr = float(np.asarray(self._warmup + [tr]).sum() / self.window)
+        else:
+            atr = (self._atr * (self.window - 1) + tr) / float(self.window)
+        return (atr, count, tr, close), atr
+
+    def commit(self, state) -> None:
+        atr, count, tr, close = state
+        if count < self.window:
+            self._warmup.append(tr)
+        else:
+            self._warmup = []
+        self._atr = atr
+        self._count = count
+        self._prev_close = close
+
+
+_STATE_FACTORY = {
+    "ema": EMAState,
+    "macd": MACDState,
+    "rsi": RSIState,
+    "atr": ATRState,
+}
+
+
+def series_name(name: str, params: Tuple[int, ...]) -> str:
+    """Nome della serie in output, es. ("ema", (20,)) -> "ema_20", ("macd", ...) -> "macd"."""
+    if name == "macd":
+        return "macd"
+    return f"{name}_{'_'.join(str(p) for p in params)}"
+
+
+class _SymbolState:
+    """Stato di tutti gli indicatori per un singolo (coin, interval)."""
+
+    def __init__(self, indicators, history: int):
+        self.indicators = {
+            (name, params): _STATE_FACTORY[name](*params) for name, params in indicators
+        }
+        self.series: Dict[str, deque] = {
+            series_name(name, params): deque(maxlen=history) for name, params in indicators
+        }
+        self.series["close"] = deque(maxlen=history)
+        self.last_closed_ts: Optional[int] = None
+
+    def push(self, ts: int, high: float, low: float, close: float) -> None:
+        for (name, params), state in self.indicators.items():
+            new_state, value = state.step(high, low, close)
+            state.commit(new_state)
+            self.series[series_name(name, params)].append(value)
+        self.series["close"].append(close)
+        self.last_closed_ts = ts
+
+    def preview(self, high: float, low: float, close: float) -> Dict[str, float]:
+        values = {"close": close}
+        for (name, params), state in self.indicators.items():
+            _, value = state.step(high, low, close)
+            values[series_name(name, params)] = value
+        return values
+
+
+class IndicatorEngine:
+    """
+    Stato incrementale degli indicatori per (coin, interval, indicatore, parametri).
+
+    Uso tipico:
+        engine.sync(coin, "15m", ts, high, low, close)
+        snap = engine.snapshot(coin, "15m")
+
+    `sync` accoda solo le candele più recenti dell'ultima già elaborata che hanno
+    già una barra successiva (O(1) per barra); l'ultima barra viene calcolata in
+    anteprima senza alterare lo stato, così da riflettere il prezzo corrente
+    come faceva il ricalcolo completo con `ta`.
+    """
+
+    def __init__(self, history: int = 10, indicators=DEFAULT_INDICATORS):
+        self.history = history
+        self.indicators = tuple(indicators)
+        self._symbols: Dict[Tuple[str, str], _SymbolState] = {}
+        self._live: Dict[Tuple[str, str], Optional[Tuple[float, float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def reset(self, coin: str, interval: str) -> None:
+        with self._lock:
+            self._symbols.pop((coin, interval), None)
+            self._live.pop((coin, interval), None)
+
+    def sync(
+        self,
+        coin: str,
+        interval: str,
+        ts: Sequence[int],
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+    ) -> None:
+        """
+        Allinea lo stato alle candele fornite (ordinate per timestamp di apertura).
+
+        Se l'ultima candela elaborata non è più presente nella finestra (buco
+        troppo lungo) lo stato viene ricostruito dall'inizio della finestra.
+        """
+        key = (coin, interval)
+        n = len(ts)
+        if n == 0:
+            return
+        # La chiusura la decidono i dati, non l'orologio: l'ultima barra può avere
+        # ancora OHLC parziali e viene confermata solo quando arriva la successiva
+        n_closed = n - 1
+
+        with self._lock:
+            state = self._symbols.get(key)
+            start = 0
+            if state is not None and state.last_closed_ts is not None:
+                last = state.last_closed_ts
+                idx = int(np.searchsorted(np.asarray(ts), last))
+                if idx < n and int(ts[idx]) == last:
+                    start = idx + 1
+                elif int(ts[0]) > last:
+                    state = None
+                else:
+                    start = idx
+            if state is None:
+                state = _SymbolState(self.indicators, self.history)
+                self._symbols[key] = state
+                start = 0
+
+            for i in range(start, n_closed):
+                state.push(int(ts[i]), float(high[i]), float(low[i]), float(close[i]))
+
+            self._live[key] = (float(high[-1]), float(low[-1]), float(close[-1]))
+
+    def snapshot(self, coin: str, interval: str, n: Optional[int] = None) -> Dict[str, List[float]]:
+        """
+        Ultime `n` osservazioni (default `history`) di ogni serie, barra aperta inclusa.
+
+        Restituisce {"close": [...], "ema_20": [...], "macd": [...], ...}, ordinate
+        dalla più vecchia alla più recente.
+        """
+        key = (coin, interval)
+        n = n or self.history
+        with self._lock:
+            state = self._symbols.get(key)
+            if state is None:
+                raise KeyError(f"Nessuno stato indicatori per {coin} ({interval})")
+            live = self._live.get(key)
+            out: Dict[str, List[float]] = {}
+            preview = state.preview(*live) if live else None
+            for name, values in state.series.items():
+                series = list(values)
+                if preview is not None:
+                    series.append(preview[name])
+                out[name] = series[-n:]
+            return out
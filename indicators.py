@@ -1,22 +1,37 @@
+import numpy as np
 import pandas as pd
-import ta
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-from hyperliquid.info import Info
-from hyperliquid.utils import constants
+import hl_client
+from analysis_result import AnalysisText, OrderbookVolume, TechnicalAnalysis
+from candle_resampler import get_candle_source
+from candle_store import CandleView, INTERVAL_TO_MS
+from indicator_engine import IndicatorEngine
+from market_state import MarketStateSnapshot, get_market_state_cache
+from ws_manager import get_ws_manager
 
 # Costante Fee Taker standard Hyperliquid (0.035%)
 TAKER_FEE_RATE = 0.00035
 
-INTERVAL_TO_MS = {
-    "1m": 60_000,
-    "5m": 5 * 60_000,
-    "15m": 15 * 60_000,
-    "1h": 60 * 60_000,
-    "4h": 4 * 60 * 60_000,
-    "1d": 24 * 60 * 60_000,
-}
+# Timeout (secondi) e parallelismo del batch multi-simbolo
+BATCH_TIMEOUT = 30.0
+BATCH_MAX_WORKERS = 16
+
+# Barre 15m usate dall'analisi completa
+INTRADAY_LIMIT = 200
+# Timeframe aggiornati alla chiusura di ogni candela ricevuta in push
+PUSH_INTERVALS = ("15m",)
+# Oltre questo silenzio (secondi) il flusso push non è considerato affidabile
+PUSH_STALE_SECONDS = 120.0
+
+DAY_MS = INTERVAL_TO_MS["1d"]
+
+# Analyzer condivisi per rete: mantengono lo storico candele tra i cicli
+_SHARED_ANALYZERS: Dict[bool, "CryptoTechnicalAnalysisHL"] = {}
+
 
 class CryptoTechnicalAnalysisHL:
     """
@@ -26,98 +41,105 @@ class CryptoTechnicalAnalysisHL:
 
     def __init__(self, testnet: bool = True):
         # Se vuoi i prezzi veri usa testnet=False
-        base_url = constants.TESTNET_API_URL if testnet else constants.MAINNET_API_URL
-        self.info = Info(base_url, skip_ws=True)
-        # Cache per i metadati globali (Funding, OI, Mark Price)
-        self._market_state_cache = None
-        self._market_state_timestamp = 0
-        self._available_symbols = None
+        self.testnet = testnet
+        # Client REST condiviso dal registry (pool HTTP + meta in cache)
+        self.info = hl_client.get_info(testnet)
+        # Sorgente candele condivisa col forecaster: un solo flusso 1m per coin
+        # (in memoria e su disco), i timeframe superiori sono aggregati in locale
+        self.candle_store = get_candle_source(testnet)
+        # Stato incrementale degli indicatori (ultime 10 barre per le serie del prompt)
+        self.indicator_engine = IndicatorEngine(history=10)
+        # Stato globale (Funding, OI, Mark Price) dalla cache condivisa con TTL
+        self.market_state = get_market_state_cache(testnet)
+        # Pivot giornalieri: coin -> (inizio giorno UTC in ms, livelli)
+        self._pivot_cache: Dict[str, Tuple[int, Dict[str, float]]] = {}
+        # Modalità push: coin -> subscription id, ultimo messaggio, ultima barra base
+        self._push_subscriptions: Dict[str, Callable[[Dict], None]] = {}
+        self._push_last: Dict[str, float] = {}
+        self._push_bar: Dict[str, int] = {}
 
     def get_available_symbols(self) -> List[str]:
         """Restituisce lista di simboli effettivamente disponibili su Hyperliquid"""
-        if self._available_symbols is not None:
-            return self._available_symbols
-        
         try:
-            meta = self.info.meta()
-            self._available_symbols = [asset["name"] for asset in meta["universe"]]
-            return self._available_symbols
+            return hl_client.get_available_symbols(self.testnet)
         except Exception as e:
             print(f"Errore recupero simboli disponibili: {e}")
             return []
     
     def is_symbol_available(self, coin: str) -> bool:
-        """Verifica se un simbolo è disponibile su Hyperliquid"""
-        available = self.get_available_symbols()
-        return coin in available
+        """Verifica se un simbolo è disponibile su Hyperliquid (lookup O(1) sull'indice universe)"""
+        try:
+            return coin in hl_client.get_universe_index(self.testnet)
+        except Exception as e:
+            print(f"Errore recupero simboli disponibili: {e}")
+            return False
 
     # ==============================
     #       HELPER MARKET STATE
     # ==============================
-    def _get_global_state(self):
-        """Recupera meta_and_asset_ctxs con una mini-cache per efficienza."""
-        now = datetime.now().timestamp()
-        if self._market_state_cache and (now - self._market_state_timestamp < 2):
-            return self._market_state_cache
-        
-        try:
-            self._market_state_cache = self.info.meta_and_asset_ctxs()
-            self._market_state_timestamp = now
-            return self._market_state_cache
-        except Exception as e:
-            print(f"Warning: Impossibile recuperare stato globale: {e}")
-            return None
+    def _get_market_snapshot(self) -> Optional[MarketStateSnapshot]:
+        """Snapshot di meta_and_asset_ctxs con indice coin -> (posizione, ctx).
 
-    def get_market_details(self, coin: str) -> Dict[str, float]:
-        """
-        Estrae dati reali (Funding, OI, Mark Price) per il coin specificato.
+        Lettura senza lock dalla cache condivisa: oltre il TTL restituisce lo
+        snapshot precedente e lo aggiorna in background.
         """
-        if not self.is_symbol_available(coin):
-            return {"funding": 0.0, "oi": 0.0, "mark_px": 0.0}
-        
-        state = self._get_global_state()
-        if not state:
-            return {"funding": 0.0, "oi": 0.0, "mark_px": 0.0}
+        return self.market_state.get()
 
-        universe_dict, contexts_list = state
-        
-        # Cerca indice del coin
-        coin_index = -1
-        try:
-            for idx, asset in enumerate(universe_dict["universe"]):
-                if asset["name"] == coin:
-                    coin_index = idx
-                    break
-        except Exception:
-            return {"funding": 0.0, "oi": 0.0, "mark_px": 0.0}
+    def _get_global_state(self):
+        """Recupera meta_and_asset_ctxs con una mini-cache per efficienza."""
+        snapshot = self._get_market_snapshot()
+        return snapshot.state if snapshot else None
 
-        if coin_index == -1 or coin_index >= len(contexts_list):
+    @staticmethod
+    def _ctx_details(ctx: Optional[dict]) -> Dict[str, float]:
+        if ctx is None:
             return {"funding": 0.0, "oi": 0.0, "mark_px": 0.0}
-
-        ctx = contexts_list[coin_index]
         return {
             "funding": float(ctx.get("funding", 0.0)),
             "oi": float(ctx.get("openInterest", 0.0)),
             "mark_px": float(ctx.get("markPx", 0.0))
         }
 
+    def get_market_details(self, coin: str) -> Dict[str, float]:
+        """
+        Estrae dati reali (Funding, OI, Mark Price) per il coin specificato.
+        """
+        snapshot = self._get_market_snapshot()
+        if not snapshot:
+            return self._ctx_details(None)
+
+        entry = snapshot.index.get(coin)
+        return self._ctx_details(entry[1] if entry else None)
+
+    def get_market_details_many(self, coins: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Come get_market_details ma per più coin, tutti letti dallo stesso snapshot.
+        """
+        snapshot = self._get_market_snapshot()
+        index = snapshot.index if snapshot else {}
+        details = {}
+        for coin in coins:
+            entry = index.get(coin)
+            details[coin] = self._ctx_details(entry[1] if entry else None)
+        return details
+
     # ==============================
     #       FETCH OHLCV (HL)
     # ==============================
 
-    def get_orderbook_volume(self, ticker: str) -> str:
+    def get_orderbook_volume(self, ticker: str) -> OrderbookVolume:
         """
-        Restituisce una stringa con i volumi totali di bid e ask per un ticker.
+        Volumi totali di bid e ask per un ticker (str() -> "Bid Vol: x, Ask Vol: y").
         """
         coin = ticker.split('-')[0].upper()
 
         try:
             orderbook = self.info.l2_snapshot(coin)
         except Exception as e:
-            return f"Errore recuperando orderbook: {e}"
+            return OrderbookVolume(None, None, f"Errore recuperando orderbook: {e}")
 
         if not orderbook or "levels" not in orderbook:
-            return f"Nessun dato disponibile per {coin}"
+            return OrderbookVolume(None, None, f"Nessun dato disponibile per {coin}")
 
         bids = orderbook["levels"][0]
         asks = orderbook["levels"][1]
@@ -125,11 +147,14 @@ class CryptoTechnicalAnalysisHL:
         bid_volume = sum(float(level["sz"]) for level in bids)
         ask_volume = sum(float(level["sz"]) for level in asks)
 
-        return f"Bid Vol: {bid_volume:.2f}, Ask Vol: {ask_volume:.2f}"
+        return OrderbookVolume(bid_volume, ask_volume, None)
 
-    def fetch_ohlcv(self, coin: str, interval: str, limit: int = 500) -> pd.DataFrame:
+    def fetch_candles(self, coin: str, interval: str, limit: int = 500, refresh: bool = True) -> CandleView:
         """
-        Recupera i dati OHLCV da Hyperliquid tramite Info.candles_snapshot.
+        Candele OHLCV come viste colonnari NumPy sul CandleStore (nessuna copia).
+        Le candele già scaricate sono riutilizzate: viene richiesta solo la
+        parte nuova dalla barra ancora aperta in poi (nessuna richiesta con
+        `refresh=False`, se lo store è alimentato in push).
         """
         if not self.is_symbol_available(coin):
             raise ValueError(f"Symbol {coin} not available on Hyperliquid")
@@ -137,62 +162,51 @@ class CryptoTechnicalAnalysisHL:
         if interval not in INTERVAL_TO_MS:
             raise ValueError(f"Interval '{interval}' non supportato in INTERVAL_TO_MS")
 
-        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-        step_ms = INTERVAL_TO_MS[interval]
-        start_ms = now_ms - limit * step_ms
-
-        ohlcv_data = self.info.candles_snapshot(
-            name=coin,
-            interval=interval,
-            startTime=start_ms,
-            endTime=now_ms,
-        )
+        candles = self.candle_store.get_candles(coin, interval, limit, refresh=refresh)
 
-        if not ohlcv_data:
+        if not len(candles):
             raise RuntimeError(f"Nessuna candela ricevuta per {coin} ({interval})")
+        return candles
 
-        df = pd.DataFrame(ohlcv_data)
-
-        df["timestamp"] = pd.to_datetime(df["t"], unit="ms", utc=True)
-
-        df = df[["timestamp", "o", "h", "l", "c", "v"]].copy()
-        df.rename(
-            columns={
-                "o": "open",
-                "h": "high",
-                "l": "low",
-                "c": "close",
-                "v": "volume",
-            },
-            inplace=True,
-        )
-
-        for col in ["open", "high", "low", "close", "volume"]:
-            df[col] = df[col].astype(float)
-
-        df = df.sort_values("timestamp").reset_index(drop=True)
-        return df
+    def fetch_ohlcv(self, coin: str, interval: str, limit: int = 500) -> pd.DataFrame:
+        """
+        Recupera i dati OHLCV da Hyperliquid tramite Info.candles_snapshot.
+        DataFrame (timestamp UTC, open, high, low, close, volume) costruito
+        dalle colonne già numeriche del CandleStore.
+        """
+        return self.fetch_candles(coin, interval, limit).to_pandas()
 
     # ==============================
     #       INDICATORI TECNICI
     # ==============================
+    # Implementazioni di riferimento con `ta` (l'analisi usa IndicatorEngine):
+    # import al primo utilizzo, non al caricamento del modulo
     def calculate_ema(self, data: pd.Series, period: int) -> pd.Series:
+        import ta
         return ta.trend.EMAIndicator(data, window=period).ema_indicator()
 
     def calculate_macd(self, data: pd.Series) -> Tuple[pd.Series, pd.Series, pd.Series]:
+        import ta
         macd = ta.trend.MACD(data)
         return macd.macd(), macd.macd_signal(), macd.macd_diff()
 
     def calculate_rsi(self, data: pd.Series, period: int) -> pd.Series:
+        import ta
         return ta.momentum.RSIIndicator(data, window=period).rsi()
 
     def calculate_atr(
         self, high: pd.Series, low: pd.Series, close: pd.Series, period: int
     ) -> pd.Series:
+        import ta
         return ta.volatility.AverageTrueRange(
             high, low, close, window=period
         ).average_true_range()
 
+    def _sync_indicators(self, coin: str, interval: str, candles: CandleView) -> Dict[str, List[float]]:
+        """Aggiorna il motore streaming con le candele chiuse nuove e ne restituisce le serie."""
+        self.indicator_engine.sync(coin, interval, candles.t, candles.high, candles.low, candles.close)
+        return self.indicator_engine.snapshot(coin, interval)
+
     def calculate_pivot_points(
         self, high: float, low: float, close: float
     ) -> Dict[str, float]:
@@ -203,54 +217,151 @@ class CryptoTechnicalAnalysisHL:
         r2 = pp + (high - low)
         return {"pp": pp, "s1": s1, "s2": s2, "r1": r1, "r2": r2}
 
+    @staticmethod
+    def _utc_day_start_ms() -> int:
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        return now_ms - now_ms % DAY_MS
+
+    def _daily_pivots(self, coin: str, candles: CandleView, interval: str = "15m") -> Optional[Dict[str, float]]:
+        """
+        Pivot sul giorno UTC precedente, calcolati una volta al giorno per coin.
+        High/low/close del giorno vengono ricavati dalle candele intraday già in
+        memoria; None se il giorno precedente non è completo nello storico.
+        """
+        day_start = self._utc_day_start_ms()
+        cached = self._pivot_cache.get(coin)
+        if cached is not None and cached[0] == day_start:
+            return cached[1]
+
+        lo, hi = np.searchsorted(candles.t, [day_start - DAY_MS, day_start])
+        if hi - lo < DAY_MS // INTERVAL_TO_MS[interval]:
+            return None
+        pivots = self.calculate_pivot_points(
+            float(candles.high[lo:hi].max()), float(candles.low[lo:hi].min()), float(candles.close[hi - 1])
+        )
+        self._pivot_cache[coin] = (day_start, pivots)
+        return pivots
+
+    def _pivots_from_daily(
+        self, coin: str, daily: Optional[CandleView], candles: CandleView
+    ) -> Dict[str, float]:
+        """Fallback con la candela daily (storico 15m non ancora sufficiente)."""
+        if daily is None:
+            daily = self.fetch_candles(coin, "1d", limit=2)
+        if len(daily) >= 2:
+            pivot_points = self.calculate_pivot_points(
+                float(daily.high[-2]), float(daily.low[-2]), float(daily.close[-2])
+            )
+            if int(daily.t[-1]) == self._utc_day_start_ms():
+                self._pivot_cache[coin] = (int(daily.t[-1]), pivot_points)
+            return pivot_points
+        return self.calculate_pivot_points(
+            float(candles.high[-1]), float(candles.low[-1]), float(candles.close[-1])
+        )
+
+    # ==============================
+    #       MODALITÀ PUSH (WebSocket)
+    # ==============================
+    def start_push(self, coins: List[str]) -> None:
+        """
+        Sottoscrive il canale `candle` (flusso base 1m) per ogni coin: le candele
+        arrivano in push nello store e gli indicatori di PUSH_INTERVALS vengono
+        aggiornati alla chiusura di ogni barra. Finché il flusso è attivo
+        get_complete_analysis legge le candele dalla memoria senza REST.
+        """
+        ws = get_ws_manager(self.testnet)
+        base_interval = self.candle_store.base_interval
+        for coin in coins:
+            coin = coin.upper()
+            if coin in self._push_subscriptions:
+                continue
+            try:
+                # Seed via REST: i messaggi push si agganciano allo storico in memoria
+                for interval in PUSH_INTERVALS:
+                    self._sync_indicators(coin, interval, self.fetch_candles(coin, interval, INTRADAY_LIMIT))
+                handler = lambda msg, c=coin: self._on_candle(c, msg)
+                ws.subscribe({"type": "candle", "coin": coin, "interval": base_interval}, handler)
+                self._push_subscriptions[coin] = handler
+                print(f"[Push] Subscribed to {base_interval} candles for {coin}")
+            except Exception as e:
+                print(f"[Push] Subscription failed for {coin}: {e}")
+
+    def stop_push(self) -> None:
+        ws = get_ws_manager(self.testnet)
+        base_interval = self.candle_store.base_interval
+        for coin, handler in list(self._push_subscriptions.items()):
+            try:
+                ws.unsubscribe({"type": "candle", "coin": coin, "interval": base_interval}, handler)
+            except Exception as e:
+                print(f"[Push] Unsubscribe failed for {coin}: {e}")
+        self._push_subscriptions.clear()
+        self._push_last.clear()
+        self._push_bar.clear()
+
+    def is_push_live(self, coin: str) -> bool:
+        """True se il coin riceve candele in push e l'ultimo messaggio è recente."""
+        return time.time() - self._push_last.get(coin, 0.0) < PUSH_STALE_SECONDS
+
+    def _on_candle(self, coin: str, msg: Dict) -> None:
+        candle = msg.get("data")
+        if not candle:
+            return
+        try:
+            if not self.candle_store.store.ingest(coin, self.candle_store.base_interval, [candle]):
+                # Buco nel flusso: si torna al REST finché lo storico non è riallineato
+                self._push_last.pop(coin, None)
+                return
+            self._push_last[coin] = time.time()
+            bar_closed = candle["t"] > self._push_bar.get(coin, candle["t"])
+            self._push_bar[coin] = candle["t"]
+            if bar_closed:
+                for interval in PUSH_INTERVALS:
+                    view = self.candle_store.get_candles(coin, interval, INTRADAY_LIMIT, refresh=False)
+                    self._sync_indicators(coin, interval, view)
+        except Exception as e:
+            print(f"[Push] Error processing {coin} candle: {e}")
+
     # ==============================
     #       ANALISI COMPLETA A 15m
     # ==============================
-    def get_complete_analysis(self, ticker: str) -> Dict:
+    def _analysis_fetchers(self, ticker: str) -> Dict[str, Callable[[], Any]]:
+        """Chiamate REST indipendenti necessarie a get_complete_analysis per un ticker."""
+        coin = ticker.upper()
+        # Niente fetch "1d": i pivot derivano dallo stesso flusso 1m delle 15m,
+        # che copre sempre l'intero giorno UTC precedente
+        return {
+            "15m": lambda: self.fetch_candles(
+                coin, "15m", limit=INTRADAY_LIMIT, refresh=not self.is_push_live(coin)
+            ),
+            "volume": lambda: self.get_orderbook_volume(ticker),
+        }
+
+    def get_complete_analysis(self, ticker: str, inputs: Optional[Dict[str, Any]] = None) -> TechnicalAnalysis:
+        """
+        Analisi completa a 15m. `inputs` permette di passare i dati già scaricati
+        (vedi get_complete_analysis_many); altrimenti le chiamate sono sequenziali.
+        """
         coin = ticker.upper()
+        if inputs is None:
+            inputs = {name: fetch() for name, fetch in self._analysis_fetchers(ticker).items()}
 
         # 1) DATI 15 MINUTI (intraday principale)
-        df_15m = self.fetch_ohlcv(coin, "15m", limit=200)
-
-        df_15m["ema_20"] = self.calculate_ema(df_15m["close"], 20)
-        macd_line, signal_line, macd_diff = self.calculate_macd(df_15m["close"])
-        df_15m["macd"] = macd_diff
-        df_15m["rsi_7"] = self.calculate_rsi(df_15m["close"], 7)
-        df_15m["rsi_14"] = self.calculate_rsi(df_15m["close"], 14)
-
-        last_10_15m = df_15m.tail(10)
-
-        # 2) CONTESTO "longer term" sempre a 15m ma su finestra più lunga
-        longer_term = df_15m.tail(50).copy()
-        longer_term["ema_20"] = self.calculate_ema(longer_term["close"], 20)
-        longer_term["ema_50"] = self.calculate_ema(longer_term["close"], 50)
-        longer_term["atr_3"] = self.calculate_atr(
-            longer_term["high"], longer_term["low"], longer_term["close"], 3
-        )
-        longer_term["atr_14"] = self.calculate_atr(
-            longer_term["high"], longer_term["low"], longer_term["close"], 14
-        )
-        macd_15m_long, _, macd_diff_15m_long = self.calculate_macd(
-            longer_term["close"]
-        )
-        longer_term["macd"] = macd_diff_15m_long
-        longer_term["rsi_14"] = self.calculate_rsi(longer_term["close"], 14)
+        candles_15m = inputs["15m"]
 
-        avg_volume = longer_term["volume"].tail(20).mean()
-        last_10_longer = longer_term.tail(10)
+        # Tutti gli indicatori (EMA20/50, MACD, RSI7/14, ATR3/14) in un unico
+        # passaggio del motore incrementale: solo le barre nuove vengono
+        # elaborate, la barra aperta è calcolata in anteprima
+        intraday = self._sync_indicators(coin, "15m", candles_15m)
+
+        # 2) CONTESTO "longer term" sempre a 15m: stesse colonne già calcolate
+        # sull'intero storico (EMA50/ATR inclusi), nessun ricalcolo su una slice
+        volumes = candles_15m.volume
+        avg_volume = float(volumes[-20:].mean())
 
         # 3) PIVOT POINTS daily
-        df_daily = self.fetch_ohlcv(coin, "1d", limit=2)
-        if len(df_daily) >= 2:
-            prev_day = df_daily.iloc[-2]
-            pivot_points = self.calculate_pivot_points(
-                prev_day["high"], prev_day["low"], prev_day["close"]
-            )
-        else:
-            last = df_15m.iloc[-1]
-            pivot_points = self.calculate_pivot_points(
-                last["high"], last["low"], last["close"]
-            )
+        pivot_points = self._daily_pivots(coin, candles_15m)
+        if pivot_points is None:
+            pivot_points = self._pivots_from_daily(coin, inputs.get("1d"), candles_15m)
 
         # --- MODIFICA: Recupero dati reali Market State ---
         mkt_details = self.get_market_details(coin)
@@ -260,137 +371,131 @@ class CryptoTechnicalAnalysisHL:
 
         # Se il mark price è 0 (errore), usa l'ultimo close
         if mark_px == 0:
-            mark_px = df_15m.iloc[-1]["close"]
+            mark_px = float(candles_15m.close[-1])
 
         # Calcolo Fee Stimata (Prezzo Transazione)
         estimated_fee = mark_px * TAKER_FEE_RATE
         # --------------------------------------------------
 
-        current_15m = df_15m.iloc[-1]
-        current_longer = longer_term.iloc[-1]
-
-        result = {
-            "ticker": ticker,
-            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            
-            "current": {
-                "price": current_15m["close"],
-                "ema20": current_15m["ema_20"],
-                "macd": current_15m["macd"],
-                "rsi_7": current_15m["rsi_7"],
-            },
-            "volume": self.get_orderbook_volume(ticker),
-            "pivot_points": pivot_points,
-
-            "derivatives": {
-                "open_interest_latest": oi_latest,
-                # Average OI non è disponibile storicamente via API semplice, metto latest
-                "open_interest_average": oi_latest, 
-                "funding_rate": funding_rate,
-                "estimated_fee_cost": estimated_fee, # NUOVO CAMPO
+        return TechnicalAnalysis(
+            ticker=ticker,
+            timestamp=datetime.now(timezone.utc),
+            price=float(candles_15m.close[-1]),
+            ema20=intraday["ema_20"][-1],
+            macd=intraday["macd"][-1],
+            rsi_7=intraday["rsi_7"][-1],
+            volume=inputs["volume"],
+            pivot_points=pivot_points,
+            open_interest=oi_latest,
+            funding_rate=funding_rate,
+            estimated_fee_cost=estimated_fee,
+            intraday={
+                "mid_prices": intraday["close"],
+                "ema_20": intraday["ema_20"],
+                "macd": intraday["macd"],
+                "rsi_7": intraday["rsi_7"],
+                "rsi_14": intraday["rsi_14"],
             },
-
-            "intraday": {
-                "mid_prices": last_10_15m["close"].tolist(),
-                "ema_20": last_10_15m["ema_20"].tolist(),
-                "macd": last_10_15m["macd"].tolist(),
-                "rsi_7": last_10_15m["rsi_7"].tolist(),
-                "rsi_14": last_10_15m["rsi_14"].tolist(),
-            },
-
-            "longer_term_15m": {
-                "ema_20_current": current_longer["ema_20"],
-                "ema_50_current": current_longer["ema_50"],
-                "atr_3_current": current_longer["atr_3"],
-                "atr_14_current": current_longer["atr_14"],
-                "volume_current": current_longer["volume"],
+            longer_term_15m={
+                "ema_20_current": intraday["ema_20"][-1],
+                "ema_50_current": intraday["ema_50"][-1],
+                "atr_3_current": intraday["atr_3"][-1],
+                "atr_14_current": intraday["atr_14"][-1],
+                "volume_current": float(volumes[-1]),
                 "volume_average": avg_volume,
-                "macd_series": last_10_longer["macd"].tolist(),
-                "rsi_14_series": last_10_longer["rsi_14"].tolist(),
+                "macd_series": intraday["macd"],
+                "rsi_14_series": intraday["rsi_14"],
             },
-        }
-        return result
-
-    def format_output(self, data: Dict) -> str:
-        output = f"\n<{data['ticker']}_data>\n"
-        output += f"Timestamp: {data['timestamp']} (UTC) (Hyperliquid, 15m)\n"
-        output += f"\n"
-
-        curr = data["current"]
-        output += (
-            f"current_price = {curr['price']:.1f}, "
-            f"current_ema20 = {curr['ema20']:.3f}, "
-            f"current_macd = {curr['macd']:.3f}, "
-            f"current_rsi (7 period) = {curr['rsi_7']:.3f}\n\n"
-        )
-        output += f"Volume: {data['volume']}\n\n"
-
-        pivot = data["pivot_points"]
-        output += "Pivot Points (based on previous day):\n"
-        output += (
-            f"R2 = {pivot['r2']:.2f}, R1 = {pivot['r1']:.2f}, "
-            f"PP = {pivot['pp']:.2f}, "
-            f"S1 = {pivot['s1']:.2f}, S2 = {pivot['s2']:.2f}\n\n"
         )
 
-        deriv = data["derivatives"]
-        output += (
-            f"In addition, here is the latest {data['ticker']} funding data on Hyperliquid:\n"
-        )
-        # Qui ho aggiornato per mostrare i dati reali e la FEE
-        output += (
-            f"Open Interest: Latest: {deriv['open_interest_latest']:.2f}\n"
-        )
-        output += f"Funding Rate: {deriv['funding_rate']:.6f}\n"
-        # NUOVA RIGA RICHIESTA: Costo Transazione
-        output += f"Est. Transaction Fee (0.035%): {deriv['estimated_fee_cost']:.4f} USD\n\n"
-
-        intra = data["intraday"]
-        output += "Intraday series (15m, oldest → latest):\n"
-        output += (
-            f"Mid prices: {[round(x, 1) for x in intra['mid_prices']]}\n"
-            f"EMA indicators (20-period): {[round(x, 3) for x in intra['ema_20']]}\n"
-            f"MACD indicators: {[round(x, 3) for x in intra['macd']]}\n"
-            f"RSI indicators (7-Period): {[round(x, 3) for x in intra['rsi_7']]}\n"
-            f"RSI indicators (14-Period): {[round(x, 3) for x in intra['rsi_14']]}\n\n"
-        )
-
-        lt = data["longer_term_15m"]
-        output += "Longer-term context (still 15-minute timeframe, wider window):\n"
-        output += (
-            f"20-Period EMA: {lt['ema_20_current']:.3f} vs. "
-            f"50-Period EMA: {lt['ema_50_current']:.3f}\n"
-            f"3-Period ATR: {lt['atr_3_current']:.3f} vs. "
-            f"14-Period ATR: {lt['atr_14_current']:.3f}\n"
-            f"Current Volume: {lt['volume_current']:.3f} vs. "
-            f"Average Volume: {lt['volume_average']:.3f}\n"
-            f"MACD indicators: {[round(x, 3) for x in lt['macd_series']]}\n"
-            f"RSI indicators (14-Period): {[round(x, 3) for x in lt['rsi_14_series']]}\n"
-        )
-        output += f"<{data['ticker']}_data>\n"
-        return output
+    def get_complete_analysis_many(
+        self,
+        tickers: List[str],
+        max_workers: int = BATCH_MAX_WORKERS,
+        timeout: float = BATCH_TIMEOUT,
+    ) -> List[Tuple[str, Any]]:
+        """
+        Analisi di più ticker con fetch concorrente su un thread pool limitato.
 
+        Tutte le richieste REST (candele 15m/1d e orderbook di ogni ticker, più lo
+        stato globale condiviso) partono insieme; il calcolo degli indicatori
+        avviene poi in sequenza sui dati già scaricati.
+        Restituisce [(ticker, TechnicalAnalysis | Exception)] nello stesso ordine.
+        """
+        if not tickers:
+            return []
 
-def analyze_multiple_tickers(tickers: List[str], testnet: bool = True) -> Tuple[str, List[Dict]]:
-    analyzer = CryptoTechnicalAnalysisHL(testnet=testnet)
-    full_output = ""
+        jobs = {ticker: self._analysis_fetchers(ticker) for ticker in tickers}
+        n_tasks = sum(len(f) for f in jobs.values()) + 1
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, n_tasks)))
+        try:
+            state_future = executor.submit(self._get_global_state)
+            futures = {
+                ticker: {name: executor.submit(fetch) for name, fetch in fetchers.items()}
+                for ticker, fetchers in jobs.items()
+            }
+            all_futures = [state_future] + [f for fs in futures.values() for f in fs.values()]
+            wait(all_futures, timeout=timeout)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results: List[Tuple[str, Any]] = []
+        for ticker, named in futures.items():
+            try:
+                inputs = {}
+                for name, future in named.items():
+                    if not future.done():
+                        raise TimeoutError(f"Timeout {timeout:g}s su '{name}'")
+                    inputs[name] = future.result()
+                results.append((ticker, self.get_complete_analysis(ticker, inputs=inputs)))
+            except Exception as e:
+                results.append((ticker, e))
+        return results
+
+    def format_output(self, data: TechnicalAnalysis) -> str:
+        """Testo per il prompt (generato una sola volta per risultato)."""
+        return data.text()
+
+
+def get_shared_analyzer(testnet: bool = True) -> CryptoTechnicalAnalysisHL:
+    """Restituisce l'analyzer condiviso per la rete, creandolo alla prima chiamata."""
+    if testnet not in _SHARED_ANALYZERS:
+        _SHARED_ANALYZERS[testnet] = CryptoTechnicalAnalysisHL(testnet=testnet)
+    return _SHARED_ANALYZERS[testnet]
+
+
+def analyze_multiple_tickers(
+    tickers: List[str],
+    testnet: bool = True,
+    max_workers: int = BATCH_MAX_WORKERS,
+    timeout: float = BATCH_TIMEOUT,
+) -> Tuple[AnalysisText, List[TechnicalAnalysis]]:
+    """
+    Analizza più ticker in parallelo; restituisce (testo per il prompt, risultati).
+    Il testo viene generato solo alla prima conversione in stringa.
+    """
+    analyzer = get_shared_analyzer(testnet)
     datas = []
-    data = None
+
+    available = []
+    outputs: Dict[str, Union[str, TechnicalAnalysis]] = {}
     for ticker in tickers:
-        try:
-            coin = ticker.split('-')[0].upper()
-            if not analyzer.is_symbol_available(coin):
-                print(f"[SKIP] {ticker} non disponibile su Hyperliquid")
-                full_output += f"\n{ticker}: Symbol not available on Hyperliquid\n"
-                continue
-            
-            data = analyzer.get_complete_analysis(ticker)
-            datas.append(data)
-            full_output += analyzer.format_output(data)
-        except Exception as e:
-            print(f"Errore durante l'analisi di {ticker}: {e}")
-            full_output += f"\nError analyzing {ticker}: {e}\n"
-    return full_output, datas
+        coin = ticker.split('-')[0].upper()
+        if not analyzer.is_symbol_available(coin):
+            print(f"[SKIP] {ticker} non disponibile su Hyperliquid")
+            outputs[ticker] = f"\n{ticker}: Symbol not available on Hyperliquid\n"
+        else:
+            available.append(ticker)
+
+    for ticker, result in analyzer.get_complete_analysis_many(available, max_workers=max_workers, timeout=timeout):
+        if isinstance(result, Exception):
+            print(f"Errore durante l'analisi di {ticker}: {result}")
+            outputs[ticker] = f"\nError analyzing {ticker}: {result}\n"
+            continue
+        outputs[ticker] = result
+        datas.append(result)
+
+    return AnalysisText([outputs[ticker] for ticker in tickers if ticker in outputs]), datas
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,161 @@
+"""
+Cache condivisa dello stato di mercato (`meta_and_asset_ctxs`) con TTL configurabile.
+
+- Letture senza lock: lo snapshot corrente è un oggetto immutabile sostituito
+  atomicamente a ogni refresh.
+- Stale-while-revalidate: oltre il TTL viene restituito subito lo snapshot
+  precedente e il refresh parte in background (una sola richiesta alla volta).
+- Refresher opzionale in background che mantiene lo stato sempre caldo: col
+  refresher attivo il TTL viene portato ad almeno `interval` +
+  REFRESH_TTL_MARGIN, così tra due refresh le letture sono hit e non avviano
+  revalidation proprie (il TTL breve vale solo senza refresher).
+- Contatori hit/stale/miss ed età dello snapshot per calibrare il TTL.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import hl_client
+
+# TTL di default (secondi), sovrascrivibile con MARKET_STATE_TTL
+MARKET_STATE_TTL = float(os.getenv("MARKET_STATE_TTL", "2.0"))
+# Intervallo (secondi) del refresher in background del bot: meta_and_asset_ctxs
+# pesa 20 sul rate limit (1200/min) di Hyperliquid
+MARKET_STATE_REFRESH_INTERVAL = float(os.getenv("MARKET_STATE_REFRESH_INTERVAL", "15.0"))
+# Margine (secondi) sul TTL col refresher attivo, per la durata del download
+REFRESH_TTL_MARGIN = 2.0
+# Oltre questa età lo snapshot non viene più servito e il refresh diventa bloccante
+MAX_STALE_FACTOR = 30
+
+_caches: Dict[bool, "MarketStateCache"] = {}
+_caches_lock = threading.Lock()
+
+
+class MarketStateSnapshot(NamedTuple):
+    fetched_at: float
+    state: Any
+    # coin -> (indice nell'universe, asset ctx)
+    index: Dict[str, Tuple[int, dict]]
+
+
+class MarketStateCache:
+    def __init__(self, info, ttl: float = MARKET_STATE_TTL, max_stale: Optional[float] = None):
+        self.info = info
+        self.ttl = ttl
+        self.max_stale = max_stale if max_stale is not None else ttl * MAX_STALE_FACTOR
+        self._snapshot: Optional[MarketStateSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        # Contatori (indicativi: incrementi non sincronizzati tra thread)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def get(self) -> Optional[MarketStateSnapshot]:
+        """Snapshot corrente; None solo se il primo download fallisce."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            age = time.time() - snapshot.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return snapshot
+            if age < self.max_stale:
+                self.stale_hits += 1
+                self._refresh_async()
+                return snapshot
+
+        self.misses += 1
+        return self.refresh()
+
+    def refresh(self) -> Optional[MarketStateSnapshot]:
+        """Riscarica lo stato in modo sincrono (le richieste concorrenti attendono la stessa)."""
+        started = time.time()
+        with self._refresh_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.fetched_at >= started:
+                return snapshot
+            return self._do_refresh()
+
+    def start(self, interval: Optional[float] = None) -> None:
+        """
+        Avvia il refresher in background (daemon), di default ogni `ttl` secondi.
+        Il TTL diventa almeno `interval` + REFRESH_TTL_MARGIN (vedi docstring del modulo).
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        interval = interval if interval is not None else self.ttl
+        self.ttl = max(self.ttl, interval + REFRESH_TTL_MARGIN)
+        self.max_stale = max(self.max_stale, self.ttl * MAX_STALE_FACTOR)
+        self._stop_event.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, args=(interval,), daemon=True)
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        requests = self.hits + self.stale_hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / requests if requests else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "age_seconds": time.time() - snapshot.fetched_at if snapshot else None,
+            "background": self._refresher is not None and self._refresher.is_alive(),
+        }
+
+    def _refresh_async(self) -> None:
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(target=self._refresh_if_idle, daemon=True).start()
+
+    def _refresh_if_idle(self) -> None:
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._do_refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_loop(self, interval: float) -> None:
+        while not self._stop_event.is_set():
+            self._refresh_if_idle()
+            self._stop_event.wait(interval)
+
+    def _do_refresh(self) -> Optional[MarketStateSnapshot]:
+        try:
+            state = self.info.meta_and_asset_ctxs()
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"Warning: Impossibile recuperare stato globale: {e}")
+            return self._snapshot
+
+        universe_dict, contexts_list = state
+        index = {
+            asset["name"]: (idx, ctx)
+            for idx, (asset, ctx) in enumerate(zip(universe_dict["universe"], contexts_list))
+        }
+        snapshot = MarketStateSnapshot(time.time(), state, index)
+        self._snapshot = snapshot
+        self.refreshes += 1
+        return snapshot
+
+
+def get_market_state_cache(testnet: bool = True) -> MarketStateCache:
+    """Cache dello stato di mercato condivisa per rete."""
+    cache = _caches.get(testnet)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(testnet)
+            if cache is None:
+                cache = MarketStateCache(hl_client.get_info(testnet))
+                _caches[testnet] = cache
+    return cache
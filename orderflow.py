@@ -0,0 +1,734 @@
+"""
+Order-flow analytics on the Hyperliquid L2 book stream.
+
+OrderBookData keeps the rolling order-book metrics (spread, bid/ask volume,
+delta, imbalance, depth, icebergs, volume profile) and the trading signal
+derived from them. It has no UI dependencies: the bot imports it from here,
+the Dash dashboard (dashboard_simple.py) only renders it. The l2Book and
+trades streams come from the shared multiplexed connection (ws_manager.py).
+"""
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+import numpy as np
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import time
+
+from ws_manager import get_ws_manager
+
+# Levels per side parsed from each l2Book snapshot (Hyperliquid sends up to 20)
+BOOK_DEPTH = 20
+# Levels per side used for bid/ask notional volume and depth imbalance
+VOLUME_LEVELS = 10
+# Iceberg detection: observation window, min observations per level, max size
+# variation (std/mean), min mean size, and how close to its peak a depleted
+# level must come back to count as refilled
+ICEBERG_WINDOW_SECONDS = 30.0
+ICEBERG_MIN_OBSERVATIONS = 3
+ICEBERG_MAX_CV = 0.15
+ICEBERG_MIN_SIZE = 1.0
+ICEBERG_REFILL_DROP = 0.2
+# A level is depleted when its size falls to this fraction of its peak; the
+# refill only counts if trades executed at that price cover this fraction of
+# the depleted size (no trade tape = no refills)
+ICEBERG_DEPLETED_RATIO = 0.2
+ICEBERG_MIN_FILL_RATIO = 0.5
+# Refills within the window that flag a level as iceberg on their own
+ICEBERG_MIN_REFILLS = 2
+# Score added to one side of the trading signal when icebergs sit on it
+ICEBERG_SIGNAL_WEIGHT = 0.5
+# Trade tape: rolling window (seconds) for aggressor volumes and footprint,
+# footprint bucket width in bps of price, and silence after which the book
+# based estimates are used again
+TRADE_WINDOW_SECONDS = 60.0
+FOOTPRINT_BUCKET_BPS = 5.0
+TRADE_STALE_SECONDS = 60.0
+# Net delta, as a fraction of the visible top-VOLUME_LEVELS notional, that the
+# trading signal reads as directional pressure. Normalizing makes the book
+# estimate and the 60s trade-tape delta comparable, and coins of any size too
+DELTA_SIGNAL_RATIO = 0.05
+# Per-update metric rows kept per symbol (rolling stats are O(1), so this can cover hours)
+ORDERFLOW_HISTORY = int(os.getenv("ORDERFLOW_HISTORY", "100"))
+
+# Columns of the per-update metric ring, besides the timestamp "t"
+METRIC_FIELDS = (
+    "spread", "bid_volume", "ask_volume", "best_bid", "best_ask",
+    "delta_volume", "buy_volume", "sell_volume", "volume_imbalance",
+    "depth_imbalance", "trade_flow_score", "aggressive_buy_ratio", "cvd", "delta_ratio",
+)
+
+
+def parse_book(bids: List[dict], asks: List[dict], depth: int = BOOK_DEPTH) -> np.ndarray:
+    """
+    Top `depth` levels of both sides parsed in one pass into a float64 array of
+    shape (2, depth, 2): side (0 = bid, 1 = ask) x level x (px, sz). Missing
+    levels on a thin book are left at zero, so they add nothing to sums.
+    """
+    bids, asks = bids[:depth], asks[:depth]
+    if len(bids) == len(asks) == depth:
+        flat = [v for side in (bids, asks) for level in side for v in (level['px'], level['sz'])]
+        return np.array(flat, dtype=np.float64).reshape(2, depth, 2)
+    book = np.zeros((2, depth, 2))
+    for side, levels in enumerate((bids, asks)):
+        if levels:
+            book[side, :len(levels)] = np.array(
+                [(level['px'], level['sz']) for level in levels], dtype=np.float64
+            )
+    return book
+
+
+class MetricRing:
+    """
+    Preallocated columnar ring buffer of per-update metrics (structured array,
+    one row per update, timestamp in "t").
+
+    Rows live in a buffer of 2x capacity and are compacted to the front only
+    when the end is reached, so the last N rows are always one contiguous
+    slice: view()/column() return zero-copy views. A view stays valid for at
+    least one more append after it is taken. Cumulative sums of every column
+    make sum_last/mean_last constant-time whatever the window.
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int):
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.dtype = np.dtype([("t", "datetime64[us]")] + [(field, "f8") for field in self.fields])
+        self._data = np.zeros(2 * capacity, dtype=self.dtype)
+        # Zero-copy views for writes: timestamps and the float columns as a 2-D array
+        self._t = self._data["t"]
+        self._values = self._data.view(np.float64).reshape(len(self._data), -1)[:, 1:]
+        # _csum[i] = sum of rows [0, i) per field; rebased on every compaction
+        self._csum = np.zeros((2 * capacity + 1, len(self.fields)))
+        self._col = {field: i for i, field in enumerate(self.fields)}
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def append(self, t: datetime, **values: float) -> None:
+        if self._end == len(self._data):
+            self._compact()
+        end = self._end
+        self._t[end] = t
+        row = self._values[end]
+        row[:] = [values[field] for field in self.fields]
+        np.add(self._csum[end], row, out=self._csum[end + 1])
+        self._end = end + 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def _compact(self) -> None:
+        n = len(self)
+        self._data[:n] = self._data[self._start:self._end]
+        self._csum[:n + 1] = self._csum[self._start:self._end + 1] - self._csum[self._start]
+        self._start, self._end = 0, n
+
+    def view(self, n: Optional[int] = None) -> np.ndarray:
+        """Last `n` rows (all if None), oldest first, as a zero-copy structured view."""
+        start = self._start if n is None else max(self._start, self._end - n)
+        return self._data[start:self._end]
+
+    def column(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        return self.view(n)[field]
+
+    def last(self, field: str, default: float = 0.0) -> float:
+        return float(self._data[self._end - 1][field]) if self._end > self._start else default
+
+    def sum_last(self, field: str, n: int) -> float:
+        n = min(n, len(self))
+        col = self._col[field]
+        return float(self._csum[self._end, col] - self._csum[self._end - n, col])
+
+    def mean_last(self, field: str, n: int) -> float:
+        n = min(n, len(self))
+        return self.sum_last(field, n) / n if n else 0.0
+
+
+class _LevelStats:
+    """Running stats of one price level inside the iceberg window."""
+
+    __slots__ = ("n", "mean", "m2", "peak", "trough", "depleted", "refills")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Largest size since the last refill, and smallest size while depleted
+        self.peak = 0.0
+        self.trough = 0.0
+        self.depleted = False
+        self.refills = 0
+
+
+class IcebergDetector:
+    """
+    Iceberg detection over a sliding time window on every parsed book level.
+
+    Observations go into one time-ordered queue; each level keeps a running
+    mean/variance (Welford, with the inverse update on eviction) and a refill
+    counter. Every update is amortized O(levels), and a level's entry is
+    deleted when its last observation leaves the window, so memory stays
+    bounded however far the price drifts.
+
+    A level is flagged when, within the window, it either shows a consistent
+    size (at least min_observations, std/mean < max_cv, mean > min_size) or
+    has been refilled at least min_refills times. A refill is a level that was
+    nearly emptied (size <= depleted_ratio * peak), came back within
+    refill_drop of its peak, and had trades executed at its price covering
+    min_fill_ratio of the depleted size. Without executed volume (`executed`
+    not given) no refills are counted: ordinary size jitter and cancels must
+    not look like hidden orders.
+    """
+
+    def __init__(self, window_seconds: float = ICEBERG_WINDOW_SECONDS,
+                 min_observations: int = ICEBERG_MIN_OBSERVATIONS,
+                 max_cv: float = ICEBERG_MAX_CV, min_size: float = ICEBERG_MIN_SIZE,
+                 refill_drop: float = ICEBERG_REFILL_DROP, min_refills: int = ICEBERG_MIN_REFILLS,
+                 depleted_ratio: float = ICEBERG_DEPLETED_RATIO,
+                 min_fill_ratio: float = ICEBERG_MIN_FILL_RATIO):
+        self.window_seconds = window_seconds
+        self.min_observations = min_observations
+        self.max_cv = max_cv
+        self.min_size = min_size
+        self.refill_drop = refill_drop
+        self.min_refills = min_refills
+        self.depleted_ratio = depleted_ratio
+        self.min_fill_ratio = min_fill_ratio
+        # (time, price, size, was_refill), oldest first
+        self._queue: deque = deque()
+        self._levels: Dict[float, _LevelStats] = {}
+
+    def __len__(self) -> int:
+        """Number of price levels currently tracked."""
+        return len(self._levels)
+
+    def _evict(self, cutoff: float) -> None:
+        queue, levels = self._queue, self._levels
+        while queue and queue[0][0] <= cutoff:
+            _, price, size, was_refill = queue.popleft()
+            stats = levels[price]
+            stats.n -= 1
+            if stats.n == 0:
+                del levels[price]
+                continue
+            # Inverse Welford update
+            delta = size - stats.mean
+            stats.mean -= delta / stats.n
+            stats.m2 = max(0.0, stats.m2 - delta * (size - stats.mean))
+            if was_refill:
+                stats.refills -= 1
+
+    def update(self, now: float, levels: np.ndarray,
+               executed: Optional[Callable[[float], float]] = None) -> List[float]:
+        """
+        Record one book snapshot (`levels`: (n, 2) array of px, sz; zero-size
+        rows are skipped) at time `now` (seconds) and return the iceberg prices
+        among the levels just observed, in the order given.
+
+        `executed(price)` returns the size traded at that price in the recent
+        window (see TradeTape.size_at); it is only queried to confirm refills.
+        """
+        self._evict(now - self.window_seconds)
+        tracked = self._levels
+        icebergs = []
+        for price, size in levels.tolist():
+            if size <= 0:
+                continue
+            stats = tracked.get(price)
+            if stats is None:
+                stats = tracked[price] = _LevelStats()
+
+            # Refill: the level was nearly emptied by trades and is back near its peak
+            refill = False
+            if not stats.depleted:
+                if stats.n and size <= stats.peak * self.depleted_ratio:
+                    stats.depleted = True
+                    stats.trough = size
+                else:
+                    stats.peak = max(stats.peak, size)
+            elif size >= stats.peak * (1 - self.refill_drop):
+                filled = executed(price) if executed is not None else 0.0
+                if filled >= self.min_fill_ratio * (stats.peak - stats.trough):
+                    refill = True
+                    stats.refills += 1
+                stats.depleted = False
+                stats.peak = size
+            else:
+                stats.trough = min(stats.trough, size)
+
+            stats.n += 1
+            delta = size - stats.mean
+            stats.mean += delta / stats.n
+            stats.m2 += delta * (size - stats.mean)
+            self._queue.append((now, price, size, refill))
+
+            consistent = (
+                stats.n >= self.min_observations
+                and stats.mean > self.min_size
+                and (stats.m2 / stats.n) ** 0.5 < self.max_cv * stats.mean
+            )
+            if consistent or stats.refills >= self.min_refills:
+                icebergs.append(price)
+        return icebergs
+
+
+class TradeTape:
+    """
+    Streaming aggregation of the Hyperliquid `trades` channel.
+
+    Each WebSocket message (a batch of trades) is parsed once into arrays:
+    aggressor notional, cumulative volume delta and the per-bucket footprint
+    of the batch are computed vectorized. Batches sit in a time-ordered deque;
+    evicting a batch subtracts its totals, so the rolling buy/sell notional
+    and footprint cost amortized O(1) per batch and memory is bounded by the
+    window.
+
+    Side "B" is an aggressive buy (taker lifted the ask), "A" an aggressive sell.
+    """
+
+    def __init__(self, window_seconds: float = TRADE_WINDOW_SECONDS,
+                 bucket_bps: float = FOOTPRINT_BUCKET_BPS):
+        self.window_seconds = window_seconds
+        self.bucket_bps = bucket_bps
+        # Price bucket width, fixed from the first trade price (power of ten)
+        self.bucket_size: Optional[float] = None
+        # Cumulative volume delta (USD) since subscription
+        self.cvd = 0.0
+        self.trade_count = 0
+        # Exchange time (seconds) of the newest trade seen
+        self.last_trade_time: Optional[float] = None
+        # Aggressive notional inside the window
+        self.buy_notional = 0.0
+        self.sell_notional = 0.0
+        # (newest trade time, bucket keys, buy per bucket, sell per bucket), oldest first
+        self._batches: deque = deque()
+        # bucket key -> [buy, sell, batches contributing] inside the window
+        self._footprint: Dict[int, List[float]] = {}
+
+    def ingest(self, trades: List[dict]) -> None:
+        if not trades:
+            return
+        n = len(trades)
+        px = np.array([trade['px'] for trade in trades], dtype=np.float64)
+        sz = np.array([trade['sz'] for trade in trades], dtype=np.float64)
+        is_buy = np.fromiter((trade['side'] == 'B' for trade in trades), dtype=bool, count=n)
+        newest = max(trade['time'] for trade in trades) / 1000
+
+        if self.bucket_size is None:
+            self.bucket_size = float(10 ** np.floor(np.log10(px[0] * self.bucket_bps / 1e4)))
+        notional = px * sz
+        buy = np.where(is_buy, notional, 0.0)
+        sell = notional - buy
+        buy_total, sell_total = float(buy.sum()), float(sell.sum())
+
+        keys, inverse = np.unique(np.round(px / self.bucket_size).astype(np.int64), return_inverse=True)
+        bucket_buy = np.bincount(inverse, weights=buy, minlength=len(keys))
+        bucket_sell = np.bincount(inverse, weights=sell, minlength=len(keys))
+        footprint = self._footprint
+        for key, b, s in zip(keys.tolist(), bucket_buy.tolist(), bucket_sell.tolist()):
+            level = footprint.get(key)
+            if level is None:
+                footprint[key] = [b, s, 1]
+            else:
+                level[0] += b
+                level[1] += s
+                level[2] += 1
+
+        self._batches.append((newest, keys, bucket_buy, bucket_sell))
+        self.buy_notional += buy_total
+        self.sell_notional += sell_total
+        self.cvd += buy_total - sell_total
+        self.trade_count += n
+        if self.last_trade_time is None or newest > self.last_trade_time:
+            self.last_trade_time = newest
+        self._evict(self.last_trade_time - self.window_seconds)
+
+    def _evict(self, cutoff: float) -> None:
+        batches, footprint = self._batches, self._footprint
+        while batches and batches[0][0] <= cutoff:
+            _, keys, bucket_buy, bucket_sell = batches.popleft()
+            for key, b, s in zip(keys.tolist(), bucket_buy.tolist(), bucket_sell.tolist()):
+                level = footprint[key]
+                level[0] -= b
+                level[1] -= s
+                level[2] -= 1
+                self.buy_notional -= b
+                self.sell_notional -= s
+                if not level[2]:
+                    del footprint[key]
+        if not batches:
+            # Empty window: reset the running sums to drop accumulated rounding
+            self.buy_notional = self.sell_notional = 0.0
+            footprint.clear()
+
+    def is_live(self, now: float) -> bool:
+        """
+        True if trades arrived within TRADE_STALE_SECONDS of `now`. Pass exchange
+        time (seconds, e.g. the l2Book `time`): trades carry exchange timestamps,
+        so a local clock offset would shift the window.
+        """
+        return self.last_trade_time is not None and now - self.last_trade_time <= TRADE_STALE_SECONDS
+
+    def window(self, now: float) -> Tuple[float, float]:
+        """(buy, sell) aggressive notional over the window_seconds before `now` (exchange time)."""
+        self._evict(now - self.window_seconds)
+        return max(self.buy_notional, 0.0), max(self.sell_notional, 0.0)
+
+    def aggressor_ratio(self, now: float) -> float:
+        buy, sell = self.window(now)
+        total = buy + sell
+        return buy / total if total > 0 else 0.5
+
+    def size_at(self, price: float) -> float:
+        """Size (base units) traded in the footprint bucket of `price` over the window."""
+        if self.bucket_size is None:
+            return 0.0
+        level = self._footprint.get(int(round(price / self.bucket_size)))
+        return (level[0] + level[1]) / price if level is not None and price > 0 else 0.0
+
+    def footprint(self, now: Optional[float] = None) -> List[Tuple[float, float, float, float]]:
+        """Footprint bars of the window: (bucket price, buy, sell, delta), by price."""
+        if now is not None:
+            self._evict(now - self.window_seconds)
+        return [
+            (key * self.bucket_size, b, s, b - s)
+            for key, (b, s, _) in sorted(self._footprint.items())
+        ]
+
+
+def _metric_column(field: str) -> property:
+    """Read-only zero-copy column of OrderBookData.metrics (legacy per-metric deques)."""
+    return property(lambda self: self.metrics.column(field))
+
+
+class OrderBookData:
+    # Metric history, oldest first: numpy views supporting len(), [-1] and iteration
+    timestamps = _metric_column("t")
+    spreads = _metric_column("spread")
+    bid_volumes = _metric_column("bid_volume")
+    ask_volumes = _metric_column("ask_volume")
+    best_bids = _metric_column("best_bid")
+    best_asks = _metric_column("best_ask")
+    delta_volumes = _metric_column("delta_volume")
+    buy_volumes = _metric_column("buy_volume")
+    sell_volumes = _metric_column("sell_volume")
+    volume_imbalances = _metric_column("volume_imbalance")
+    depth_imbalance = _metric_column("depth_imbalance")
+    trade_flow_score = _metric_column("trade_flow_score")
+    aggressive_buy_ratio = _metric_column("aggressive_buy_ratio")
+
+    def __init__(self, symbol="BTC", testnet=True, ws_manager=None, max_history=ORDERFLOW_HISTORY):
+        self.symbol = symbol
+        self.testnet = testnet
+        # Multiplexed connection (ws_manager.py); the shared one of the network by default
+        self.ws_manager = ws_manager
+        
+        self.max_history = max_history
+        # One row per book update: spread, volumes, footprint, depth and flow metrics
+        self.metrics = MetricRing(METRIC_FIELDS, self.max_history)
+        
+        self.current_bids = []
+        self.current_asks = []
+        # Levels of the last snapshot as float64 (2, BOOK_DEPTH, 2), see parse_book
+        self.book = np.zeros((2, BOOK_DEPTH, 2))
+        self.update_count = 0
+        self.last_update_time = None
+        
+        # Volume Profile - Price level concentration
+        self.volume_profile: Dict[float, float] = defaultdict(float)
+        self.profile_window_start = datetime.now()
+        self.profile_period = timedelta(hours=1)
+        
+        # Iceberg Detection - Order persistence tracking
+        self.iceberg_detector = IcebergDetector()
+        
+        # Trade tape (trades channel): real aggressor volumes, CVD and footprint
+        self.trade_tape = TradeTape()
+        # Whether the last book update read its flow metrics from the tape
+        self.trade_tape_live = False
+        self.iceberg_levels: List[float] = []
+        
+        # Previous state for delta calculation
+        self.prev_best_bid = None
+        self.prev_best_ask = None
+        self.prev_timestamp = None
+        
+        # WebSocket stream tracking (reconnects are handled by the manager)
+        self.ws_connected = False
+        self.ws_last_update = datetime.now()
+        
+    def handle_update(self, update):
+        if update["channel"] == "l2Book" and update['data']['coin'] == self.symbol:
+            self.ws_connected = True
+            self.ws_last_update = datetime.now()
+            self.update_count += 1
+            
+            asks = update["data"]["levels"][0]
+            bids = update["data"]["levels"][1]
+            
+            if not bids or not asks:
+                return
+            
+            self.current_bids = bids[:15]
+            self.current_asks = asks[:15]
+            
+            # Each level is parsed once; notional volume and depth of both sides
+            # come from the same array
+            book = parse_book(bids, asks)
+            self.book = book
+            best_bid = float(book[0, 0, 0])
+            best_ask = float(book[1, 0, 0])
+            spread = best_ask - best_bid
+            
+            top = book[:, :VOLUME_LEVELS]
+            bid_vol, ask_vol = (top[:, :, 0] * top[:, :, 1]).sum(axis=1).tolist()
+            
+            current_time = datetime.now()
+            self.last_update_time = current_time
+            # Exchange clock (seconds) for the trade tape, whose trades carry exchange timestamps
+            exchange_now = update["data"].get("time", time.time() * 1000) / 1000
+            
+            # Calculate advanced metrics (from the trade tape when it is live)
+            tape_live = self.trade_tape_live = self.trade_tape.is_live(exchange_now)
+            if tape_live:
+                footprint = self._tape_footprint_metrics(exchange_now)
+            else:
+                footprint = self._calculate_footprint_metrics(best_bid, best_ask, bid_vol, ask_vol, current_time)
+            total_notional = bid_vol + ask_vol
+            delta_ratio = footprint["delta_volume"] / total_notional if total_notional > 0 else 0.0
+            self._update_volume_profile(best_bid, best_ask, bid_vol, ask_vol)
+            self._detect_icebergs(book, current_time, tape_live)
+            depth = self._calculate_market_depth_metrics(book, delta_ratio)
+            if tape_live:
+                depth["aggressive_buy_ratio"] = self.trade_tape.aggressor_ratio(exchange_now)
+            
+            # One row per update in the metric ring
+            self.metrics.append(
+                current_time, spread=spread, bid_volume=bid_vol, ask_volume=ask_vol,
+                best_bid=best_bid, best_ask=best_ask, cvd=self.trade_tape.cvd, delta_ratio=delta_ratio,
+                **footprint, **depth,
+            )
+            
+            self.prev_best_bid = best_bid
+            self.prev_best_ask = best_ask
+            self.prev_timestamp = current_time
+    
+    def handle_trades(self, update):
+        """Feed a `trades` channel message into the trade tape"""
+        if update["channel"] == "trades":
+            trades = [trade for trade in update["data"] if trade.get("coin") == self.symbol]
+            self.trade_tape.ingest(trades)
+    
+    def _tape_footprint_metrics(self, exchange_now: float) -> Dict[str, float]:
+        """Buy/Sell volume and delta from real aggressor trades over the tape window"""
+        buy_vol, sell_vol = self.trade_tape.window(exchange_now)
+        total_vol = buy_vol + sell_vol
+        delta = buy_vol - sell_vol
+        return {
+            "delta_volume": delta,
+            "buy_volume": buy_vol,
+            "sell_volume": sell_vol,
+            "volume_imbalance": delta / total_vol if total_vol > 0 else 0.0,
+        }
+    
+    def _calculate_footprint_metrics(self, best_bid: float, best_ask: float, 
+                                     bid_vol: float, ask_vol: float, current_time: datetime) -> Dict[str, float]:
+        """Estimate Delta Volume and Buy/Sell imbalance from the book (fallback without trade tape)"""
+        if self.prev_best_bid is None or self.prev_best_ask is None:
+            return {"delta_volume": 0.0, "buy_volume": 0.0, "sell_volume": 0.0, "volume_imbalance": 0.0}
+        
+        # Detect price movement direction
+        price_change = (best_bid - self.prev_best_bid + best_ask - self.prev_best_ask) / 2
+        
+        # Estimate Buy/Sell volume based on price direction and volume changes
+        if price_change > 0:
+            buy_vol_est = bid_vol * 0.6 + ask_vol * 0.4
+            sell_vol_est = bid_vol * 0.4 + ask_vol * 0.6
+        elif price_change < 0:
+            buy_vol_est = bid_vol * 0.4 + ask_vol * 0.6
+            sell_vol_est = bid_vol * 0.6 + ask_vol * 0.4
+        else:
+            buy_vol_est = bid_vol * 0.5 + ask_vol * 0.5
+            sell_vol_est = bid_vol * 0.5 + ask_vol * 0.5
+        
+        delta = buy_vol_est - sell_vol_est
+        total_vol = buy_vol_est + sell_vol_est
+        imbalance = delta / total_vol if total_vol > 0 else 0
+        
+        return {
+            "delta_volume": delta,
+            "buy_volume": buy_vol_est,
+            "sell_volume": sell_vol_est,
+            "volume_imbalance": imbalance,
+        }
+    
+    def _update_volume_profile(self, best_bid: float, best_ask: float, 
+                               bid_vol: float, ask_vol: float):
+        """Build volume profile - concentration at price levels"""
+        current_time = datetime.now()
+        
+        # Reset profile after period
+        if current_time - self.profile_window_start > self.profile_period:
+            self.volume_profile.clear()
+            self.profile_window_start = current_time
+        
+        # Round prices to reasonable precision
+        bid_price_key = round(best_bid, 0)
+        ask_price_key = round(best_ask, 0)
+        
+        # Accumulate volume at price levels
+        self.volume_profile[bid_price_key] += bid_vol
+        self.volume_profile[ask_price_key] += ask_vol
+    
+    def _detect_icebergs(self, book: np.ndarray, current_time: datetime, tape_live: bool):
+        """Detect hidden orders through persistence and trade-confirmed refills on all parsed levels"""
+        executed = self.trade_tape.size_at if tape_live else None
+        self.iceberg_levels = self.iceberg_detector.update(current_time.timestamp(), book.reshape(-1, 2), executed)
+    
+    def _calculate_market_depth_metrics(self, book: np.ndarray, delta_ratio: float) -> Dict[str, float]:
+        """Calculate market depth imbalance and aggressive flow metrics"""
+        best_bid = float(book[0, 0, 0])
+        best_ask = float(book[1, 0, 0])
+        if best_bid <= 0 or best_ask <= 0:
+            return {"depth_imbalance": 0.0, "trade_flow_score": 0.0, "aggressive_buy_ratio": 0.5}
+        
+        # Total depth in top 10 levels
+        total_bid_depth, total_ask_depth = book[:, :VOLUME_LEVELS, 1].sum(axis=1).tolist()
+        total_depth = total_bid_depth + total_ask_depth
+        
+        # Depth imbalance (-1 to 1)
+        depth_imb = (total_bid_depth - total_ask_depth) / total_depth if total_depth > 0 else 0
+        
+        # Estimate aggressive buying pressure
+        # Higher bid depth + tighter spread = aggressive buying
+        spread_pct = (best_ask - best_bid) / best_bid if best_bid > 0 else 0
+        
+        # Aggressive buy ratio (0 to 1)
+        if spread_pct < 0.0001:  # Tight spread
+            agg_buy = 0.5 + depth_imb * 0.5
+        else:
+            agg_buy = 0.5 + depth_imb * 0.3
+        
+        # Trade flow score: combines depth imbalance with recent delta (last 4 rows + this
+        # update), as a fraction of the visible notional and bounded like the imbalance
+        recent_delta = (self.metrics.sum_last("delta_ratio", 4) + delta_ratio) / 5 if len(self.metrics) >= 4 else 0
+        flow_score = depth_imb * 0.6 + max(-1.0, min(1.0, recent_delta)) * 0.4
+        
+        return {
+            "depth_imbalance": depth_imb,
+            "trade_flow_score": flow_score,
+            "aggressive_buy_ratio": max(0, min(1, agg_buy)),
+        }
+    
+    def get_volume_profile_levels(self) -> List[Tuple[float, float]]:
+        """Get top volume concentration levels (price, volume)"""
+        if not self.volume_profile:
+            return []
+        
+        sorted_levels = sorted(self.volume_profile.items(), key=lambda x: x[1], reverse=True)
+        return sorted_levels[:5]
+    
+    def get_trading_signal(self) -> Tuple[str, float, str]:
+        """Generate trading signal from advanced metrics"""
+        metrics = self.metrics
+        if len(metrics) < 10:
+            return "NEUTRAL", 0.0, "Insufficient data"
+        
+        # Recent metrics (O(1) rolling means)
+        recent_delta = metrics.mean_last("delta_ratio", 5)
+        recent_imbalance = metrics.mean_last("volume_imbalance", 5)
+        recent_depth_imb = metrics.mean_last("depth_imbalance", 5)
+        recent_agg_buy = metrics.mean_last("aggressive_buy_ratio", 5)
+        
+        # Signal strength
+        signal_strength = abs(recent_imbalance) * 0.3 + abs(recent_depth_imb) * 0.4 + abs(recent_agg_buy - 0.5) * 0.3
+        
+        # Determine signal
+        bullish_score = 0
+        bearish_score = 0
+        reasons = []
+        
+        if recent_delta > DELTA_SIGNAL_RATIO:
+            bullish_score += 1
+            reasons.append("Positive delta")
+        elif recent_delta < -DELTA_SIGNAL_RATIO:
+            bearish_score += 1
+            reasons.append("Negative delta")
+        
+        if recent_imbalance > 0.15:
+            bullish_score += 1
+            reasons.append("Buy imbalance")
+        elif recent_imbalance < -0.15:
+            bearish_score += 1
+            reasons.append("Sell imbalance")
+        
+        if recent_depth_imb > 0.2:
+            bullish_score += 1
+            reasons.append("Bid depth dominance")
+        elif recent_depth_imb < -0.2:
+            bearish_score += 1
+            reasons.append("Ask depth dominance")
+        
+        if recent_agg_buy > 0.65:
+            bullish_score += 1
+            reasons.append("Aggressive buying")
+        elif recent_agg_buy < 0.35:
+            bearish_score += 1
+            reasons.append("Aggressive selling")
+        
+        # Iceberg detection adds context: one bounded term per side, nearest level only
+        if len(self.iceberg_levels) > 0:
+            best_bid = metrics.last("best_bid")
+            best_ask = metrics.last("best_ask")
+            resistances = [p for p in self.iceberg_levels if p > best_ask]
+            supports = [p for p in self.iceberg_levels if p < best_bid]
+            if resistances:
+                reasons.append(f"Iceberg resistance at {min(resistances):.0f}")
+                bearish_score += ICEBERG_SIGNAL_WEIGHT
+            if supports:
+                reasons.append(f"Iceberg support at {max(supports):.0f}")
+                bullish_score += ICEBERG_SIGNAL_WEIGHT
+        
+        # Volume profile key levels
+        pvp_levels = self.get_volume_profile_levels()
+        if pvp_levels and len(metrics):
+            current_price = (metrics.last("best_bid") + metrics.last("best_ask")) / 2
+            pvp_price = pvp_levels[0][0]
+            
+            if current_price < pvp_price * 0.995:
+                reasons.append(f"Below PVP {pvp_price:.0f}")
+                bullish_score += 0.5
+            elif current_price > pvp_price * 1.005:
+                reasons.append(f"Above PVP {pvp_price:.0f}")
+                bearish_score += 0.5
+        
+        # Final signal
+        if bullish_score >= bearish_score + 2:
+            return "LONG", signal_strength, " | ".join(reasons)
+        elif bearish_score >= bullish_score + 2:
+            return "SHORT", signal_strength, " | ".join(reasons)
+        else:
+            return "NEUTRAL", signal_strength, " | ".join(reasons) if reasons else "No clear signal"
+    
+    def _subscriptions(self):
+        return (
+            ({"type": "l2Book", "coin": self.symbol}, self.handle_update),
+            ({"type": "trades", "coin": self.symbol}, self.handle_trades),
+        )
+    
+    def start_websocket(self):
+        """Subscribe l2Book and trades on the multiplexed connection (non-blocking)"""
+        if self.ws_manager is None:
+            self.ws_manager = get_ws_manager(self.testnet)
+        for subscription, handler in self._subscriptions():
+            self.ws_manager.subscribe(subscription, handler)
+        print(f"[OrderBookData] WebSocket subscribed for {self.symbol}")
+    
+    def stop_websocket(self):
+        """Remove this symbol's handlers from the connection"""
+        if self.ws_manager is None:
+            return
+        for subscription, handler in self._subscriptions():
+            self.ws_manager.unsubscribe(subscription, handler)
+        self.ws_connected = False
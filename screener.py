@@ -0,0 +1,195 @@
+"""
+Screener cross-sectional sull'intero universo perp di Hyperliquid.
+
+Per ogni asset di `meta()["universe"]` calcola ATR%, volume 24h, spread,
+funding e open interest e li combina in un punteggio di ranking. Tutte le
+metriche sono calcolate su matrici NumPy (simboli x tempo) in un unico
+passaggio, senza loop Python per simbolo:
+
+- funding, OI, volume e spread (impactPxs) arrivano dallo snapshot condiviso
+  di `meta_and_asset_ctxs` (nessuna richiesta in più);
+- l'ATR% usa le candele 1h native dello store (incrementali e in cache su
+  disco), scaricate in parallelo solo per i `max_candidates` asset più liquidi:
+  ogni candleSnapshot pesa 20 sul rate limit di 1200/min.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators import BATCH_MAX_WORKERS, CryptoTechnicalAnalysisHL, get_shared_analyzer
+
+# Timeframe e barre per l'ATR
+SCREEN_INTERVAL = "1h"
+SCREEN_ATR_WINDOW = 14
+SCREEN_LOOKBACK = 24
+# Asset con volume 24h inferiore (USD) esclusi dal ranking
+MIN_DAY_VOLUME_USD = 1_000_000.0
+# Candidati (per volume) per cui scaricare le candele
+MAX_CANDIDATES = 40
+# ATR% orario ideale per lo scalping (~3% giornaliero)
+TARGET_ATR_PCT = 0.6
+
+# Pesi del punteggio (somma dei ranking percentili)
+SCREEN_WEIGHTS: Dict[str, float] = {
+    "volume": 0.3,
+    "spread": 0.25,
+    "volatility": 0.25,
+    "open_interest": 0.1,
+    "funding": 0.1,
+}
+
+SCREEN_COLUMNS = ["coin", "atr_pct", "volume_usd", "spread_bps", "funding", "oi_usd", "score"]
+
+
+def _percentile_rank(values: np.ndarray) -> np.ndarray:
+    """Ranking percentile in [0, 1] (più alto = migliore); NaN in fondo con 0."""
+    ranks = np.zeros(len(values))
+    valid = ~np.isnan(values)
+    n = int(valid.sum())
+    if n == 0:
+        return ranks
+    order = np.argsort(np.argsort(values[valid], kind="stable"), kind="stable")
+    ranks[valid] = order / (n - 1) if n > 1 else 1.0
+    return ranks
+
+
+def atr_pct_matrix(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int) -> np.ndarray:
+    """
+    ATR% dell'ultima barra per ogni riga di matrici (simboli x tempo).
+
+    ATR come media dei true range delle ultime `window` barre; le barre mancanti
+    (NaN, asset con meno storico) sono ignorate.
+    """
+    prev_close = np.empty_like(close)
+    prev_close[:, 0] = np.nan
+    prev_close[:, 1:] = close[:, :-1]
+    with np.errstate(invalid="ignore"):
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    recent = true_range[:, -window:]
+    counts = np.sum(~np.isnan(recent), axis=1)
+    atr = np.where(counts > 0, np.nansum(recent, axis=1) / np.maximum(counts, 1), np.nan)
+    last_close = close[:, -1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(last_close > 0, atr / last_close * 100, np.nan)
+
+
+class UniverseScreener:
+    def __init__(self, analyzer: CryptoTechnicalAnalysisHL, interval: str = SCREEN_INTERVAL,
+                 lookback: int = SCREEN_LOOKBACK, atr_window: int = SCREEN_ATR_WINDOW):
+        self.analyzer = analyzer
+        self.interval = interval
+        self.lookback = lookback
+        self.atr_window = atr_window
+
+    def _context_matrix(self, coins: Optional[List[str]]) -> pd.DataFrame:
+        """Metriche da meta_and_asset_ctxs per tutto l'universo (o per `coins`)."""
+        snapshot = self.analyzer.market_state.get()
+        if snapshot is None:
+            raise RuntimeError("Stato di mercato non disponibile")
+        universe, contexts = snapshot.state
+        assets = universe["universe"]
+
+        names = np.array([asset["name"] for asset in assets])
+        listed = np.array([not asset.get("isDelisted", False) for asset in assets])
+        fields = np.array(
+            [[ctx.get("dayNtlVlm") or "nan", ctx.get("funding") or "nan",
+              ctx.get("openInterest") or "nan", ctx.get("markPx") or "nan",
+              *(ctx.get("impactPxs") or ("nan", "nan"))] for ctx in contexts],
+            dtype=np.float64,
+        ).reshape(len(contexts), 6)
+        volume, funding, oi, mark, impact_bid, impact_ask = fields.T
+
+        mask = listed
+        if coins is not None:
+            mask = mask & np.isin(names, coins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            spread_bps = (impact_ask - impact_bid) / ((impact_ask + impact_bid) / 2) * 1e4
+        return pd.DataFrame({
+            "coin": names[mask],
+            "volume_usd": volume[mask],
+            "spread_bps": spread_bps[mask],
+            "funding": funding[mask],
+            "oi_usd": (oi * mark)[mask],
+        })
+
+    def _ohlc_matrices(self, coins: List[str], max_workers: int):
+        """Candele `interval` dei coin in matrici (simboli x tempo) allineate a destra."""
+        store = self.analyzer.candle_store.store
+        limit = self.lookback + self.atr_window
+        shape = (len(coins), limit)
+        high, low, close = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        if not coins:
+            return high, low, close
+
+        def fetch(coin):
+            try:
+                return store.get_candles(coin, self.interval, limit)
+            except Exception as e:
+                print(f"[Screener] Candele non disponibili per {coin}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(coins)))) as executor:
+            views = list(executor.map(fetch, coins))
+        for row, view in enumerate(views):
+            if view is None or not len(view):
+                continue
+            n = min(len(view), limit)
+            high[row, -n:] = view.high[-n:]
+            low[row, -n:] = view.low[-n:]
+            close[row, -n:] = view.close[-n:]
+        return high, low, close
+
+    def screen(
+        self,
+        coins: Optional[List[str]] = None,
+        min_volume_usd: float = MIN_DAY_VOLUME_USD,
+        max_candidates: int = MAX_CANDIDATES,
+        max_workers: int = BATCH_MAX_WORKERS,
+    ) -> pd.DataFrame:
+        """
+        Ranking dell'universo (o dei `coins` indicati) per idoneità allo scalping.
+        Restituisce un DataFrame ordinato per `score` decrescente (SCREEN_COLUMNS).
+        """
+        df = self._context_matrix(coins)
+        df = df[df["volume_usd"] >= min_volume_usd]
+        df = df.sort_values("volume_usd", ascending=False).head(max_candidates).reset_index(drop=True)
+
+        high, low, close = self._ohlc_matrices(df["coin"].tolist(), max_workers)
+        atr_pct = atr_pct_matrix(high, low, close, self.atr_window)
+        df["atr_pct"] = atr_pct
+
+        score = (
+            SCREEN_WEIGHTS["volume"] * _percentile_rank(df["volume_usd"].to_numpy())
+            + SCREEN_WEIGHTS["spread"] * _percentile_rank(-df["spread_bps"].to_numpy())
+            + SCREEN_WEIGHTS["volatility"] * _percentile_rank(-np.abs(atr_pct - TARGET_ATR_PCT))
+            + SCREEN_WEIGHTS["open_interest"] * _percentile_rank(df["oi_usd"].to_numpy())
+            + SCREEN_WEIGHTS["funding"] * _percentile_rank(-np.abs(df["funding"].to_numpy()))
+        )
+        df["score"] = score
+        return df.sort_values("score", ascending=False).reset_index(drop=True)[SCREEN_COLUMNS]
+
+
+def screen_universe(
+    coins: Optional[List[str]] = None,
+    testnet: bool = True,
+    top_n: Optional[int] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """Screener sull'analyzer condiviso della rete; `top_n` limita le righe restituite."""
+    result = UniverseScreener(get_shared_analyzer(testnet)).screen(coins, **kwargs)
+    return result.head(top_n) if top_n else result
+
+
+def format_screen(df: pd.DataFrame) -> str:
+    """Tabella compatta per il prompt della watchlist."""
+    if df.empty:
+        return "Nessun asset supera i filtri dello screener"
+    lines = ["coin | ATR% 1h | volume 24h (USD) | spread bps | funding | OI (USD) | score"]
+    for row in df.itertuples(index=False):
+        lines.append(
+            f"{row.coin} | {row.atr_pct:.2f} | {row.volume_usd:,.0f} | {row.spread_bps:.1f} | "
+            f"{row.funding:.6f} | {row.oi_usd:,.0f} | {row.score:.3f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,62 @@
+import math
+from datetime import datetime, timezone
+
+import pytest
+
+import candle_resampler
+import candle_store
+from candle_store import INTERVAL_TO_MS
+
+MINUTE = INTERVAL_TO_MS["1m"]
+NOW = 1_700_000_000_000 // 86_400_000 * 86_400_000 + 37 * MINUTE
+
+
+class FakeClock:
+    """Stand-in for `datetime` in the candle modules, driven by `now_ms`."""
+
+    def __init__(self, now_ms):
+        self.now_ms = now_ms
+
+    def now(self, tz=None):
+        return datetime.fromtimestamp(self.now_ms / 1000, tz=timezone.utc)
+
+
+class FakeInfo:
+    """
+    candles_snapshot over a deterministic 1m series that starts at `listed_ms`;
+    other intervals are aggregated from it, so native and resampled bars agree.
+    """
+
+    def __init__(self, clock, listed_ms=0):
+        self.clock = clock
+        self.listed_ms = listed_ms
+        self.calls = []
+        # t -> price offset, to change a bar between two fetches
+        self.revision = {}
+
+    def minute(self, t):
+        close = 100 + 5 * math.sin(t / MINUTE / 30) + self.revision.get(t, 0)
+        return (close - 0.5, close + 1 + (t // MINUTE) % 3, close - 1, close, 1 + (t // MINUTE) % 7)
+
+    def bar(self, interval, t):
+        start = max(t, self.listed_ms)
+        end = min(t + INTERVAL_TO_MS[interval], self.clock.now_ms // MINUTE * MINUTE + MINUTE)
+        rows = [self.minute(m) for m in range(start, end, MINUTE)]
+        o, h, l, c, v = rows[0][0], max(r[1] for r in rows), min(r[2] for r in rows), rows[-1][3], sum(r[4] for r in rows)
+        return {"t": t, "T": t + INTERVAL_TO_MS[interval] - 1, "s": "X", "i": interval,
+                "o": str(o), "h": str(h), "l": str(l), "c": str(c), "v": str(v), "n": 1}
+
+    def candles_snapshot(self, name, interval, startTime, endTime):
+        self.calls.append((interval, startTime, endTime))
+        step = INTERVAL_TO_MS[interval]
+        first = max(-(-startTime // step) * step, self.listed_ms // step * step)
+        last = min(endTime, self.clock.now_ms) // step * step
+        return [self.bar(interval, t) for t in range(first, last + 1, step)][-5000:]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(NOW)
+    monkeypatch.setattr(candle_store, "datetime", clock)
+    monkeypatch.setattr(candle_resampler, "datetime", clock)
+    return clock
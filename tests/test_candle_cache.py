@@ -0,0 +1,56 @@
+import numpy as np
+
+from candle_cache import CANDLE_DTYPE, CandleDiskCache
+
+STEP = 60_000
+
+
+def _bars(start, stop):
+    t = np.arange(start, stop, dtype=np.int64) * STEP
+    values = np.vstack([t / STEP + i for i in range(5)]).astype(np.float64)
+    return t, values
+
+
+def test_two_writers_do_not_duplicate_records(tmp_path):
+    first = CandleDiskCache(str(tmp_path))
+    second = CandleDiskCache(str(tmp_path))
+    # Both writers see the same file before either appends
+    assert first.last_t("BTC", "1m") is None and second.last_t("BTC", "1m") is None
+    first.append("BTC", "1m", STEP, *_bars(0, 8))
+    second.append("BTC", "1m", STEP, *_bars(5, 9))
+
+    t, values = first.load("BTC", "1m", 100)
+    assert t.tolist() == (np.arange(9) * STEP).tolist()
+    assert values[3].tolist() == (np.arange(9) + 3.0).tolist()
+
+
+def test_unsorted_file_is_rebuilt_on_load(tmp_path):
+    cache = CandleDiskCache(str(tmp_path))
+    t, values = _bars(0, 8)
+    t = np.r_[t, t[5:], 8 * STEP]
+    values = np.hstack([values, values[:, 5:], _bars(8, 9)[1]])
+    records = np.empty(len(t), dtype=CANDLE_DTYPE)
+    records["t"] = t
+    for i, col in enumerate(CANDLE_DTYPE.names[1:]):
+        records[col] = values[i]
+    with open(cache.path("BTC", "1m"), "wb") as f:
+        f.write(records.tobytes())
+
+    loaded, _ = cache.load("BTC", "1m", 100)
+    assert loaded.tolist() == (np.arange(9) * STEP).tolist()
+    # The file itself was repaired
+    assert np.fromfile(cache.path("BTC", "1m"), dtype=CANDLE_DTYPE)["t"].tolist() == loaded.tolist()
+    assert cache.last_t("BTC", "1m") == 8 * STEP
+
+
+def test_misaligned_history_keeps_latest_contiguous_tail(tmp_path):
+    cache = CandleDiskCache(str(tmp_path))
+    cache.append("BTC", "1m", STEP, *_bars(0, 4))
+    t, values = _bars(4, 8)
+    records = np.empty(len(t), dtype=CANDLE_DTYPE)
+    records["t"] = t + 1_000
+    with open(cache.path("BTC", "1m"), "ab") as f:
+        f.write(records.tobytes())
+
+    loaded, _ = cache.load("BTC", "1m", 100)
+    assert loaded.tolist() == (t + 1_000).tolist()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from candle_resampler import ResamplingCandleStore, resample
+from candle_store import COLUMNS, CandleStore, INTERVAL_TO_MS
+from conftest import MINUTE, NOW, FakeInfo
+
+HOUR = INTERVAL_TO_MS["1h"]
+AGG = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+
+def _reference(t, values, step_ms):
+    """pandas resample of 1m bars on epoch-aligned buckets (empty buckets dropped)."""
+    df = pd.DataFrame(dict(zip(COLUMNS, values)), index=pd.to_datetime(t, unit="ms"))
+    out = df.resample(pd.Timedelta(milliseconds=step_ms), origin="epoch").agg(AGG).dropna()
+    return out.index.as_unit("ms").asi8, out[list(COLUMNS)].to_numpy().T
+
+
+def _minutes(info, start_ms, end_ms):
+    rows = [info.bar("1m", t) for t in range(start_ms, end_ms + 1, MINUTE)]
+    t = np.array([row["t"] for row in rows], dtype=np.int64)
+    return t, np.array([[float(row[f]) for row in rows] for f in "ohlcv"])
+
+
+@pytest.mark.parametrize("interval", ["5m", "15m", "1h", "4h"])
+def test_resample_matches_pandas(interval):
+    rng = np.random.default_rng(7)
+    # Random 1m bars with missing minutes, starting mid-bucket
+    t = np.sort(rng.choice(np.arange(13, 3000), size=2200, replace=False)).astype(np.int64) * MINUTE
+    close = 100 + np.cumsum(rng.normal(0, 0.3, len(t)))
+    values = np.vstack([close + rng.normal(0, 0.1, len(t)), close + 1, close - 1, close, rng.random(len(t))])
+
+    step_ms = INTERVAL_TO_MS[interval]
+    t_out, values_out = resample(t, values, step_ms)
+    t_ref, values_ref = _reference(t, values, step_ms)
+    assert t_out.tolist() == t_ref.tolist()
+    np.testing.assert_allclose(values_out, values_ref, rtol=1e-12)
+
+    # The partial first bucket is dropped, the rest is unchanged
+    t_head, values_head = resample(t, values, step_ms, drop_partial_head=True)
+    assert t_head.tolist() == t_ref[1:].tolist()
+    np.testing.assert_allclose(values_head, values_ref[:, 1:], rtol=1e-12)
+
+
+def test_resampling_store_matches_pandas_while_the_last_bucket_is_open(clock):
+    info = FakeInfo(clock)
+    source = ResamplingCandleStore(CandleStore(info, max_candles=500))
+    step_ms = INTERVAL_TO_MS["15m"]
+
+    for _ in range(4):
+        view = source.get_candles("BTC", "15m", 100)
+        t_ref, values_ref = _reference(*_minutes(info, clock.now_ms - 200 * step_ms, clock.now_ms), step_ms)
+        assert view.t.tolist() == t_ref[-100:].tolist()
+        np.testing.assert_allclose(view.values(), values_ref[:, -100:], rtol=1e-12)
+        clock.now_ms += 7 * MINUTE
+    # Only the 1m stream is downloaded
+    assert {call[0] for call in info.calls} == {"1m"}
+
+
+def test_native_seed_extends_past_the_base_stream(clock):
+    info = FakeInfo(clock)
+    source = ResamplingCandleStore(CandleStore(info, max_candles=500))
+
+    for _ in range(3):
+        view = source.get_candles("BTC", "1h", 500)
+        t_ref, values_ref = _reference(*_minutes(info, clock.now_ms - 501 * HOUR, clock.now_ms), HOUR)
+        assert view.t.tolist() == t_ref[-500:].tolist()
+        np.testing.assert_allclose(view.values(), values_ref[:, -500:], rtol=1e-12)
+        clock.now_ms += 25 * MINUTE
+    # 500 hours exceed the 5000-bar 1m stream: seeded once from native 1h candles
+    assert sum(call[0] == "1h" for call in info.calls) == 1
+
+
+def test_short_history_is_seeded_from_native_candles_once(clock):
+    # Listed 30 hours ago: both the 1m stream and the native 1h history start after the window
+    info = FakeInfo(clock, listed_ms=NOW - 30 * HOUR - 10 * MINUTE)
+    source = ResamplingCandleStore(CandleStore(info, max_candles=500))
+
+    view = source.get_candles("NEW", "1h", 500)
+    assert view.t[0] == info.listed_ms // HOUR * HOUR
+    assert sum(call[0] == "1h" for call in info.calls) == 1
+
+    for _ in range(3):
+        clock.now_ms += 20 * MINUTE
+        view = source.get_candles("NEW", "1h", 500)
+    assert view.t[0] == info.listed_ms // HOUR * HOUR
+    assert view.t[-1] == clock.now_ms // HOUR * HOUR
+    assert sum(call[0] == "1h" for call in info.calls) == 1
@@ -0,0 +1,98 @@
+import numpy as np
+
+from candle_store import CandleBuffer, CandleStore
+from conftest import MINUTE, NOW, FakeInfo
+
+
+def test_short_history_is_covered_after_the_first_full_fetch(clock):
+    info = FakeInfo(clock, listed_ms=NOW - 99 * MINUTE)
+    store = CandleStore(info, max_candles=500)
+
+    view = store.get_candles("NEW", "1m", 500)
+    assert len(view) == 100 and view.t[0] == info.listed_ms
+
+    clock.now_ms += MINUTE
+    view = store.get_candles("NEW", "1m", 500)
+    assert len(view) == 101
+    # Second call only asks for the bars after the last one in memory
+    assert info.calls[-1][1] == NOW
+
+
+def _arrays(start, stop):
+    t = np.arange(start, stop, dtype=np.int64) * MINUTE
+    return t, np.vstack([t / MINUTE + i for i in range(5)]).astype(np.float64)
+
+
+def test_merge_overwrites_the_open_bar():
+    buffer = CandleBuffer(10)
+    buffer.merge_arrays(*_arrays(0, 5))
+    t, values = _arrays(4, 6)
+    values += 100
+    buffer.merge_arrays(t, values)
+
+    view = buffer.view()
+    assert view.t.tolist() == (np.arange(6) * MINUTE).tolist()
+    assert view.close.tolist() == [0 + 3, 1 + 3, 2 + 3, 3 + 3, 104 + 3, 105 + 3]
+
+
+def test_compaction_keeps_the_last_capacity_bars():
+    buffer = CandleBuffer(8)
+    for start in range(0, 40, 3):
+        buffer.merge_arrays(*_arrays(start, start + 4))
+
+    assert len(buffer) == 8
+    view = buffer.view()
+    assert view.t.tolist() == (np.arange(35, 43) * MINUTE).tolist()
+    assert view.open.tolist() == np.arange(35, 43, dtype=float).tolist()
+    assert buffer.view(3).t.tolist() == (np.arange(40, 43) * MINUTE).tolist()
+
+
+def test_refresh_fetches_only_from_the_last_bar(clock):
+    info = FakeInfo(clock)
+    store = CandleStore(info, max_candles=200)
+    store.get_candles("BTC", "1m", 100)
+    assert info.calls[-1][1] == NOW - 100 * MINUTE
+
+    # The bar open at NOW changes before it closes
+    info.revision[NOW] = 10.0
+    clock.now_ms += 2 * MINUTE
+    view = store.get_candles("BTC", "1m", 100)
+
+    assert info.calls[-1][1] == NOW
+    assert len(info.calls) == 2
+    assert view.t[-1] == NOW + 2 * MINUTE
+    assert view.close[-3] == float(info.bar("1m", NOW)["c"])
+    assert np.all(np.diff(view.t) == MINUTE)
+
+
+def test_gap_longer_than_the_window_triggers_a_full_refetch(clock):
+    info = FakeInfo(clock)
+    store = CandleStore(info, max_candles=200)
+    store.get_candles("BTC", "1m", 100)
+
+    clock.now_ms += 500 * MINUTE
+    view = store.get_candles("BTC", "1m", 100)
+
+    assert info.calls[-1][1] == clock.now_ms - 100 * MINUTE
+    assert view.t[-1] == clock.now_ms
+    assert np.all(np.diff(view.t) == MINUTE)
+
+
+def test_gap_in_incremental_fetch_clears_the_buffer(clock):
+    info = FakeInfo(clock)
+    store = CandleStore(info, max_candles=200)
+    store.get_candles("BTC", "1m", 100)
+
+    # The exchange no longer returns the last stored bar nor the three after it
+    missing = {NOW, NOW + MINUTE, NOW + 2 * MINUTE, NOW + 3 * MINUTE}
+    snapshot = info.candles_snapshot
+    info.candles_snapshot = lambda **kw: [c for c in snapshot(**kw) if c["t"] not in missing]
+    clock.now_ms += 5 * MINUTE
+    view = store.get_candles("BTC", "1m", 100)
+
+    # No bars before the gap are kept next to bars after it
+    assert view.t.tolist() == [NOW + 4 * MINUTE, NOW + 5 * MINUTE]
+    assert store.first_t("BTC", "1m") == NOW + 4 * MINUTE
+    # The cleared window is no longer covered: the next call downloads it again
+    store.get_candles("BTC", "1m", 100)
+    assert info.calls[-1][1] == clock.now_ms - 100 * MINUTE
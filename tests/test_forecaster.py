@@ -0,0 +1,236 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecaster
+from forecaster import FORECAST_COLUMNS, FORECAST_STALE_GRACE, ARBackend, ForecastScheduler, HyperliquidForecaster
+
+HOUR = 3600
+# A UTC day boundary: every timeframe closes here
+DAY = 1_700_000_000 // 86_400 * 86_400
+
+
+def _ar_series(n=2000, coef=(0.0005, 0.5, -0.3), noise=0.01, seed=11):
+    """Prices whose log-returns follow an AR(2) with intercept."""
+    rng = np.random.default_rng(seed)
+    returns = np.zeros(n)
+    for i in range(2, n):
+        returns[i] = coef[0] + coef[1] * returns[i - 1] + coef[2] * returns[i - 2] + rng.normal(0, noise)
+    return pd.DataFrame({
+        "ds": pd.date_range("2024-01-01", periods=n + 1, freq="15min"),
+        "y": 100 * np.exp(np.r_[0.0, np.cumsum(returns)]),
+    })
+
+
+def test_ar_backend_recovers_coefficients_and_brackets_yhat():
+    df = _ar_series()
+    forecast, params = ARBackend(order=3).fit(df, "15min", None)
+
+    assert list(forecast.columns) == FORECAST_COLUMNS
+    assert len(forecast) == 1
+    row = forecast.iloc[0]
+    assert row["ds"] == df["ds"].iloc[-1] + pd.Timedelta("15min")
+    assert row["yhat_lower"] < row["yhat"] < row["yhat_upper"]
+    np.testing.assert_allclose(params["coef"], [0.0005, 0.5, -0.3, 0.0], atol=0.05)
+    assert params["sigma"] == pytest.approx(0.01, rel=0.1)
+
+    # One-step prediction from the fitted coefficients on the last three returns
+    returns = np.diff(np.log(df["y"].to_numpy()))
+    expected = df["y"].iloc[-1] * np.exp(params["coef"][0] + params["coef"][1:] @ returns[-1:-4:-1])
+    assert row["yhat"] == pytest.approx(expected)
+
+
+def test_ar_backend_accepts_a_warm_start():
+    df = _ar_series()
+    backend = ARBackend(order=3)
+    first, params = backend.fit(df.iloc[:-1], "15min", None)
+    forecast, _ = backend.fit(df, "15min", params)
+
+    assert list(forecast.columns) == FORECAST_COLUMNS
+    assert forecast["ds"].iloc[0] > first["ds"].iloc[0]
+    cold, _ = backend.fit(df, "15min", None)
+    pd.testing.assert_frame_equal(forecast, cold)
+
+
+def test_ar_backend_rejects_short_series():
+    with pytest.raises(ValueError):
+        ARBackend(order=3).fit(_ar_series(n=7), "15min", None)
+
+
+class FakeForecaster:
+    """forecast_many returning canned rows (or raising), with the real row helpers."""
+
+    _timeframe = staticmethod(HyperliquidForecaster._timeframe)
+    _error_row = HyperliquidForecaster._error_row
+
+    def __init__(self):
+        self.error = None
+        self.calls = []
+
+    def forecast_many(self, coins, intervals):
+        self.calls.append((list(coins), tuple(intervals)))
+        if isinstance(self.error, BaseException):
+            raise self.error
+        if self.error:
+            return [self._error_row(c, i, RuntimeError(self.error)) for c in coins for i in intervals]
+        return [{"Ticker": c, "Timeframe": self._timeframe(i), "Previsione": 1.0} for c in coins for i in intervals]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [float(DAY)]
+    monkeypatch.setattr(forecaster.time, "time", lambda: now[0])
+    return now
+
+
+def test_next_close_steps_from_the_last_processed_close():
+    scheduler = ForecastScheduler(FakeForecaster(), close_delay=5.0)
+    assert scheduler._next_close(DAY, DAY + 10) == (DAY + 900, ("15m",))
+    assert scheduler._next_close(DAY + 2700, DAY + 2710) == (DAY + HOUR, ("15m", "1h"))
+    # Woken 2s after a close (inside close_delay): that close is still the next one
+    assert scheduler._next_close(DAY + 2700, DAY + HOUR + 2) == (DAY + HOUR, ("15m", "1h"))
+
+
+def test_next_close_catches_up_after_missed_closes():
+    scheduler = ForecastScheduler(FakeForecaster(), close_delay=5.0)
+    # Three 15m closes and one 1h close went by during a slow refresh
+    close, due = scheduler._next_close(DAY + 2700, DAY + HOUR + 1800 + 60)
+    assert close == DAY + HOUR + 1800
+    assert due == ("15m", "1h")
+
+
+def test_lookup_flags_missing_errored_and_old_rows_as_stale(clock):
+    fake = FakeForecaster()
+    scheduler = ForecastScheduler(fake)
+    pending = scheduler.lookup(["BTC"])
+    assert [row["Stale"] for row in pending] == [True, True]
+    assert pending[0]["Età (min)"] is None and "error" in pending[0]
+
+    scheduler._refresh(["BTC"], ("15m", "1h"))
+    clock[0] += 60
+    fresh = scheduler.lookup(["BTC"])
+    assert [row["Stale"] for row in fresh] == [False, False]
+    assert fresh[0]["Età (min)"] == 1.0
+
+    # Older than one 15m candle plus the grace period: only the 15m row is stale
+    clock[0] += 900 + FORECAST_STALE_GRACE
+    assert [row["Stale"] for row in scheduler.lookup(["BTC"])] == [True, False]
+
+
+def test_refresh_keeps_the_previous_row_when_the_fit_fails(clock):
+    fake = FakeForecaster()
+    scheduler = ForecastScheduler(fake)
+    scheduler.watch(["BTC"])
+    scheduler._refresh(["BTC"], ("15m", "1h"))
+    published = dict(scheduler._rows)
+
+    clock[0] += 900
+    fake.error = "fit failed"
+    scheduler._refresh(["BTC"], ("15m", "1h"))
+    fake.error = ConnectionError("down")
+    scheduler._refresh(["BTC"], ("15m", "1h"))
+    # Same rows with their original publication time: they age into Stale
+    assert scheduler._rows == published
+
+    # Without a valid row the error is published
+    scheduler.watch(["ETH"])
+    fake.error = "fit failed"
+    scheduler._refresh(["ETH"], ("15m",))
+    assert "error" in scheduler._rows[("ETH", "15m")][0]
+
+
+class FakeBackend(ARBackend):
+    """Pool backend whose fits run inline in FakePool."""
+
+    name = "fake"
+    use_pool = True
+
+
+class FakeProcess:
+    def __init__(self):
+        self.terminated = False
+
+    def terminate(self):
+        self.terminated = True
+
+
+class FakePool:
+    """ProcessPoolExecutor stand-in: the coins in `crashes` fail with BrokenProcessPool."""
+
+    created = []
+
+    def __init__(self, **kwargs):
+        self.crashes = FakePool.crash_plan[len(FakePool.created)]
+        self.submitted = []
+        self.shutdown_calls = []
+        self._processes = {1: FakeProcess()}
+        FakePool.created.append(self)
+
+    def submit(self, fn, df, freq, init):
+        coin = df.attrs["coin"]
+        self.submitted.append(coin)
+        future = Future()
+        if coin in self.crashes:
+            future.set_exception(BrokenProcessPool("worker died"))
+        else:
+            future.set_result(fn(df, freq, init))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_calls.append((wait, cancel_futures))
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    monkeypatch.setattr(forecaster, "ProcessPoolExecutor", FakePool)
+    monkeypatch.setattr(forecaster, "_POOL", None)
+    monkeypatch.setattr(forecaster, "_FORECAST_CACHE", {})
+    monkeypatch.setattr(forecaster, "_MODEL_PARAMS", {})
+    monkeypatch.setattr(FakePool, "created", [])
+    return FakePool
+
+
+def _prepared(coins):
+    prepared = {}
+    for coin in coins:
+        df = _ar_series(n=200, seed=len(coin))
+        df.attrs["coin"] = coin
+        prepared[(coin, "15m")] = (df, "15min", df["y"].iloc[-1], df["ds"].iloc[-1], None)
+    return prepared
+
+
+def test_fit_many_retries_jobs_of_a_broken_pool_one_at_a_time(fake_pool):
+    # First pool: BTC and SOL lose their worker; on the retry pool only SOL crashes again
+    fake_pool.crash_plan = [{"BTC", "SOL"}, {"SOL"}]
+    model = object.__new__(HyperliquidForecaster)
+    model.testnet, model.backend = True, FakeBackend()
+    rows = {}
+    model._fit_many(_prepared(["BTC", "ETH", "SOL"]), rows, fit_timeout=5.0)
+
+    assert "error" not in rows[("ETH", "15m")] and "error" not in rows[("BTC", "15m")]
+    assert "worker died" in rows[("SOL", "15m")]["error"]
+    first, retry = fake_pool.created
+    assert first.submitted == ["BTC", "ETH", "SOL"]
+    assert retry.submitted == ["BTC", "SOL"]
+    assert forecaster._POOL is None
+    # Broken pools are shut down without touching their workers
+    assert first.shutdown_calls == retry.shutdown_calls == [(False, True)]
+    assert not first._processes[1].terminated
+    assert set(forecaster._FORECAST_CACHE) == {(True, "fake", "BTC", "15m"), (True, "fake", "ETH", "15m")}
+
+
+def test_reset_pool_terminates_workers_only_for_stuck_fits(fake_pool):
+    fake_pool.crash_plan = [set(), set()]
+    forecaster._get_pool()
+    forecaster._reset_pool()
+    pool = forecaster._get_pool()
+    forecaster._reset_pool(terminate=True)
+
+    first, second = fake_pool.created
+    assert not first._processes[1].terminated
+    assert second._processes[1].terminated
+    assert first.shutdown_calls == second.shutdown_calls == [(False, True)]
+    assert forecaster._POOL is None and pool is second
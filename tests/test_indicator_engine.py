@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicator_engine import IndicatorEngine
+
+ta = pytest.importorskip("ta")
+
+STEP = 900_000
+N = 260
+
+
+@pytest.fixture(scope="module")
+def candles():
+    rng = np.random.RandomState(5)
+    close = 100 + np.cumsum(rng.randn(N))
+    close[50:53] = close[49]  # flat stretch: zero gains/losses in the RSI
+    high = close + rng.rand(N)
+    low = close - rng.rand(N)
+    return np.arange(N, dtype=np.int64) * STEP, high, low, close
+
+
+def _reference(high, low, close):
+    h, l, c = pd.Series(high), pd.Series(low), pd.Series(close)
+    return {
+        "ema_20": ta.trend.EMAIndicator(c, 20).ema_indicator(),
+        "ema_50": ta.trend.EMAIndicator(c, 50).ema_indicator(),
+        "macd": ta.trend.MACD(c).macd_diff(),
+        "rsi_7": ta.momentum.RSIIndicator(c, 7).rsi(),
+        "rsi_14": ta.momentum.RSIIndicator(c, 14).rsi(),
+        "atr_3": ta.volatility.AverageTrueRange(h, l, c, 3).average_true_range(),
+        "atr_14": ta.volatility.AverageTrueRange(h, l, c, 14).average_true_range(),
+    }
+
+
+def _assert_matches_ta(engine, high, low, close):
+    snapshot = engine.snapshot("BTC", "15m")
+    for name, series in _reference(high, low, close).items():
+        expected = series.to_numpy()[-engine.history:]
+        np.testing.assert_array_equal(np.array(snapshot[name]), expected, err_msg=name)
+
+
+def test_from_scratch_matches_ta(candles):
+    t, high, low, close = candles
+    engine = IndicatorEngine(history=10)
+    # Last bar still open: computed as a preview
+    engine.sync("BTC", "15m", t[:200], high[:200], low[:200], close[:200])
+    _assert_matches_ta(engine, high[:200], low[:200], close[:200])
+
+
+def test_incremental_matches_ta(candles):
+    t, high, low, close = candles
+    engine = IndicatorEngine(history=10)
+    engine.sync("BTC", "15m", t[:200], high[:200], low[:200], close[:200])
+    # Sliding 200-bar window, one bar at a time, always with the newest bar open
+    for end in range(201, N + 1):
+        window = slice(end - 200, end)
+        engine.sync("BTC", "15m", t[window], high[window], low[window], close[window])
+        if end % 20 == 0 or end == N:
+            _assert_matches_ta(engine, high[:end], low[:end], close[:end])
+
+
+def test_open_bar_preview_does_not_alter_state(candles):
+    t, high, low, close = candles
+    engine = IndicatorEngine(history=10)
+    # Open bar first shown with a different close, then with its final values
+    live_close = close[:150].copy()
+    live_close[-1] += 5.0
+    engine.sync("BTC", "15m", t[:150], high[:150], low[:150], live_close)
+    engine.sync("BTC", "15m", t[:150], high[:150], low[:150], close[:150])
+    _assert_matches_ta(engine, high[:150], low[:150], close[:150])
+
+
+def test_partial_bar_seen_after_its_close_time_is_not_committed(candles):
+    # A view served from memory after the close still carries the partial OHLC
+    # of the last bar: the final values arriving with the next bar must win
+    t, high, low, close = candles
+    engine = IndicatorEngine(history=10)
+    partial_high, partial_low, partial_close = high[:150].copy(), low[:150].copy(), close[:150].copy()
+    partial_high[-1] += 3.0
+    partial_low[-1] -= 3.0
+    partial_close[-1] += 2.0
+    engine.sync("BTC", "15m", t[:150], partial_high, partial_low, partial_close)
+    engine.sync("BTC", "15m", t[:152], high[:152], low[:152], close[:152])
+    _assert_matches_ta(engine, high[:152], low[:152], close[:152])
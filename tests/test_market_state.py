@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+
+import market_state
+from market_state import MAX_STALE_FACTOR, REFRESH_TTL_MARGIN, MarketStateCache
+
+
+class FakeInfo:
+    """meta_and_asset_ctxs counting calls; `gate` (if set) holds each call until released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+        self.gate = None
+        self.entered = threading.Event()
+
+    def meta_and_asset_ctxs(self):
+        self.calls += 1
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error:
+            raise self.error
+        return [{"universe": [{"name": "BTC"}, {"name": "ETH"}]}, [{"markPx": str(self.calls)}, {"markPx": "1"}]]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(market_state.time, "time", lambda: now[0])
+    return now
+
+
+def _wait_idle(cache):
+    # The background refresh holds _refresh_lock for the whole download
+    with cache._refresh_lock:
+        pass
+
+
+def test_hit_stale_and_miss_transitions(clock):
+    info = FakeInfo()
+    cache = MarketStateCache(info, ttl=2.0)
+
+    first = cache.get()
+    assert (cache.misses, info.calls) == (1, 1)
+    assert first.index["BTC"][0] == 0 and first.index["ETH"][1]["markPx"] == "1"
+
+    clock[0] += 1.0
+    assert cache.get() is first
+    assert cache.hits == 1
+
+    # Past the TTL: the old snapshot is served and refreshed in the background
+    clock[0] += 2.0
+    assert cache.get() is first
+    assert cache.stale_hits == 1
+    info.entered.wait(5)
+    _wait_idle(cache)
+    assert info.calls == 2 and cache.get() is not first
+
+    # Past max_stale the refresh is synchronous again
+    clock[0] += 2.0 * MAX_STALE_FACTOR
+    snapshot = cache.get()
+    assert (cache.misses, info.calls) == (2, 3)
+    assert snapshot.fetched_at == clock[0]
+    assert cache.stats()["hit_ratio"] == pytest.approx(3 / 5)
+
+
+def test_failed_download_keeps_the_previous_snapshot(clock):
+    info = FakeInfo()
+    info.error = ConnectionError("down")
+    cache = MarketStateCache(info, ttl=2.0)
+    assert cache.get() is None
+    assert cache.refresh_errors == 1
+
+    info.error = None
+    snapshot = cache.get()
+    info.error = ConnectionError("down")
+    clock[0] += 2.0 * MAX_STALE_FACTOR
+    assert cache.get() is snapshot
+    assert cache.refresh_errors == 2
+
+
+def test_only_one_refresh_is_in_flight(clock):
+    info = FakeInfo()
+    cache = MarketStateCache(info, ttl=2.0)
+    first = cache.get()
+
+    info.gate = threading.Event()
+    info.entered.clear()
+    clock[0] += 3.0
+    for _ in range(10):
+        assert cache.get() is first
+    info.entered.wait(5)
+
+    # Synchronous refreshes started meanwhile wait for the same download
+    results = []
+    waiters = [threading.Thread(target=lambda: results.append(cache.refresh())) for _ in range(3)]
+    for thread in waiters:
+        thread.start()
+    info.gate.set()
+    for thread in waiters:
+        thread.join(5)
+    _wait_idle(cache)
+
+    assert info.calls == 2
+    assert cache.stale_hits == 10
+    assert len(results) == 3 and all(snapshot is cache._snapshot for snapshot in results)
+
+
+def test_start_raises_the_ttl_above_the_refresh_interval(clock):
+    info = FakeInfo()
+    cache = MarketStateCache(info, ttl=2.0)
+    cache.start(interval=15.0)
+    try:
+        assert cache.ttl == 15.0 + REFRESH_TTL_MARGIN
+        assert cache.max_stale == cache.ttl * MAX_STALE_FACTOR
+        info.entered.wait(5)
+        _wait_idle(cache)
+
+        # Between two background refreshes reads are plain hits
+        clock[0] += 16.0
+        cache.get()
+        assert (cache.hits, cache.stale_hits, cache.misses) == (1, 0, 0)
+        assert info.calls == 1
+
+        # A second start while running changes nothing
+        cache.start(interval=60.0)
+        assert cache.ttl == 15.0 + REFRESH_TTL_MARGIN
+    finally:
+        cache.stop()
+        cache._refresher.join(5)
+    assert not cache.stats()["background"]
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from orderflow import IcebergDetector, MetricRing, OrderBookData
+
+PRICES = np.arange(40) * 0.5 + 100.0
+
+
+def test_metric_ring_window_sums_match_naive_recomputation():
+    rng = np.random.default_rng(3)
+    capacity = 7
+    ring = MetricRing(("a", "b"), capacity)
+    rows = []
+    start = datetime(2024, 1, 1)
+    # Many compactions (every `capacity` appends once full)
+    for i in range(200):
+        a, b = rng.normal(0, 1e6), rng.random()
+        ring.append(start + timedelta(seconds=i), a=a, b=b)
+        rows.append((a, b))
+        kept = np.array(rows[-capacity:])
+        assert len(ring) == len(kept)
+        np.testing.assert_array_equal(ring.column("a"), kept[:, 0])
+        assert ring.last("b") == kept[-1, 1]
+        for n in (1, 3, capacity, 50):
+            window = kept[-min(n, len(kept)):]
+            assert np.isclose(ring.sum_last("a", n), window[:, 0].sum(), rtol=1e-9, atol=1e-6)
+            assert np.isclose(ring.mean_last("b", n), window[:, 1].mean(), rtol=1e-9)
+
+
+def test_metric_ring_empty():
+    ring = MetricRing(("a",), 4)
+    assert len(ring) == 0
+    assert ring.sum_last("a", 5) == 0.0
+    assert ring.mean_last("a", 5) == 0.0
+    assert ring.last("a", default=-1.0) == -1.0
+
+
+def _noisy_book(rng, cv, mean=5.0):
+    sizes = np.maximum(rng.normal(mean, mean * cv, len(PRICES)), 0.01)
+    return np.column_stack([PRICES, sizes])
+
+
+def test_iceberg_noisy_book_without_hidden_orders_is_not_flagged():
+    # 40 levels, 5 updates/s for 120s, i.i.d. size noise: no hidden orders
+    for cv in (0.3, 0.5):
+        rng = np.random.default_rng(0)
+        detector = IcebergDetector()
+        flagged = []
+        for k in range(600):
+            flagged.append(len(detector.update(k * 0.2, _noisy_book(rng, cv))))
+        # After the first window nothing is flagged
+        assert sum(flagged[150:]) == 0
+
+
+def test_iceberg_refills_without_executed_volume_are_ignored():
+    rng = np.random.default_rng(1)
+    detector = IcebergDetector()
+    for k in range(600):
+        levels = detector.update(k * 0.2, _noisy_book(rng, 0.5), executed=lambda price: 0.0)
+        if k >= 150:
+            assert levels == []
+
+
+def _hidden_order_sizes():
+    # Visible 10 lots hit down to 1 and refilled, over and over
+    return [10.0, 9.0, 1.0, 10.0, 9.5, 1.5, 10.0, 8.0, 0.5, 10.0]
+
+
+def test_iceberg_refills_confirmed_by_trades_are_flagged():
+    detector = IcebergDetector(max_cv=0.0)
+    flagged = False
+    for k, size in enumerate(_hidden_order_sizes()):
+        levels = np.array([[100.0, size]])
+        flagged = detector.update(k * 0.5, levels, executed=lambda price: 20.0) == [100.0]
+    assert flagged
+
+
+def test_iceberg_refills_need_trades():
+    detector = IcebergDetector(max_cv=0.0)
+    for k, size in enumerate(_hidden_order_sizes()):
+        assert detector.update(k * 0.5, np.array([[100.0, size]])) == []
+
+
+def test_iceberg_signal_contribution_is_bounded():
+    data = OrderBookData("BTC")
+    for k in range(10):
+        data.metrics.append(
+            datetime(2024, 1, 1) + timedelta(seconds=k), spread=1.0, bid_volume=1.0, ask_volume=1.0, best_bid=100.0, best_ask=101.0,
+            delta_volume=0.0, buy_volume=0.0, sell_volume=0.0, volume_imbalance=0.0,
+            depth_imbalance=0.0, trade_flow_score=0.0, aggressive_buy_ratio=0.5, cvd=0.0, delta_ratio=0.0,
+        )
+    # Every parsed bid level flagged: still a single bounded term
+    data.iceberg_levels = [100.0 - 0.5 * i for i in range(1, 21)]
+    signal, _, reasons = data.get_trading_signal()
+    assert signal == "NEUTRAL"
+    assert reasons.count("Iceberg support") == 1
+
+
+def _book_update(exchange_ms, bid=100.0, ask=100.5, size=10.0):
+    return {"channel": "l2Book", "data": {
+        "coin": "BTC", "time": exchange_ms,
+        "levels": [[{"px": str(ask), "sz": str(size), "n": 1}], [{"px": str(bid), "sz": str(size), "n": 1}]],
+    }}
+
+
+def test_trade_tape_uses_exchange_time():
+    # Exchange clock far behind the local one: the tape must still be live
+    exchange_ms = 1_600_000_000_000
+    data = OrderBookData("BTC")
+    data.handle_trades({"channel": "trades", "data": [
+        {"coin": "BTC", "side": "B", "px": "100.5", "sz": "30", "time": exchange_ms - 1_000},
+    ]})
+    data.handle_update(_book_update(exchange_ms))
+    assert data.trade_tape_live
+    row = data.metrics.view()[-1]
+    assert row["buy_volume"] == 100.5 * 30
+    # Delta normalized by the visible notional (10 lots per side)
+    assert abs(row["delta_ratio"] - 100.5 * 30 / (100.0 * 10 + 100.5 * 10)) < 1e-12
+
+    # 61s later on the exchange clock the trade has left the window
+    data.handle_update(_book_update(exchange_ms + 61_000))
+    assert not data.trade_tape_live
+    assert data.trade_tape.window(exchange_ms / 1000 + 61) == (0.0, 0.0)
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from candle_store import CandleView
+from market_state import MarketStateSnapshot
+from screener import UniverseScreener, _percentile_rank, atr_pct_matrix
+
+UNIVERSE = [
+    # name, dayNtlVlm, funding, openInterest, markPx, impactPxs, delisted
+    ("A", "5e7", "0.00001", "1000", "100", ["99.99", "100.01"], False),
+    ("B", "3e7", "0.0005", "3000", "10", ["9.99", "10.01"], False),
+    ("C", "2e7", "-0.0001", "10", "50", ["49.9", "50.1"], False),
+    ("D", "9e9", "0.0", "1", "1", ["0.99", "1.01"], True),
+    ("E", "1e5", "0.0", "1", "1", ["0.99", "1.01"], False),
+    ("F", "1e7", None, "500", "20", None, False),
+]
+# Hourly range as % of a flat close at 100 (= ATR%), and bars of history
+RANGES = {"A": (0.6, 100), "B": (2.0, 5), "F": (0.1, 100)}
+
+
+class FakeStore:
+    def get_candles(self, coin, interval, limit):
+        if coin not in RANGES:
+            raise RuntimeError("no candles")
+        pct, bars = RANGES[coin]
+        n = min(bars, limit)
+        close = np.full(n, 100.0)
+        return CandleView(np.arange(n, dtype=np.int64), close, close + pct / 2, close - pct / 2, close, close)
+
+
+def _screener():
+    universe = {"universe": [{"name": name, "isDelisted": delisted}
+                             for name, *_, delisted in UNIVERSE]}
+    contexts = [{"dayNtlVlm": volume, "funding": funding, "openInterest": oi, "markPx": mark, "impactPxs": impact}
+                for _, volume, funding, oi, mark, impact, _ in UNIVERSE]
+    snapshot = MarketStateSnapshot(0.0, (universe, contexts), {})
+    analyzer = SimpleNamespace(
+        market_state=SimpleNamespace(get=lambda: snapshot),
+        candle_store=SimpleNamespace(store=FakeStore()),
+    )
+    return UniverseScreener(analyzer)
+
+
+def test_percentile_rank_puts_nan_last():
+    assert _percentile_rank(np.array([3.0, np.nan, 1.0, 2.0])).tolist() == [1.0, 0.0, 0.0, 0.5]
+    assert _percentile_rank(np.array([np.nan, 7.0])).tolist() == [0.0, 1.0]
+
+
+def test_context_matrix_skips_delisted_and_keeps_missing_fields_as_nan():
+    df = _screener()._context_matrix(None)
+    assert df["coin"].tolist() == ["A", "B", "C", "E", "F"]
+    row = df.set_index("coin").loc["A"]
+    assert row["spread_bps"] == pytest.approx(2.0)
+    assert row["oi_usd"] == pytest.approx(1e5)
+    missing = df.set_index("coin").loc["F"]
+    assert np.isnan(missing["spread_bps"]) and np.isnan(missing["funding"])
+
+    assert _screener()._context_matrix(["F", "D", "A"])["coin"].tolist() == ["A", "F"]
+
+
+def test_atr_pct_matrix_matches_a_per_row_loop():
+    rng = np.random.default_rng(3)
+    close = 100 + np.cumsum(rng.normal(0, 1, (4, 30)), axis=1)
+    high, low = close + rng.random((4, 30)), close - rng.random((4, 30))
+    # Row 1 has only 6 bars of history, row 3 none
+    for m in (high, low, close):
+        m[1, :-6] = np.nan
+        m[3] = np.nan
+
+    result = atr_pct_matrix(high, low, close, 14)
+    for row in range(3):
+        valid = ~np.isnan(close[row])
+        h, l, c = high[row, valid], low[row, valid], close[row, valid]
+        tr = np.r_[h[0] - l[0], np.maximum(h[1:] - l[1:], np.maximum(abs(h[1:] - c[:-1]), abs(l[1:] - c[:-1])))]
+        assert result[row] == pytest.approx(tr[-14:].mean() / c[-1] * 100)
+    assert np.isnan(result[3])
+
+
+def test_screen_orders_by_score_and_ranks_missing_data_last():
+    df = _screener().screen()
+    # E is below the volume floor, D delisted
+    assert df["coin"].tolist() == ["A", "B", "F", "C"]
+    assert df["score"].iloc[0] == pytest.approx(1.0)
+    row = df.set_index("coin")
+    assert row.loc["B", "atr_pct"] == pytest.approx(2.0)
+    # No candles for C: NaN ATR%, volatility rank 0
+    assert np.isnan(row.loc["C", "atr_pct"])
+    assert row.loc["C", "score"] == pytest.approx(0.3 / 3 + 0.1 * 0.5)
+
+    assert _screener().screen(max_candidates=2)["coin"].tolist() == ["A", "B"]
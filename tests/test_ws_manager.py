@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import ws_manager
+from ws_manager import WebSocketManager
+
+
+def _manager():
+    # Not started: subscribe only fills the registry, no socket is opened
+    return WebSocketManager(testnet=True)
+
+
+def test_dispatch_routes_by_channel_coin_and_interval():
+    manager = _manager()
+    received = []
+
+    def handler(name):
+        return lambda msg: received.append((name, msg["channel"]))
+
+    btc_book, eth_book = handler("btc_book"), handler("eth_book")
+    btc_trades, btc_1m, btc_5m = handler("btc_trades"), handler("btc_1m"), handler("btc_5m")
+    manager.subscribe({"type": "l2Book", "coin": "BTC"}, btc_book)
+    manager.subscribe({"type": "l2Book", "coin": "ETH"}, eth_book)
+    manager.subscribe({"type": "trades", "coin": "BTC"}, btc_trades)
+    manager.subscribe({"type": "candle", "coin": "BTC", "interval": "1m"}, btc_1m)
+    manager.subscribe({"type": "candle", "coin": "BTC", "interval": "5m"}, btc_5m)
+    assert manager.subscription_count == 5
+
+    manager._dispatch({"channel": "l2Book", "data": {"coin": "ETH", "levels": []}})
+    manager._dispatch({"channel": "trades", "data": [{"coin": "BTC", "px": "1"}]})
+    manager._dispatch({"channel": "candle", "data": {"s": "BTC", "i": "5m", "t": 0}})
+    # Unknown channel, empty payload, coin without handlers
+    manager._dispatch({"channel": "allMids", "data": {"mids": {}}})
+    manager._dispatch({"channel": "trades", "data": []})
+    manager._dispatch({"channel": "l2Book", "data": {"coin": "SOL", "levels": []}})
+    assert received == [("eth_book", "l2Book"), ("btc_trades", "trades"), ("btc_5m", "candle")]
+
+
+def test_handler_errors_do_not_stop_other_handlers_and_unsubscribe_removes_them():
+    manager = _manager()
+    received = []
+
+    def failing(msg):
+        raise ValueError("boom")
+
+    def ok(msg):
+        received.append(msg["data"]["coin"])
+
+    subscription = {"type": "l2Book", "coin": "BTC"}
+    manager.subscribe(subscription, failing)
+    manager.subscribe(subscription, ok)
+    manager.subscribe(subscription, ok)
+    manager._dispatch({"channel": "l2Book", "data": {"coin": "BTC"}})
+    assert received == ["BTC"]
+
+    manager.unsubscribe(subscription, failing)
+    manager.unsubscribe(subscription, ok)
+    manager._dispatch({"channel": "l2Book", "data": {"coin": "BTC"}})
+    assert received == ["BTC"]
+    assert manager.subscription_count == 0
+
+
+def test_pong_frames_keep_a_quiet_connection_healthy(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ws_manager.time, "time", lambda: now[0])
+    manager = _manager()
+    sdk_frames = []
+    sdk = SimpleNamespace(
+        ws=SimpleNamespace(on_message=lambda app, message: sdk_frames.append(message)),
+        is_alive=lambda: True,
+    )
+    manager._watch_frames(sdk)
+    manager._ws = sdk
+    manager.connected_at = now[0]
+
+    # Only pongs (the SDK pings every 50s) and no data for longer than stale_seconds
+    for _ in range(5):
+        now[0] += 50
+        sdk.ws.on_message(None, '{"channel": "pong"}')
+    assert sdk_frames == ['{"channel": "pong"}'] * 5
+    assert manager._health() is None
+
+    now[0] += manager.stale_seconds + 1
+    assert manager._health().startswith("no messages")
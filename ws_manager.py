@@ -0,0 +1,228 @@
+"""
+Connessione WebSocket Hyperliquid unica e multiplexata per rete.
+
+Tutte le sottoscrizioni del processo (l2Book e trades per l'order flow, candle
+per la modalità push degli indicatori) passano da un solo socket: il
+`WebsocketManager` dell'SDK riceve i messaggi e li consegna a `_dispatch`, che
+li smista agli handler del coin con una lookup nel dict
+(canale, coin[, interval]) -> handler. I thread sono sempre tre (socket, ping
+dell'SDK e supervisore) qualunque sia il numero di coin.
+
+Il supervisore controlla la connessione ogni WS_CHECK_INTERVAL secondi: se il
+socket è chiuso o non arrivano frame da WS_STALE_SECONDS (es. "Expired" lato
+server) apre una nuova connessione e risottoscrive tutto il registry. Contano
+tutti i frame, anche i pong del ping periodico dell'SDK e le
+subscriptionResponse: un socket sano ma senza dati (coin poco scambiati) non
+viene riaperto.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from hyperliquid.websocket_manager import WebsocketManager
+
+import hl_client
+
+# Silenzio (secondi) dopo cui la connessione viene considerata morta
+WS_STALE_SECONDS = 120.0
+# Intervallo (secondi) dei controlli del supervisore
+WS_CHECK_INTERVAL = 10.0
+
+Handler = Callable[[Dict[str, Any]], None]
+SubscriptionKey = Tuple[str, ...]
+
+_managers: Dict[bool, "WebSocketManager"] = {}
+_managers_lock = threading.Lock()
+
+
+def subscription_key(subscription: Dict[str, Any]) -> SubscriptionKey:
+    """Chiave di routing di una sottoscrizione coin-based (l2Book, trades, candle)."""
+    if subscription["type"] == "candle":
+        return ("candle", subscription["coin"], subscription["interval"])
+    return (subscription["type"], subscription["coin"])
+
+
+def message_key(msg: Dict[str, Any]) -> Optional[SubscriptionKey]:
+    """Chiave di routing di un messaggio (None per canali non gestiti o vuoti)."""
+    channel = msg.get("channel")
+    data = msg.get("data")
+    if not data:
+        return None
+    if channel == "l2Book":
+        return ("l2Book", data["coin"])
+    if channel == "trades":
+        return ("trades", data[0]["coin"])
+    if channel == "candle":
+        return ("candle", data["s"], data["i"])
+    return None
+
+
+class WebSocketManager:
+    def __init__(self, testnet: bool = True, stale_seconds: float = WS_STALE_SECONDS,
+                 check_interval: float = WS_CHECK_INTERVAL):
+        self.testnet = testnet
+        self.stale_seconds = stale_seconds
+        self.check_interval = check_interval
+        # Chiave -> handler (tuple immutabile: _dispatch legge senza lock)
+        self._handlers: Dict[SubscriptionKey, Tuple[Handler, ...]] = {}
+        # Chiave -> payload della sottoscrizione, risottoscritto a ogni riconnessione
+        self._subscriptions: Dict[SubscriptionKey, Dict[str, Any]] = {}
+        # Chiave -> id della sottoscrizione sulla connessione corrente
+        self._sdk_ids: Dict[SubscriptionKey, int] = {}
+        self._ws: Optional[WebsocketManager] = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected_at = 0.0
+        self.last_message = 0.0
+        self.reconnects = 0
+
+    # ==============================
+    #       CICLO DI VITA
+    # ==============================
+    def start(self) -> None:
+        """Apre la connessione e avvia il supervisore (idempotente)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._connect()
+            self._thread = threading.Thread(target=self._run, name="ws-manager", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            self._close()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval + 1)
+            self._thread = None
+
+    def _connect(self) -> None:
+        """Nuova connessione SDK con tutte le sottoscrizioni del registry (da chiamare col lock)."""
+        self._close()
+        ws = WebsocketManager(hl_client.base_url_for(self.testnet))
+        self._watch_frames(ws)
+        ws.daemon = True
+        ws.ping_sender.daemon = True
+        ws.start()
+        self._ws = ws
+        self.connected_at = time.time()
+        # Prima dell'apertura l'SDK accoda le sottoscrizioni e le invia in on_open
+        for key, subscription in self._subscriptions.items():
+            self._sdk_ids[key] = ws.subscribe(subscription, self._dispatch)
+
+    def _watch_frames(self, ws: WebsocketManager) -> None:
+        """
+        Aggiorna `last_message` a ogni frame ricevuto: l'SDK consuma pong e
+        subscriptionResponse senza passarli alle callback delle sottoscrizioni.
+        """
+        sdk_on_message = ws.ws.on_message
+
+        def on_message(app, message):
+            self.last_message = time.time()
+            sdk_on_message(app, message)
+
+        ws.ws.on_message = on_message
+
+    def _close(self) -> None:
+        ws, self._ws = self._ws, None
+        self._sdk_ids.clear()
+        if ws is not None:
+            try:
+                ws.stop()
+            except Exception as e:
+                print(f"[WS] Close error: {str(e)[:80]}")
+
+    def _health(self) -> Optional[str]:
+        """Motivo per cui la connessione va ricreata, None se è sana."""
+        if self._ws is None or not self._ws.is_alive():
+            return "connection closed"
+        silence = time.time() - max(self.last_message, self.connected_at)
+        if silence > self.stale_seconds:
+            return f"no messages for {silence:.0f}s"
+        return None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            with self._lock:
+                if not self._subscriptions or self._stop.is_set():
+                    continue
+                reason = self._health()
+                if reason is None:
+                    continue
+                print(f"[WS] {reason}, reconnecting ({len(self._subscriptions)} subscriptions)")
+                try:
+                    self._connect()
+                    self.reconnects += 1
+                except Exception as e:
+                    print(f"[WS] Reconnect failed: {str(e)[:80]}")
+
+    # ==============================
+    #       SOTTOSCRIZIONI
+    # ==============================
+    def subscribe(self, subscription: Dict[str, Any], handler: Handler) -> None:
+        """
+        Registra `handler` per la sottoscrizione; il canale viene sottoscritto sul
+        socket solo al primo handler della chiave.
+        """
+        key = subscription_key(subscription)
+        with self._lock:
+            handlers = self._handlers.get(key, ())
+            if handler in handlers:
+                return
+            self._handlers[key] = handlers + (handler,)
+            if key in self._subscriptions:
+                return
+            self._subscriptions[key] = dict(subscription)
+            if self._ws is not None:
+                self._sdk_ids[key] = self._ws.subscribe(subscription, self._dispatch)
+
+    def unsubscribe(self, subscription: Dict[str, Any], handler: Handler) -> None:
+        """Rimuove `handler`; all'ultimo handler della chiave il canale viene disiscritto."""
+        key = subscription_key(subscription)
+        with self._lock:
+            handlers = tuple(h for h in self._handlers.get(key, ()) if h != handler)
+            if handlers:
+                self._handlers[key] = handlers
+                return
+            self._handlers.pop(key, None)
+            self._subscriptions.pop(key, None)
+            subscription_id = self._sdk_ids.pop(key, None)
+            # Prima dell'apertura l'SDK non può disiscrivere: i messaggi restano senza handler
+            if self._ws is not None and subscription_id is not None and self._ws.ws_ready:
+                try:
+                    self._ws.unsubscribe(subscription, subscription_id)
+                except Exception as e:
+                    print(f"[WS] Unsubscribe failed for {key}: {str(e)[:80]}")
+
+    def _dispatch(self, msg: Dict[str, Any]) -> None:
+        key = message_key(msg)
+        for handler in self._handlers.get(key, ()):
+            try:
+                handler(msg)
+            except Exception as e:
+                print(f"[WS] Handler error {key}: {str(e)[:80]}")
+
+    @property
+    def subscription_count(self) -> int:
+        return len(self._subscriptions)
+
+    def is_live(self) -> bool:
+        """True se la connessione è aperta e riceve messaggi."""
+        with self._lock:
+            return self._health() is None
+
+
+def get_ws_manager(testnet: bool = True) -> WebSocketManager:
+    """Connessione multiplexata condivisa per rete, avviata alla prima chiamata."""
+    manager = _managers.get(testnet)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(testnet)
+            if manager is None:
+                print(f"[WS] Starting shared multiplexed WebSocket (testnet={testnet})")
+                manager = WebSocketManager(testnet)
+                manager.start()
+                _managers[testnet] = manager
+    return manager